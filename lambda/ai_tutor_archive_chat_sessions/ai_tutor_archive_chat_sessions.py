@@ -0,0 +1,160 @@
+import json
+import os
+import datetime
+from botocore.exceptions import ClientError
+from ai_tutor_common import chat_archive, lazy, metrics  # 공통 레이어
+
+# 환경 변수 가져오기
+CHAT_TABLE = os.environ.get('CHAT_TABLE', '테이블 명칭')  # ai_tutor_chatbot 대화 이력 테이블
+CHAT_BUCKET = os.environ.get('CHAT_BUCKET', '버킷 명칭')  # ai_tutor_chatbot 문서 버킷 (chat/ 경로에 보관)
+IDLE_MINUTES = int(os.environ.get('IDLE_MINUTES', '60'))  # 이 시간 동안 대화가 없으면 보관 대상
+TIME_BUDGET_MARGIN_MS = 30 * 1000  # 남은 실행 시간이 이보다 적으면 다음 실행으로 넘김
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+# S3 / DynamoDB 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3', region_name=AWS_REGION), 's3')
+
+def create_chat_table():
+    import boto3
+    dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+    return metrics.instrument_client(dynamodb.Table(CHAT_TABLE), 'dynamodb')
+
+s3 = lazy.LazyClient(create_s3_client, 's3')
+chat_table = lazy.LazyClient(create_chat_table, 'dynamodb')
+lazy.prewarm(s3, chat_table)
+
+def load_archived_messages(key, archived_count):
+    """
+    보관 객체에서 세션에 속한 앞부분 archived_count개 메시지 조회
+    """
+    if not archived_count:
+        return []
+    try:
+        response = s3.get_object(Bucket=CHAT_BUCKET, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            raise ValueError(f"보관 객체 없음: {key}")
+        raise
+    return chat_archive.decode_archive(response['Body'].read())['messages'][:archived_count]
+
+def archive_session(item):
+    """
+    세션의 오래된 턴을 S3 보관 객체로 옮기고 최근 HOT_TURNS 턴만 DynamoDB에 남김
+    반환값: 보관한 메시지 수 (보관할 턴이 없거나 그 사이 대화가 이어졌으면 0)
+    """
+    session_id = item['tt']
+    messages = item.get('messages', [])
+    archived, hot = chat_archive.split_hot_turns(messages)
+    if not archived:
+        return 0
+
+    key = item.get('archive_key') or chat_archive.archive_key(item.get('document_path'), session_id)
+    archived_count = int(item.get('archived_count', 0))
+    archive_messages = load_archived_messages(key, archived_count) + archived
+
+    # 1. 보관 객체 기록 (행을 갱신하기 전이므로 실패해도 대화 이력은 그대로)
+    s3.put_object(
+        Bucket=CHAT_BUCKET,
+        Key=key,
+        Body=chat_archive.encode_archive(session_id, item.get('document_path'), archive_messages,
+                                         datetime.datetime.utcnow().isoformat()),
+        ContentType='application/gzip'
+    )
+
+    # 2. 행에는 최근 턴만 남김 (읽은 뒤 대화가 이어졌으면 조건 실패 -> 다음 실행에서 다시 보관)
+    condition = "size(messages) = :message_count"
+    values = {
+        ':hot': hot,
+        ':key': key,
+        ':count': len(archive_messages),
+        ':message_count': len(messages)
+    }
+    if 'updated_at' in item:
+        condition += " AND updated_at = :seen"
+        values[':seen'] = item['updated_at']
+    try:
+        chat_table.update_item(
+            Key={'tt': session_id},
+            UpdateExpression="SET messages = :hot, archive_key = :key, archived_count = :count",
+            ConditionExpression=condition,
+            ExpressionAttributeValues=values
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            print(f"보관 중 대화가 이어진 세션 (다음 실행에서 재시도): {session_id}")
+            return 0
+        raise
+    print(f"세션 보관: {session_id} -> s3://{CHAT_BUCKET}/{key} (메시지 {len(archived)}개 보관, {len(hot)}개 유지)")
+    return len(archived)
+
+@metrics.instrument_handler
+def lambda_handler(event, context):
+    """
+    오래 대화가 없는 챗봇 세션의 이력을 S3로 보관하는 주기 작업 (EventBridge 스케줄 트리거)
+
+    - updated_at이 IDLE_MINUTES보다 오래된 세션(이전 버전에서 저장된 updated_at 없는 세션 포함)을 조회
+    - 최근 HOT_TURNS 턴을 제외한 메시지를 {folder}/{document}/chat/{session}.json.gz에 gzip으로 기록
+    - DynamoDB 행에는 최근 턴과 보관 객체 위치(archive_key, archived_count)만 남김
+    (ai_tutor_chatbot은 보관된 세션이 다시 호출되면 그때 보관 객체를 읽어 전체 이력을 반환)
+
+    필요한 IAM 권한:
+    - s3:GetObject, s3:PutObject
+    - dynamodb:Scan, dynamodb:UpdateItem
+    """
+    started_at = datetime.datetime.now()
+    print("ai_tutor_archive_chat_sessions 함수 시작")
+
+    try:
+        cutoff = (datetime.datetime.utcnow() - datetime.timedelta(minutes=IDLE_MINUTES)).isoformat()
+        scan_kwargs = {
+            'FilterExpression': "attribute_not_exists(updated_at) OR updated_at < :cutoff",
+            'ExpressionAttributeValues': {':cutoff': cutoff}
+        }
+        scanned = 0
+        archived_sessions = 0
+        archived_messages = 0
+        failed = []
+        finished = True
+        while True:
+            response = chat_table.scan(**scan_kwargs)
+            for item in response.get('Items', []):
+                scanned += 1
+                try:
+                    count = archive_session(item)
+                except Exception as e:
+                    print(f"세션 보관 오류 (건너뜀): {item.get('tt')} - {str(e)}")
+                    failed.append(item.get('tt'))
+                    continue
+                if count:
+                    archived_sessions += 1
+                    archived_messages += count
+            if 'LastEvaluatedKey' not in response:
+                break
+            if context is not None and context.get_remaining_time_in_millis() < TIME_BUDGET_MARGIN_MS:
+                print("남은 실행 시간 부족: 나머지 세션은 다음 실행에서 보관합니다.")
+                finished = False
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        elapsed = (datetime.datetime.now() - started_at).total_seconds()
+        print(f"세션 보관 완료: 대상 {scanned}개, 보관 {archived_sessions}개 (메시지 {archived_messages}개), "
+              f"오류 {len(failed)}개 ({elapsed:.1f}초)")
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "message": "대화 이력 보관 완료",
+                "scanned": scanned,
+                "archived_sessions": archived_sessions,
+                "archived_messages": archived_messages,
+                "failed": failed,
+                "finished": finished
+            }, ensure_ascii=False)
+        }
+
+    except Exception as e:
+        error_message = f"대화 이력 보관 중 오류 발생: {str(e)}"
+        print(error_message)
+        return {"statusCode": 500, "body": json.dumps({"message": error_message}, ensure_ascii=False)}
@@ -1,25 +1,68 @@
 import json
 import os
-import boto3
-from openai import OpenAI  # pip install openai==1.52.2
 import logging
+import re
+import time
+import datetime
+from collections import OrderedDict
+from ai_tutor_common import chat_archive, lazy, metrics, scheduler  # 공통 레이어
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# OpenAI 클라이언트 초기화
-openai_client = OpenAI(
-    api_key="api-key",
-    base_url=os.environ.get("OPENAI_BASE_URL", "https://api.upstage.ai/v1")
-)
+CHAT_TABLE = os.environ.get("CHAT_TABLE", "테이블 명칭")  # 테이블 이름 직접 입력 (또는 환경 변수)
 
-# DynamoDB와 S3 클라이언트 초기화
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table("테이블 명칭")  # 테이블 이름 직접 입력
-s3_client = boto3.client('s3')
-S3_BUCKET = "버킷 명칭"  # S3 버킷 이름 직접 입력
+# OpenAI / DynamoDB / S3 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_openai_client():
+    from openai import OpenAI  # pip install openai==1.52.2
+    return metrics.instrument_llm_client(OpenAI(
+        api_key="api-key",
+        base_url=os.environ.get("OPENAI_BASE_URL", "https://api.upstage.ai/v1")
+    ))
 
-def chat_with_solar(messages):
+def create_table():
+    import boto3
+    dynamodb = boto3.resource('dynamodb')
+    return metrics.instrument_client(dynamodb.Table(CHAT_TABLE), 'dynamodb')
+
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3'), 's3')
+
+openai_client = lazy.LazyClient(create_openai_client, 'openai')
+table = lazy.LazyClient(create_table, 'dynamodb')
+s3_client = lazy.LazyClient(create_s3_client, 's3')
+lazy.prewarm(openai_client, table, s3_client)
+S3_BUCKET = os.environ.get("CHAT_BUCKET", "버킷 명칭")  # S3 버킷 이름 직접 입력 (또는 환경 변수)
+CHAT_DIGEST_PAGES = int(os.environ.get("CHAT_DIGEST_PAGES", "3"))  # 질문과 함께 보낼 최대 페이지 digest 수
+
+DIGEST_MISS_TTL = 300  # digest가 없는 문서를 다시 확인하기까지의 시간(초)
+DIGEST_CACHE_SIZE = int(os.environ.get("DIGEST_CACHE_SIZE", "32"))  # 웜 컨테이너에 유지할 문서별 digest 수
+ARCHIVE_CACHE_SIZE = int(os.environ.get("ARCHIVE_CACHE_SIZE", "8"))  # 웜 컨테이너에 유지할 보관 대화 수
+
+# 문서별 페이지 digest 캐시 {digest 키: (ETag, 페이지 목록)} (웜 스타트 간 재사용, 조건부 GET으로 갱신 확인)
+# 캐시는 모두 최근 사용 순(LRU)으로 크기를 제한 (웜 컨테이너가 처리한 문서/세션 수만큼 늘어나지 않도록)
+digest_cache = OrderedDict()
+digest_misses = OrderedDict()  # {digest 키: 확인 시각} digest가 없던 문서
+
+# 보관된 대화 이력 캐시 {보관 객체 경로: 메시지 목록} (같은 세션이 이어지는 동안 S3를 다시 읽지 않음)
+archive_cache = OrderedDict()
+
+def cache_get(cache, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+def cache_put(cache, key, value, max_size):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+
+def chat_with_solar(messages, expected_completion_tokens=1000):
+    # 공유 LLM 한도에서 대화 우선순위로 확보 (요약 작업보다 먼저, 부족하면 잠시 대기 후 진행)
+    scheduler.acquire('chat', scheduler.estimate_tokens(messages, expected_completion_tokens))
     response = openai_client.chat.completions.create(
         model="solar-pro",
         messages=messages
@@ -34,7 +77,7 @@ def detect_page_number(user_message):
         f"메시지: {user_message}"
     )
     messages = [{"role": "user", "content": prompt}]
-    result = chat_with_solar(messages)
+    result = chat_with_solar(messages, expected_completion_tokens=20)
     if result.strip().upper().startswith("PAGE_NUMBER:"):
         try:
             page_num = result.split("PAGE_NUMBER:")[1].strip()
@@ -44,6 +87,73 @@ def detect_page_number(user_message):
             return None
     return None
 
+def find_page_content(doc_json, page_number):
+    """
+    처리 결과 JSON의 pages 목록에서 해당 페이지 본문(markdown)을 찾음
+    """
+    digits = re.sub(r"\D", "", str(page_number))
+    if not digits:
+        return None
+    for page in doc_json.get('pages', []):
+        if page.get('page') == int(digits):
+            return "\n".join(item.get('markdown', '') for item in page.get('contents', []))
+    return None
+
+def load_page_digests(document_path):
+    """
+    처리 결과 옆의 페이지별 digest ({문서}_digests.json) 조회 (없으면 None)
+    """
+    if not document_path.endswith('_result.json'):
+        return None
+    digests_key = document_path[:-len('_result.json')] + '_digests.json'
+    if time.monotonic() - digest_misses.get(digests_key, -DIGEST_MISS_TTL) < DIGEST_MISS_TTL:
+        return None
+    cached = cache_get(digest_cache, digests_key)
+    request = {'Bucket': S3_BUCKET, 'Key': digests_key}
+    if cached:
+        request['IfNoneMatch'] = cached[0]
+    try:
+        s3_resp = s3_client.get_object(**request)
+    except Exception as e:
+        error_code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+        if cached and error_code in ('304', 'NotModified'):
+            return cached[1]
+        logger.info("페이지 digest 없음: %s", e)
+        digest_cache.pop(digests_key, None)
+        cache_put(digest_misses, digests_key, time.monotonic(), DIGEST_CACHE_SIZE)
+        return None
+    pages = json.loads(s3_resp['Body'].read().decode('utf-8')).get('pages', [])
+    cache_put(digest_cache, digests_key, (s3_resp.get('ETag'), pages), DIGEST_CACHE_SIZE)
+    return pages
+
+def select_relevant_digests(pages, user_message, limit=CHAT_DIGEST_PAGES):
+    """
+    질문에 등장하는 키워드가 많은 페이지의 digest를 최대 limit개 선택
+    """
+    message = user_message.lower()
+    scored = []
+    for page in pages:
+        score = sum(1 for keyword in page.get('keywords', []) if keyword and keyword.lower() in message)
+        if score and page.get('digest'):
+            scored.append((-score, page['page'], page))
+    return [page for _, _, page in sorted(scored)[:limit]]
+
+def load_archived_history(session_item):
+    """
+    ai_tutor_archive_chat_sessions가 S3 chat/ 경로로 옮긴 예전 대화 조회 (보관된 세션이 다시 호출될 때만 읽음)
+    """
+    key = session_item.get('archive_key')
+    archived_count = int(session_item.get('archived_count', 0))
+    if not key or not archived_count:
+        return []
+    cached = cache_get(archive_cache, key)
+    if cached is None or len(cached) < archived_count:
+        s3_resp = s3_client.get_object(Bucket=S3_BUCKET, Key=key)
+        cached = chat_archive.decode_archive(s3_resp['Body'].read())['messages']
+        cache_put(archive_cache, key, cached, ARCHIVE_CACHE_SIZE)
+    return cached[:archived_count]
+
+@metrics.instrument_handler
 def lambda_handler(event, context):
     try:
         logger.info("Received event: %s", json.dumps(event))
@@ -69,8 +179,10 @@ def lambda_handler(event, context):
             }
         
         # DynamoDB에서 기존 대화 이력 조회
+        # (오래된 턴이 보관된 세션이면 DynamoDB에는 최근 턴만 있으며, 모델 호출에도 최근 턴만 사용)
         response_db = table.get_item(Key={'tt': session_id})
-        conversation = response_db.get('Item', {}).get('messages', [])
+        session_item = response_db.get('Item', {})
+        conversation = session_item.get('messages', [])
         
         # 사용자 메시지 추가
         conversation.append({"role": "user", "content": user_message})
@@ -85,30 +197,53 @@ def lambda_handler(event, context):
                 s3_resp = s3_client.get_object(Bucket=S3_BUCKET, Key=document_path)
                 document_content = s3_resp['Body'].read().decode('utf-8')
                 doc_json = json.loads(document_content)
-                page_content = doc_json.get('pages', {}).get(str(page_number))
+                page_content = find_page_content(doc_json, page_number)
                 if page_content:
                     system_message = f"Provided document page content (Page {page_number}): {page_content}"
                     conversation.append({"role": "system", "content": system_message})
             except Exception as e:
                 logger.error("문서 로드 오류: %s", e)
+        # 특정 페이지 질문이 아니면 질문과 관련된 페이지 digest로 답변 근거 제공
+        # (원문 대신 digest만 전달, 이번 호출에만 사용하고 대화 이력에는 저장하지 않음)
+        grounding = []
+        if document_path and not page_number:
+            try:
+                relevant_pages = select_relevant_digests(load_page_digests(document_path) or [], user_message)
+                if relevant_pages:
+                    system_message = "Relevant document page digests:\n" + "\n".join(
+                        f"[Page {page['page']}] {page['digest']}" for page in relevant_pages
+                    )
+                    grounding.append({"role": "system", "content": system_message})
+            except Exception as e:
+                logger.error("페이지 digest 로드 오류: %s", e)
         
         # 두 번째 호출: 전체 대화 이력을 바탕으로 최종 AI 응답 생성
-        ai_response = chat_with_solar(conversation)
+        ai_response = chat_with_solar(conversation + grounding)
         conversation.append({"role": "assistant", "content": ai_response})
         
-        # 업데이트된 대화 이력을 DynamoDB에 저장
-        table.put_item(
-            Item={
-                'tt': session_id,
-                'messages': conversation
-            }
-        )
+        # 업데이트된 대화 이력을 DynamoDB에 저장 (보관 객체 위치는 유지)
+        session_item = {
+            **{key: value for key, value in session_item.items() if key in ('archive_key', 'archived_count', 'document_path')},
+            'tt': session_id,
+            'messages': conversation,
+            'updated_at': datetime.datetime.utcnow().isoformat()
+        }
+        if document_path:
+            session_item['document_path'] = document_path
+        table.put_item(Item=session_item)
+        
+        # 응답에는 보관된 예전 대화까지 포함한 전체 이력을 반환
+        try:
+            archived_history = load_archived_history(session_item)
+        except Exception as e:
+            logger.error("보관된 대화 이력 로드 오류: %s", e)
+            archived_history = []
         
         return {
             "statusCode": 200,
             "body": json.dumps({
                 "tt": session_id,
-                "messages": conversation
+                "messages": archived_history + conversation
             })
         }
     
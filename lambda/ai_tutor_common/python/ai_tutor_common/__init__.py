@@ -0,0 +1,11 @@
+"""
+AI Tutor Lambda 함수 공통 레이어
+
+- metrics: 호출 단위 지연 시간 계측 및 EMF 지표 출력
+- lazy: 무거운 import / 클라이언트 생성 지연 (PREWARM 설정 시 초기화 단계에서 미리 생성)
+- scheduler: solar-pro 호출량을 함수 간에 나눠 쓰는 우선순위 토큰 버킷 (대화 우선, 요약은 한도 부족 시 보류)
+- chat_archive: 챗봇 대화 이력 계층화 (최근 턴은 DynamoDB, 오래된 턴은 S3 chat/ 경로의 gzip 객체)
+- search_index: 폴더 단위 전문 검색 역색인 (한글 bigram, zlib 압축 JSON)
+- jobs: 문서 처리 작업 상태 기록 (queued -> parsing -> saving -> done / failed, 구간별 소요 시간)
+- http_cache: 조건부 GET 처리 (원본 상태 기반 ETag 계산, If-None-Match 비교)
+"""
@@ -0,0 +1,57 @@
+"""
+챗봇 대화 이력 계층화 (최근 대화는 DynamoDB, 오래된 대화는 S3 chat/ 경로의 gzip 객체)
+
+세션 행 (DynamoDB, 키: tt):
+    messages        최근 HOT_TURNS 턴 (모델 호출에 사용하는 부분)
+    updated_at      마지막 대화 시각 (보관 대상 판단 기준)
+    document_path   대화한 문서의 처리 결과 경로 (선택)
+    archive_key     보관 객체 경로 ({folder}/{document}/chat/{session}.json.gz)
+    archived_count  보관 객체 앞부분 중 이 세션에 속한 메시지 수
+
+보관 객체의 messages 앞 archived_count개 + 행의 messages가 전체 대화입니다.
+(보관 작업과 대화가 동시에 일어나 보관 객체에 메시지가 더 들어가도 archived_count까지만 사용하므로 중복되지 않음)
+"""
+import gzip
+import json
+import os
+import urllib.parse
+
+HOT_TURNS = int(os.environ.get('HOT_TURNS', '10'))  # DynamoDB에 남기는 최근 턴 수
+
+
+def archive_key(document_path, session_id):
+    """
+    세션 보관 객체 경로
+    - 문서 대화: {folder}/{document}/chat/{session}.json.gz (문서 처리 시 만들어지는 chat/ 경로)
+    - 문서 없는 대화: chat/{session}.json.gz
+    """
+    filename = f"{urllib.parse.quote(session_id, safe='')}.json.gz"
+    parts = (document_path or '').split('/')
+    if len(parts) >= 3 and parts[2] == 'processed':
+        return f"{parts[0]}/{parts[1]}/chat/{filename}"
+    return f"chat/{filename}"
+
+
+def split_hot_turns(messages, hot_turns=HOT_TURNS):
+    """
+    대화를 (보관할 메시지, DynamoDB에 남길 최근 메시지)로 나눔
+    턴은 user 메시지에서 시작하며 뒤따르는 system / assistant 메시지를 포함
+    """
+    turn_starts = [index for index, message in enumerate(messages) if message.get('role') == 'user']
+    if len(turn_starts) <= hot_turns:
+        return [], list(messages)
+    cut = turn_starts[-hot_turns] if hot_turns > 0 else len(messages)
+    return list(messages[:cut]), list(messages[cut:])
+
+
+def encode_archive(session_id, document_path, messages, archived_at):
+    return gzip.compress(json.dumps({
+        'session_id': session_id,
+        'document_path': document_path,
+        'archived_at': archived_at,
+        'messages': messages
+    }, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def decode_archive(body):
+    return json.loads(gzip.decompress(body).decode('utf-8'))
@@ -0,0 +1,43 @@
+"""
+조건부 GET(ETag / If-None-Match) 공통 처리 (ai_tutor_list_folders, ai_tutor_list_documents에서 사용)
+
+응답 본문이 아닌 원본 상태(통계 행, 객체 목록)로 ETag를 계산하므로
+변경이 없으면 응답을 직렬화하지 않고 304를 반환할 수 있습니다.
+
+    etag = http_cache.compute_etag([item['Key'], item.get('ETag', '')] for item in contents)
+    if http_cache.etag_matches(http_cache.get_header(event, 'If-None-Match'), etag):
+        return {'statusCode': 304, ...}
+"""
+import hashlib
+import json
+
+
+def compute_etag(records):
+    """
+    레코드(값 목록) 순서대로 강한 ETag 계산
+    - 호출하는 쪽에서 레코드를 정렬해 전달 (같은 상태면 같은 ETag)
+    """
+    digest = hashlib.sha256()
+    for record in records:
+        digest.update(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def get_header(event, name):
+    """
+    API Gateway 이벤트에서 헤더 값을 대소문자 구분 없이 조회
+    """
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def etag_matches(if_none_match, etag):
+    """
+    If-None-Match 헤더 값(쉼표 구분 목록, '*', 약한 검증자 포함)과 ETag 비교
+    """
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    return '*' in candidates or any(c.removeprefix('W/') == etag for c in candidates)
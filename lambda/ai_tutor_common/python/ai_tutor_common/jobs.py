@@ -0,0 +1,168 @@
+"""
+문서 처리 작업 상태 기록 (ai_tutor_enqueue_document / ai_tutor_process_document가 기록, ai_tutor_get_job_status가 조회)
+
+작업 행 (JOB_TABLE, 키: job_id = "{folder}/{document}", 문서마다 최근 업로드 하나):
+    upload_id       업로드 식별자 (S3 이벤트의 sequencer) - 같은 문서가 다시 업로드되면 새 작업으로 덮어씀
+    state           queued -> parsing -> saving -> done / failed (재시도 대기 시 다시 queued)
+    folder_name, document_name, source_key
+    attempts        처리 시도 횟수, last_error: 마지막 오류
+    queued_at, parsing_at, saving_at, finished_at, updated_at   상태별 시각 (UTC ISO 8601, 재시도 대기는 requeued_at)
+    durations       {queue_ms, parse_ms, save_ms, total_ms} (완료 시)
+    result_path, changed_pages                                  (완료 시)
+
+상태 갱신은 upload_id가 같을 때만 반영되므로, 이전 업로드의 늦은 처리가 최신 작업 상태를 덮어쓰지 않습니다.
+JOB_TABLE이 비어 있으면 비활성 (DynamoDB 호출 없음). 상태 기록 오류는 문서 처리를 막지 않습니다.
+"""
+import datetime
+import os
+import urllib.parse
+import uuid
+
+from ai_tutor_common import lazy, metrics
+
+JOB_TABLE = os.environ.get('JOB_TABLE', '')  # 키: job_id (문자열)
+JOB_STATES = ('queued', 'parsing', 'saving', 'done', 'failed')
+TIMESTAMP_FIELDS = {  # 상태 변경 시 기록하는 시각 필드 (queued_at은 작업 생성 시각으로 유지)
+    'queued': 'requeued_at',
+    'parsing': 'parsing_at',
+    'saving': 'saving_at',
+    'done': 'finished_at',
+    'failed': 'finished_at'
+}
+
+
+def create_job_table():
+    import boto3
+    dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+    return metrics.instrument_client(dynamodb.Table(JOB_TABLE), 'dynamodb')
+
+job_table = lazy.LazyClient(create_job_table, 'dynamodb')
+
+
+def job_id(folder_name, document_name):
+    return f"{folder_name}/{document_name}"
+
+
+def parse_upload_key(object_key):
+    """
+    소스 버킷 키(upload/{folder}___{document}___{filename}, URL 인코딩 가능)에서 (폴더, 문서, 파일명) 추출
+    형식이 맞지 않으면 None
+    """
+    decoded_key = urllib.parse.unquote_plus(object_key)
+    if not decoded_key.startswith('upload/'):
+        return None
+    parts = os.path.basename(decoded_key).split('___', 2)
+    return tuple(parts) if len(parts) == 3 else None
+
+
+def upload_id_for(s3_record):
+    """
+    S3 이벤트 레코드의 업로드 식별자 (같은 키의 업로드마다 다름)
+    """
+    s3_object = s3_record.get('s3', {}).get('object', {})
+    return s3_object.get('sequencer') or s3_object.get('eTag') or uuid.uuid4().hex
+
+
+def now_iso():
+    return datetime.datetime.utcnow().isoformat()
+
+
+def elapsed_ms(started_at, finished_at):
+    if not started_at or not finished_at:
+        return None
+    delta = datetime.datetime.fromisoformat(finished_at) - datetime.datetime.fromisoformat(started_at)
+    return int(delta.total_seconds() * 1000)
+
+
+def get_job(job_id_value):
+    if not JOB_TABLE:
+        return None
+    return job_table.get_item(Key={'job_id': job_id_value}).get('Item')
+
+
+class JobTracker:
+    """
+    작업 하나의 상태 기록
+
+        job = jobs.JobTracker(message['upload_id'], queued_at=message['queued_at'], attempt=receive_count)
+        job.bind(folder_name, document_name, source_key)   # 큐를 거치지 않은 처리는 create=True로 만든 뒤 bind
+        job.transition('parsing')
+        ...
+        job.finish('done', result_path=key)
+    """
+
+    def __init__(self, upload_id, queued_at=None, attempt=1, create=False):
+        self.upload_id = upload_id
+        self.job_id = None
+        self.attempt = attempt
+        self.create = create
+        self.times = {'queued_at': queued_at}
+
+    def bind(self, folder_name, document_name, source_key):
+        """
+        작업 행 연결 (create면 queued 상태로 새로 기록, 큐를 거치지 않은 S3 트리거 처리용)
+        """
+        self.job_id = job_id(folder_name, document_name)
+        if not JOB_TABLE or not self.create:
+            return
+        self.times['queued_at'] = self.times['queued_at'] or now_iso()
+        try:
+            job_table.put_item(Item={
+                'job_id': self.job_id,
+                'upload_id': self.upload_id,
+                'state': 'queued',
+                'folder_name': folder_name,
+                'document_name': document_name,
+                'source_key': source_key,
+                'attempts': 0,
+                'queued_at': self.times['queued_at'],
+                'updated_at': self.times['queued_at']
+            })
+        except Exception as e:
+            print(f"작업 상태 기록 오류 (무시됨): {self.job_id} - {str(e)}")
+
+    def transition(self, state, at=None, **fields):
+        """
+        상태 변경 (이 업로드의 작업 행일 때만 반영)
+        반환값: 반영 여부
+        """
+        if not JOB_TABLE or self.job_id is None:
+            return False
+        now = at or now_iso()
+        timestamp_field = TIMESTAMP_FIELDS[state]
+        self.times[timestamp_field] = now
+        values = {':state': state, ':now': now, ':upload': self.upload_id, ':attempts': self.attempt}
+        assignments = ["#state = :state", f"{timestamp_field} = :now", "updated_at = :now", "attempts = :attempts"]
+        for index, (name, value) in enumerate(fields.items()):
+            values[f':f{index}'] = value
+            assignments.append(f"{name} = :f{index}")
+        try:
+            job_table.update_item(
+                Key={'job_id': self.job_id},
+                UpdateExpression="SET " + ", ".join(assignments),
+                ConditionExpression="upload_id = :upload",
+                ExpressionAttributeNames={'#state': 'state'},
+                ExpressionAttributeValues=values
+            )
+            return True
+        except Exception as e:
+            code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+            if code == 'ConditionalCheckFailedException':
+                print(f"다른 업로드로 교체된 작업 (상태 기록 생략): {self.job_id}")
+            else:
+                print(f"작업 상태 기록 오류 (무시됨): {self.job_id} - {str(e)}")
+            return False
+
+    def finish(self, state, **fields):
+        """
+        완료(done) 또는 최종 실패(failed) 기록, 구간별 소요 시간 포함
+        """
+        finished_at = now_iso()
+        durations = {
+            'queue_ms': elapsed_ms(self.times.get('queued_at'), self.times.get('parsing_at')),
+            'parse_ms': elapsed_ms(self.times.get('parsing_at'), self.times.get('saving_at')),
+            'save_ms': elapsed_ms(self.times.get('saving_at'), finished_at),
+            'total_ms': elapsed_ms(self.times.get('queued_at'), finished_at)
+        }
+        fields['durations'] = {name: value for name, value in durations.items() if value is not None}
+        return self.transition(state, at=finished_at, **fields)
@@ -0,0 +1,93 @@
+"""
+무거운 모듈 import와 클라이언트 생성을 실제로 필요한 시점까지 미루는 도구 (콜드 스타트 단축)
+
+사용 방법:
+    from ai_tutor_common import lazy, metrics
+
+    def create_s3_client():
+        import boto3  # 첫 사용 시 import
+        return metrics.instrument_client(boto3.client('s3'), 's3')
+
+    s3 = lazy.LazyClient(create_s3_client, 's3')
+    requests = lazy.LazyModule('requests')
+
+    lazy.prewarm(s3, requests)  # 모듈 마지막 줄: PREWARM 설정 시에만 초기화 단계에서 미리 생성
+
+s3.put_object(...)처럼 처음 속성에 접근할 때 factory가 한 번 실행되고, 이후 호출은 같은 클라이언트를 사용합니다.
+
+PREWARM 환경 변수:
+- 미설정/false: 첫 사용 시 생성 (요청에 필요한 클라이언트만 생성되므로 400 응답 등 조기 종료 경로가 빠름)
+- true: 모듈 초기화(Lambda init 단계)에서 모두 생성. 프로비저닝된 동시성/SnapStart처럼
+  init 단계가 요청 지연에 포함되지 않는 환경에서 사용
+- 쉼표로 구분한 이름 목록 (예: s3,dynamodb): 해당 이름만 미리 생성
+"""
+import importlib
+import os
+import threading
+
+PREWARM = os.environ.get('PREWARM', 'false').strip().lower()
+
+
+class LazyClient:
+    """
+    첫 속성 접근 시 factory()로 생성되는 클라이언트 프록시 (스레드 안전)
+    """
+
+    def __init__(self, factory, name):
+        self._factory = factory
+        self._name = name
+        self._client = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """
+        클라이언트 생성(처음 한 번) 후 반환
+        (get이 아닌 이름을 쓰는 이유: requests.get처럼 감싼 객체의 같은 이름 속성을 가리지 않기 위해)
+        """
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+
+    @property
+    def initialized(self):
+        return self._client is not None
+
+    @property
+    def name(self):
+        return self._name
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        state = 'initialized' if self.initialized else 'deferred'
+        return f'<LazyClient {self._name} ({state})>'
+
+
+class LazyModule(LazyClient):
+    """
+    첫 속성 접근 시 import 되는 모듈 프록시
+    """
+
+    def __init__(self, module_name):
+        super().__init__(lambda: importlib.import_module(module_name), module_name)
+
+
+def prewarm(*clients):
+    """
+    PREWARM 설정에 해당하는 클라이언트를 지금(모듈 초기화 중) 생성
+    반환값: 생성한 클라이언트 이름 목록
+    """
+    if PREWARM in ('', '0', 'false', 'no'):
+        return []
+    names = None if PREWARM in ('1', 'true', 'yes', 'all') else {name.strip() for name in PREWARM.split(',')}
+    warmed = []
+    for client in clients:
+        if names is None or client.name in names:
+            client.resolve()
+            warmed.append(client.name)
+    return warmed
@@ -0,0 +1,387 @@
+"""
+호출 단위 지연 시간 계측 및 CloudWatch Embedded Metric Format(EMF) 출력
+
+사용 방법:
+    from ai_tutor_common import metrics
+
+    s3 = metrics.instrument_client(boto3.client('s3'), 's3')
+    table = metrics.instrument_client(dynamodb.Table('...'), 'dynamodb')
+    openai_client = metrics.instrument_llm_client(OpenAI(...))
+
+    @metrics.instrument_handler
+    def lambda_handler(event, context):
+        with metrics.span('upstage.document_parse', bytes_out=len(data)) as parse_span:
+            response = requests.post(...)
+            parse_span.add_bytes(bytes_in=len(response.content))
+
+호출이 끝나면 구간별 소요 시간, 호출 수, 송수신 바이트, LLM 토큰 사용량과
+콜드/웜 스타트 여부를 EMF 형식의 JSON 한 줄로 출력합니다.
+METRICS_ENABLED가 0 / false / no 이면 계측과 출력을 모두 생략합니다.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'AITutor')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').strip().lower() not in ('0', 'false', 'no')
+MAX_EMF_METRICS = 100  # EMF 지시문당 최대 지표 수
+
+_warm_handlers = set()  # 이미 한 번 이상 호출된 핸들러 (그 이후 호출은 웜 스타트)
+_current_invocation = contextvars.ContextVar('ai_tutor_invocation', default=None)
+_last_invocation = None  # 스레드 풀 작업자처럼 컨텍스트가 전달되지 않는 경우 사용
+
+
+class Invocation:
+    """
+    한 번의 핸들러 호출 동안 수집한 구간 통계
+    """
+
+    def __init__(self, function_name, request_id, cold_start):
+        self.function_name = function_name
+        self.request_id = request_id
+        self.cold_start = cold_start
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, duration_ms, bytes_out=0, bytes_in=0, error=False):
+        with self.lock:
+            stats = self.spans.setdefault(name, {
+                'calls': 0, 'ms': 0.0, 'max_ms': 0.0, 'bytes_out': 0, 'bytes_in': 0, 'errors': 0
+            })
+            stats['calls'] += 1
+            stats['ms'] += duration_ms
+            stats['max_ms'] = max(stats['max_ms'], duration_ms)
+            stats['bytes_out'] += bytes_out
+            stats['bytes_in'] += bytes_in
+            stats['errors'] += int(error)
+
+    def record_tokens(self, prompt_tokens, completion_tokens):
+        with self.lock:
+            self.prompt_tokens += prompt_tokens or 0
+            self.completion_tokens += completion_tokens or 0
+
+    def record_value(self, name, value, unit):
+        with self.lock:
+            self.values[name] = (value, unit)
+
+    def to_emf(self, duration_ms, status_code):
+        metrics = [
+            {'Name': 'Duration', 'Unit': 'Milliseconds'},
+            {'Name': 'ColdStart', 'Unit': 'Count'},
+            {'Name': 'BytesOut', 'Unit': 'Bytes'},
+            {'Name': 'BytesIn', 'Unit': 'Bytes'},
+            {'Name': 'LLMPromptTokens', 'Unit': 'Count'},
+            {'Name': 'LLMCompletionTokens', 'Unit': 'Count'},
+        ]
+        record = {
+            'FunctionName': self.function_name,
+            'RequestId': self.request_id,
+            'StatusCode': status_code,
+            'Duration': round(duration_ms, 3),
+            'ColdStart': int(self.cold_start),
+            'BytesOut': sum(stats['bytes_out'] for stats in self.spans.values()),
+            'BytesIn': sum(stats['bytes_in'] for stats in self.spans.values()),
+            'LLMPromptTokens': self.prompt_tokens,
+            'LLMCompletionTokens': self.completion_tokens,
+        }
+        # 임의 지표 (put_metric으로 기록한 값)
+        for name, (value, unit) in sorted(self.values.items()):
+            metrics.append({'Name': name, 'Unit': unit})
+            record[name] = value
+        # 구간별 지표 (지표 수 제한을 넘는 구간은 spans 상세에만 남김)
+        for name, stats in sorted(self.spans.items(), key=lambda entry: -entry[1]['ms']):
+            if len(metrics) + 2 > MAX_EMF_METRICS:
+                break
+            metrics.append({'Name': f'{name}.ms', 'Unit': 'Milliseconds'})
+            metrics.append({'Name': f'{name}.calls', 'Unit': 'Count'})
+            record[f'{name}.ms'] = round(stats['ms'], 3)
+            record[f'{name}.calls'] = stats['calls']
+
+        record['spans'] = {
+            name: {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
+            for name, stats in self.spans.items()
+        }
+        record['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['FunctionName']],
+                'Metrics': metrics
+            }]
+        }
+        return record
+
+
+def current_invocation():
+    return _current_invocation.get() or _last_invocation
+
+
+class Span:
+    """
+    span() 컨텍스트 관리자가 반환하는 객체 (바이트 수를 나중에 추가할 때 사용)
+    """
+
+    def __init__(self, bytes_out=0, bytes_in=0):
+        self.bytes_out = bytes_out
+        self.bytes_in = bytes_in
+
+    def add_bytes(self, bytes_out=0, bytes_in=0):
+        self.bytes_out += bytes_out or 0
+        self.bytes_in += bytes_in or 0
+
+
+class span:
+    """
+    임의 구간 계측 컨텍스트 관리자
+        with metrics.span('transform'):
+            ...
+    """
+
+    def __init__(self, name, bytes_out=0, bytes_in=0):
+        self.name = name
+        self.span = Span(bytes_out, bytes_in)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        invocation = current_invocation()
+        if invocation is not None:
+            invocation.record(self.name, (time.perf_counter() - self.started) * 1000,
+                              self.span.bytes_out, self.span.bytes_in, exc_type is not None)
+        return False
+
+
+def put_metric(name, value, unit='Count'):
+    """
+    구간 통계 외의 값 기록 (같은 이름은 마지막 값 사용, 예: 대기열 길이)
+        metrics.put_metric('llm_scheduler.queue_depth', 3)
+    """
+    invocation = current_invocation()
+    if invocation is not None:
+        invocation.record_value(name, value, unit)
+
+
+def record_llm_usage(response):
+    """
+    chat.completions 응답의 토큰 사용량 기록
+    """
+    invocation = current_invocation()
+    usage = getattr(response, 'usage', None)
+    if invocation is not None and usage is not None:
+        invocation.record_tokens(getattr(usage, 'prompt_tokens', 0), getattr(usage, 'completion_tokens', 0))
+
+
+def _payload_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    try:
+        return len(json.dumps(value, default=str, ensure_ascii=False).encode('utf-8'))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _request_bytes(service, kwargs):
+    if service == 's3':
+        body = kwargs.get('Body')
+        return _payload_size(body) if isinstance(body, (bytes, bytearray, str)) else 0
+    if service == 'dynamodb':
+        return _payload_size(kwargs.get('Item') or kwargs.get('ExpressionAttributeValues'))
+    return 0
+
+
+def _response_bytes(service, kwargs, response, args=()):
+    if service == 's3':
+        if isinstance(response, dict):
+            return response.get('ContentLength') or 0
+        # download_file(Bucket, Key, Filename)
+        filename = kwargs.get('Filename') or (args[2] if len(args) > 2 else None)
+        if filename and os.path.exists(filename):
+            return os.path.getsize(filename)
+        return 0
+    if service == 'dynamodb' and isinstance(response, dict):
+        return _payload_size(response.get('Item') or response.get('Items'))
+    return 0
+
+
+def _timed_call(name, service, method, args, kwargs):
+    started = time.perf_counter()
+    error = False
+    response = None
+    try:
+        response = method(*args, **kwargs)
+        return response
+    except Exception:
+        error = True
+        raise
+    finally:
+        invocation = current_invocation()
+        if invocation is not None:
+            invocation.record(name, (time.perf_counter() - started) * 1000, _request_bytes(service, kwargs),
+                              0 if error else _response_bytes(service, kwargs, response, args), error)
+
+
+class _PaginatorProxy:
+    def __init__(self, paginator, name, service):
+        self._paginator = paginator
+        self._name = name
+        self._service = service
+
+    def paginate(self, **kwargs):
+        pages = iter(self._paginator.paginate(**kwargs))
+        while True:
+            started = time.perf_counter()
+            try:
+                page = next(pages)
+            except StopIteration:
+                return
+            invocation = current_invocation()
+            if invocation is not None:
+                invocation.record(self._name, (time.perf_counter() - started) * 1000, 0,
+                                  _response_bytes(self._service, kwargs, page))
+            yield page
+
+    def __getattr__(self, name):
+        return getattr(self._paginator, name)
+
+
+class _ClientProxy:
+    """
+    boto3 클라이언트 / DynamoDB Table 리소스를 감싸 메서드 호출을 '<서비스>.<메서드>' 구간으로 기록
+    """
+
+    def __init__(self, client, service):
+        self._client = client
+        self._service = service
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name == 'get_paginator':
+            return lambda operation_name: _PaginatorProxy(attribute(operation_name),
+                                                          f'{self._service}.{operation_name}', self._service)
+        if name.startswith('_') or isinstance(attribute, type) or not callable(attribute):
+            return attribute
+        if name in ('generate_presigned_url', 'generate_presigned_post', 'can_paginate', 'get_waiter'):
+            return attribute  # 네트워크 호출이 없는 메서드
+        span_name = f'{self._service}.{name}'
+        return functools.partial(_timed_call_wrapper, span_name, self._service, attribute)
+
+
+def _timed_call_wrapper(name, service, method, *args, **kwargs):
+    return _timed_call(name, service, method, args, kwargs)
+
+
+def instrument_client(client, service):
+    """
+    boto3 클라이언트 또는 DynamoDB Table 리소스 계측
+    """
+    if not METRICS_ENABLED:
+        return client
+    return _ClientProxy(client, service)
+
+
+class _CompletionsProxy:
+    def __init__(self, completions, name):
+        self._completions = completions
+        self._name = name
+
+    def create(self, *args, **kwargs):
+        prompt = kwargs.get('messages') or []
+        bytes_out = sum(_payload_size(message.get('content')) for message in prompt if isinstance(message, dict))
+        with span(self._name, bytes_out=bytes_out) as llm_span:
+            response = self._completions.create(*args, **kwargs)
+            choices = getattr(response, 'choices', None) or []
+            if choices and not kwargs.get('stream'):
+                llm_span.add_bytes(bytes_in=_payload_size(choices[0].message.content))
+        if not kwargs.get('stream'):
+            record_llm_usage(response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+
+class _ChatProxy:
+    def __init__(self, chat, name):
+        self._chat = chat
+        self.completions = _CompletionsProxy(chat.completions, name)
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class _LLMClientProxy:
+    def __init__(self, client, name):
+        self._client = client
+        self.chat = _ChatProxy(client.chat, name)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument_llm_client(client, name='llm.chat_completions'):
+    """
+    OpenAI 호환 클라이언트(solar-pro) 계측: 호출 시간, 프롬프트/응답 바이트, 토큰 사용량
+    """
+    if not METRICS_ENABLED:
+        return client
+    return _LLMClientProxy(client, name)
+
+
+def _status_code(response):
+    if isinstance(response, dict):
+        return response.get('statusCode')
+    return None
+
+
+def emit(invocation, duration_ms, status_code):
+    print(json.dumps(invocation.to_emf(duration_ms, status_code), ensure_ascii=False))
+
+
+def instrument_handler(handler):
+    """
+    lambda_handler 데코레이터: 호출 단위 통계를 수집하고 종료 시 EMF 한 줄 출력
+    """
+    if not METRICS_ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _last_invocation
+        function_name = getattr(context, 'function_name', None) \
+            or os.environ.get('AWS_LAMBDA_FUNCTION_NAME') or handler.__module__
+        cold_start = handler.__module__ not in _warm_handlers
+        _warm_handlers.add(handler.__module__)
+        invocation = Invocation(function_name, getattr(context, 'aws_request_id', None), cold_start)
+        _last_invocation = invocation
+        token = _current_invocation.set(invocation)
+        status_code = None
+        try:
+            response = handler(event, context)
+            status_code = _status_code(response)
+            return response
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            _current_invocation.reset(token)
+            if _last_invocation is invocation:
+                _last_invocation = None
+            try:
+                emit(invocation, (time.perf_counter() - invocation.started) * 1000, status_code)
+            except Exception as e:
+                print(f"지표 출력 오류 (무시됨): {str(e)}")
+
+    return wrapper
@@ -0,0 +1,214 @@
+"""
+solar-pro 호출량을 함수 간에 나눠 쓰는 우선순위 스케줄러 (DynamoDB 토큰 버킷)
+
+사용 방법:
+    from ai_tutor_common import scheduler
+
+    scheduler.acquire('chat', scheduler.estimate_tokens(messages, max_tokens=1000))   # 대화: 잠시 기다린 뒤 진행
+    admission = scheduler.acquire('summary', cost, queue_id=document_id)             # 요약: 한도 부족 시 보류
+    if not admission.admitted:
+        return {'statusCode': 202, 'headers': {'Retry-After': str(admission.retry_after)}, ...}
+
+동작:
+- LLM_QUOTA_TABLE 행 하나(bucket = solar-pro)에 남은 토큰과 갱신 시각을 저장하고,
+  LLM_TOKENS_PER_MINUTE 속도로 채워지는 버킷에서 호출마다 예상 토큰 수를 차감 (조건부 갱신으로 동시성 처리)
+- chat: 버킷을 끝까지 사용할 수 있고, 부족하면 LLM_CHAT_MAX_WAIT초까지 기다린 뒤 초과 사용(음수 잔량)으로 진행
+- summary: 버킷의 LLM_CHAT_RESERVE 비율은 대화용으로 남겨 두고 사용. 부족하면 max_wait까지 기다리고,
+  그래도 부족하면 보류(admitted=False)하며 대기열(waiting)에 등록, 대기열 순서에 따라 retry_after를 늘림
+- 대기열 길이와 대기 시간은 metrics(llm_scheduler.*)로 기록
+- LLM_QUOTA_TABLE이 비어 있으면 비활성 (항상 즉시 허용, DynamoDB 호출 없음)
+- 스케줄러 테이블 오류 시에는 호출을 막지 않고 허용
+"""
+import hashlib
+import math
+import os
+import time
+from decimal import Decimal
+
+from ai_tutor_common import lazy, metrics
+
+LLM_QUOTA_TABLE = os.environ.get('LLM_QUOTA_TABLE', '')  # 키: bucket (문자열)
+LLM_TOKENS_PER_MINUTE = int(os.environ.get('LLM_TOKENS_PER_MINUTE', '100000'))  # 함수 전체가 나눠 쓰는 한도
+LLM_CHAT_RESERVE = float(os.environ.get('LLM_CHAT_RESERVE', '0.25'))  # 요약이 사용할 수 없는 대화용 비율
+LLM_CHAT_MAX_WAIT = float(os.environ.get('LLM_CHAT_MAX_WAIT', '5'))  # 대화 요청 최대 대기(초)
+QUEUE_ENTRY_TTL = 120  # 보류된 요청이 재시도하지 않으면 대기열에서 제외되는 시간(초)
+MAX_ATTEMPTS = 5  # 동시 갱신 충돌 시 재시도 횟수
+BUCKET_NAME = 'solar-pro'
+
+CAPACITY = float(LLM_TOKENS_PER_MINUTE)
+REFILL_PER_SECOND = CAPACITY / 60
+
+
+def create_quota_table():
+    import boto3
+    dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+    return metrics.instrument_client(dynamodb.Table(LLM_QUOTA_TABLE), 'dynamodb')
+
+quota_table = lazy.LazyClient(create_quota_table, 'dynamodb')
+
+
+class Admission:
+    """
+    acquire() 결과
+    admitted: 호출 가능 여부, waited_ms: 대기한 시간, retry_after: 보류 시 재시도까지 권장 시간(초),
+    queue_depth: 보류 중인 요약 요청 수
+    """
+
+    def __init__(self, admitted, waited_ms=0.0, retry_after=0, queue_depth=0):
+        self.admitted = admitted
+        self.waited_ms = waited_ms
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+    def __repr__(self):
+        return (f'<Admission admitted={self.admitted} waited_ms={self.waited_ms:.1f} '
+                f'retry_after={self.retry_after} queue_depth={self.queue_depth}>')
+
+
+def estimate_tokens(messages, max_tokens=1000):
+    """
+    호출 한 번의 예상 토큰 수 (프롬프트는 3자당 1토큰으로 어림, 응답은 max_tokens)
+    """
+    prompt_chars = sum(len(str(message.get('content', ''))) for message in messages)
+    return prompt_chars // 3 + max_tokens
+
+
+def queue_entry_name(queue_id):
+    return 'q' + hashlib.sha1(queue_id.encode('utf-8')).hexdigest()[:16]
+
+
+def to_decimal(value):
+    return Decimal(str(round(value, 3)))
+
+
+def read_bucket(now):
+    """
+    현재 버킷 상태 (채워진 토큰 반영)
+    반환값: (토큰 수, 저장된 갱신 시각 또는 None, {대기열 항목: 재시도 시각})
+    """
+    item = quota_table.get_item(Key={'bucket': BUCKET_NAME}, ConsistentRead=True).get('Item')
+    if item is None:
+        return CAPACITY, None, {}
+    elapsed = max(0.0, now - float(item['updated_at']))
+    tokens = min(CAPACITY, float(item['tokens']) + elapsed * REFILL_PER_SECOND)
+    waiting = {name: float(retry_at) for name, retry_at in item.get('waiting', {}).items()}
+    return tokens, item['updated_at'], waiting
+
+
+def try_take(cost, floor, entry, force):
+    """
+    버킷에서 cost만큼 차감 시도 (남는 토큰이 floor 이상일 때만, force면 무조건)
+    반환값: (허용 여부, 부족한 토큰을 채우는 데 필요한 시간(초), 대기열 {항목: 재시도 시각})
+    """
+    now = time.time()
+    tokens, seen, waiting = read_bucket(now)
+    live = {name: retry_at for name, retry_at in waiting.items() if retry_at > now - QUEUE_ENTRY_TTL}
+    stale = [name for name in waiting if name not in live][:10]
+
+    if tokens - cost < floor and not force:
+        return False, (floor + cost - tokens) / REFILL_PER_SECOND, live
+
+    values = {':tokens': to_decimal(max(tokens - cost, -CAPACITY)), ':now': to_decimal(now)}
+    names = {}
+    if seen is None:
+        # 첫 사용: 행 생성 (동시에 만들어졌으면 조건 실패 -> 재시도)
+        quota_table.put_item(
+            Item={'bucket': BUCKET_NAME, 'tokens': values[':tokens'], 'updated_at': values[':now'], 'waiting': {}},
+            ConditionExpression="attribute_not_exists(#bucket)",
+            ExpressionAttributeNames={'#bucket': 'bucket'}
+        )
+        return True, 0.0, live
+
+    update_expression = "SET tokens = :tokens, updated_at = :now"
+    removed = stale + ([entry] if entry in live else [])
+    if removed:
+        for index, name in enumerate(removed):
+            names[f'#q{index}'] = name
+        update_expression += " REMOVE " + ", ".join(f"waiting.#q{index}" for index in range(len(removed)))
+    values[':seen'] = seen
+    quota_table.update_item(
+        Key={'bucket': BUCKET_NAME},
+        UpdateExpression=update_expression,
+        ConditionExpression="updated_at = :seen",
+        ExpressionAttributeValues=values,
+        **({'ExpressionAttributeNames': names} if names else {})
+    )
+    live.pop(entry, None)
+    return True, 0.0, live
+
+
+def enqueue(entry, retry_at):
+    """
+    보류된 요청을 대기열에 등록 (재시도 시 같은 항목을 갱신)
+    """
+    quota_table.update_item(
+        Key={'bucket': BUCKET_NAME},
+        UpdateExpression="SET waiting.#entry = :retry_at",
+        ConditionExpression="attribute_exists(waiting)",
+        ExpressionAttributeNames={'#entry': entry},
+        ExpressionAttributeValues={':retry_at': to_decimal(retry_at)}
+    )
+
+
+def is_conflict(error):
+    return getattr(error, 'response', {}).get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
+
+
+def acquire(priority, cost, max_wait=None, queue_id=None):
+    """
+    solar-pro 호출 전 한도 확보
+    priority: 'chat' (대화, 우선) 또는 'summary' (요약 등 대량 작업)
+    cost: 예상 토큰 수 (estimate_tokens)
+    max_wait: 한도가 부족할 때 기다릴 최대 시간(초) (기본: chat은 LLM_CHAT_MAX_WAIT, summary는 0)
+    queue_id: 보류 시 대기열에 등록할 요청 식별자 (재시도 요청이 같은 자리를 유지)
+    """
+    if not LLM_QUOTA_TABLE:
+        return Admission(True)
+
+    is_chat = priority == 'chat'
+    floor = 0.0 if is_chat else CAPACITY * LLM_CHAT_RESERVE
+    cost = min(float(cost), CAPACITY - floor)  # 버킷보다 큰 요청도 가득 찬 버킷에서는 실행되도록
+    if max_wait is None:
+        max_wait = LLM_CHAT_MAX_WAIT if is_chat else 0.0
+    entry = queue_entry_name(queue_id) if queue_id else None
+
+    started = time.monotonic()
+    admission = None
+    with metrics.span(f'llm_scheduler.{priority}.wait'):
+        attempts = 0
+        while admission is None:
+            waited = time.monotonic() - started
+            force = is_chat and waited >= max_wait
+            try:
+                granted, wait_seconds, live = try_take(cost, floor, entry, force)
+            except Exception as e:
+                if is_conflict(e) and attempts < MAX_ATTEMPTS:
+                    attempts += 1
+                    continue
+                print(f"LLM 스케줄러 오류 (제한 없이 진행): {str(e)}")
+                admission = Admission(True, (time.monotonic() - started) * 1000)
+                break
+
+            if granted:
+                if force and waited > 0:
+                    print(f"LLM 한도 초과 상태에서 대화 요청 진행 (대기 {waited:.1f}초)")
+                admission = Admission(True, (time.monotonic() - started) * 1000, 0, len(live))
+            elif waited + wait_seconds <= max_wait or (is_chat and waited < max_wait):
+                time.sleep(min(wait_seconds, max(0.0, max_wait - waited)) + 0.01)
+            else:
+                # 보류: 앞선 대기 요청 수만큼 재시도 시각을 뒤로 미룸 (이미 대기 중이면 자기보다 먼저 등록된 요청만)
+                own_retry_at = live.get(entry, float('inf'))
+                position = sum(1 for name, retry_at in live.items() if name != entry and retry_at < own_retry_at)
+                retry_after = max(1, math.ceil(wait_seconds + position * cost / REFILL_PER_SECOND))
+                if entry:
+                    try:
+                        enqueue(entry, time.time() + retry_after)
+                        live[entry] = time.time() + retry_after
+                    except Exception as e:
+                        print(f"LLM 대기열 등록 오류 (무시됨): {str(e)}")
+                admission = Admission(False, (time.monotonic() - started) * 1000, retry_after, len(live))
+                metrics.put_metric(f'llm_scheduler.{priority}.deferred', 1)
+
+    metrics.put_metric('llm_scheduler.queue_depth', admission.queue_depth)
+    metrics.put_metric(f'llm_scheduler.{priority}.wait_ms', round(admission.waited_ms, 3), 'Milliseconds')
+    return admission
@@ -0,0 +1,174 @@
+"""
+폴더 단위 전문 검색용 역색인 (ai_tutor_process_document가 갱신, ai_tutor_search가 조회)
+
+색인 객체 ({folder}/_search_index.json.z, zlib 압축 JSON):
+    version       형식 버전
+    updated_at    마지막 갱신 시각
+    documents     문서 이름 목록 (위치가 문서 번호, 다시 색인해도 번호 유지)
+    page_counts   문서별 전체 페이지 수
+    terms         {토큰: {문서 번호(문자열): [페이지, 빈도, 페이지, 빈도, ...]}} (페이지 순)
+
+토큰:
+- 한글: 연속된 한글을 두 글자씩 겹쳐 자른 bigram ("정규화" -> "정규", "규화"), 한 글자 단어는 그대로
+- 영문/숫자: 소문자 단어 (2자 이상)
+검색어도 같은 방식으로 자르며, 검색어 단어의 토큰이 모두 들어 있는 페이지를 그 단어와 일치하는 페이지로 봅니다.
+"""
+import datetime
+import json
+import math
+import re
+import zlib
+from collections import Counter
+
+INDEX_VERSION = 1
+INDEX_FILENAME = '_search_index.json.z'
+WORD_PATTERN = re.compile(r'[가-힣]+|[a-z0-9]+')
+TF_WEIGHTS = [0.0] + [1 + math.log(tf) for tf in range(1, 64)]  # 페이지 내 빈도 가중치 (1 + log 빈도)
+
+
+def index_key(folder_name):
+    return f"{folder_name}/{INDEX_FILENAME}"
+
+
+def word_tokens(word):
+    if '가' <= word[0] <= '힣':
+        return [word] if len(word) == 1 else [word[i:i + 2] for i in range(len(word) - 1)]
+    return [word] if len(word) >= 2 else []
+
+
+def tokenize(text):
+    return [token for word in WORD_PATTERN.findall(text.lower()) for token in word_tokens(word)]
+
+
+def page_terms(text):
+    """
+    페이지 본문 -> {토큰: 빈도} (같은 단어는 한 번만 자름)
+    """
+    terms = Counter()
+    for word, count in Counter(WORD_PATTERN.findall(text.lower())).items():
+        for token in word_tokens(word):
+            terms[token] += count
+    return terms
+
+
+def empty_index():
+    return {'version': INDEX_VERSION, 'updated_at': None, 'documents': [], 'page_counts': [], 'terms': {}}
+
+
+def encode_index(index):
+    return zlib.compress(json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decode_index(body):
+    index = json.loads(zlib.decompress(body).decode('utf-8'))
+    if index.get('version') != INDEX_VERSION:
+        raise ValueError(f"지원하지 않는 검색 색인 버전: {index.get('version')}")
+    return index
+
+
+def merge_document(index, document_name, pages, page_count, kept_pages):
+    """
+    문서 하나의 색인 갱신 (index를 직접 수정)
+    pages: {페이지 번호: {토큰: 빈도}} 새로 색인할 페이지
+    kept_pages: {이전 페이지 번호: 새 페이지 번호} 이전 색인을 그대로 옮겨 쓸 페이지 (나머지 이전 페이지는 제거)
+    """
+    documents = index['documents']
+    if document_name in documents:
+        document_id = documents.index(document_name)
+        index['page_counts'][document_id] = page_count
+    else:
+        document_id = len(documents)
+        documents.append(document_name)
+        index['page_counts'].append(page_count)
+    doc = str(document_id)
+
+    terms = index['terms']
+    for term in list(terms):
+        postings = terms[term].get(doc)
+        if postings is None:
+            continue
+        kept = []
+        for i in range(0, len(postings), 2):
+            new_page = kept_pages.get(postings[i])
+            if new_page is not None:
+                kept.append((new_page, postings[i + 1]))
+        if kept:
+            terms[term][doc] = [value for pair in sorted(kept) for value in pair]
+        else:
+            del terms[term][doc]
+            if not terms[term]:
+                del terms[term]
+
+    additions = {}
+    for page_number, counts in pages.items():
+        for term, count in counts.items():
+            additions.setdefault(term, []).append((page_number, count))
+    for term, entries in additions.items():
+        postings = terms.setdefault(term, {})
+        existing = postings.get(doc, [])
+        merged = [(existing[i], existing[i + 1]) for i in range(0, len(existing), 2)] + entries
+        postings[doc] = [value for pair in sorted(merged) for value in pair]
+
+    index['updated_at'] = datetime.datetime.utcnow().isoformat()
+    return index
+
+
+def tf_weight(tf):
+    return TF_WEIGHTS[tf] if tf < len(TF_WEIGHTS) else 1 + math.log(tf)
+
+
+def search(index, query, limit=10, pages_per_document=5):
+    """
+    검색어와 일치하는 페이지를 문서별로 묶어 점수 순으로 반환
+    - 페이지 점수: 일치한 검색어 단어의 토큰별 (1 + log 빈도) * idf 합 (일치한 단어가 많은 페이지 우선)
+    - 문서 점수: 상위 페이지 점수의 합
+    반환값: [{'document', 'score', 'matched_pages', 'pages': [{'page', 'score'}, ...]}, ...]
+    """
+    terms = index['terms']
+    total_pages = max(1, sum(index['page_counts']))
+    page_scores = {}  # {(문서 번호, 페이지): (일치한 단어 수, 점수)}
+    for word in query.split():
+        postings = [terms.get(token) for token in set(tokenize(word))]
+        if not postings or not all(postings):
+            continue
+        # 페이지가 적은(드문) 토큰부터 교집합을 좁혀 나감
+        postings.sort(key=lambda item: sum(len(pages) for pages in item.values()))
+        word_scores = None  # {문서 번호: {페이지: 점수}}
+        for token_postings in postings:
+            idf = math.log(1 + total_pages / (sum(len(pages) for pages in token_postings.values()) // 2))
+            narrowed = {}
+            for doc, pages in token_postings.items():
+                frequencies = dict(zip(pages[::2], pages[1::2]))
+                if word_scores is None:
+                    narrowed[doc] = {page: tf_weight(tf) * idf for page, tf in frequencies.items()}
+                elif doc in word_scores:
+                    doc_scores = {page: score + tf_weight(frequencies[page]) * idf
+                                  for page, score in word_scores[doc].items() if page in frequencies}
+                    if doc_scores:
+                        narrowed[doc] = doc_scores
+            word_scores = narrowed
+            if not word_scores:
+                break
+        for doc, doc_scores in word_scores.items():
+            for page, score in doc_scores.items():
+                matched, total = page_scores.get((doc, page), (0, 0.0))
+                page_scores[(doc, page)] = (matched + 1, total + score)
+
+    by_document = {}
+    for (doc, page), (matched, score) in page_scores.items():
+        by_document.setdefault(doc, []).append((matched, score, page))
+
+    ranked = []
+    for doc, pages in by_document.items():
+        pages.sort(key=lambda item: (-item[0], -item[1], item[2]))
+        top = pages[:pages_per_document]
+        score = round(sum(page_score for _, page_score, _ in top), 4)
+        document_name = index['documents'][int(doc)]
+        ranked.append(((-top[0][0], -score, document_name), {
+            'document': document_name,
+            'score': score,
+            'matched_pages': len(pages),
+            'pages': [{'page': page, 'score': round(page_score, 4)} for _, page_score, page in top]
+        }))
+    ranked.sort(key=lambda item: item[0])
+    return [result for _, result in ranked[:limit]]
@@ -1,31 +1,120 @@
 import json
 import os
-import boto3
 import uuid
 import datetime
 import re
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from ai_tutor_common import lazy, metrics  # 공통 레이어
 
 # 환경 변수 가져오기
 TARGET_BUCKET = os.environ.get('TARGET_BUCKET', 'target버킷')
+FOLDER_STATS_TABLE = os.environ.get('FOLDER_STATS_TABLE', 'ai-tutor-folder-stats')
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+MAX_BATCH_FOLDERS = int(os.environ.get('MAX_BATCH_FOLDERS', '50'))  # 일괄 생성 최대 폴더 수
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '8'))  # 일괄 생성 동시 처리 수
 
-# S3 클라이언트 초기화
-s3 = boto3.client('s3', region_name=AWS_REGION)
+# S3 / DynamoDB 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3', region_name=AWS_REGION), 's3')
 
-def create_folder_structure(folder_name):
+def create_stats_table():
+    import boto3
+    dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+    return metrics.instrument_client(dynamodb.Table(FOLDER_STATS_TABLE), 'dynamodb')
+
+s3 = lazy.LazyClient(create_s3_client, 's3')
+stats_table = lazy.LazyClient(create_stats_table, 'dynamodb')
+lazy.prewarm(s3, stats_table)
+
+# 조건부 쓰기가 실패했을 때 S3가 반환하는 오류 코드
+# - PreconditionFailed: 이미 같은 키의 객체가 존재
+# - ConditionalRequestConflict: 같은 키에 대한 동시 조건부 쓰기가 진행 중
+CONFLICT_ERROR_CODES = ('PreconditionFailed', 'ConditionalRequestConflict')
+
+def create_folder_structure(folder_name, metadata):
     """
-    S3 버킷에 주제별 폴더만 생성
+    S3 버킷에 주제별 폴더 생성 (조건부 쓰기)
+    - metadata.json을 If-None-Match: * 로 생성하여 존재 확인과 생성을 한 번에 수행
+    - 조건부 쓰기에 성공한 요청만 폴더 마커를 기록하므로 동시 생성 시 하나만 성공
+    - metadata.json 도입 전에 만든 폴더는 마커만 있으므로 마커도 If-None-Match: * 로 기록하여
+      이미 있으면 방금 쓴 metadata.json을 삭제하고 이미 존재하는 폴더로 처리
+    - 이후 단계가 실패하면 remove_folder_structure로 되돌려 재시도가 409가 되지 않도록 함
+    반환값: 생성 여부 (이미 존재하면 False)
     """
     # S3에는 실제 폴더가 없으므로 빈 객체를 생성하여 폴더처럼 표현
     base_prefix = f"{folder_name}/"
-    
-    # 주제별 폴더만 생성
-    s3.put_object(
-        Bucket=TARGET_BUCKET,
-        Key=base_prefix,
-        Body=''
-    )
-    
+
+    # 폴더 메타데이터 저장 (ai_tutor_list_folders, reconcile 작업에서 사용)
+    try:
+        s3.put_object(
+            Bucket=TARGET_BUCKET,
+            Key=f"{base_prefix}metadata.json",
+            Body=json.dumps(metadata, ensure_ascii=False),
+            ContentType='application/json',
+            IfNoneMatch='*'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] in CONFLICT_ERROR_CODES:
+            return False
+        raise
+
+    try:
+        s3.put_object(
+            Bucket=TARGET_BUCKET,
+            Key=base_prefix,
+            Body='',
+            IfNoneMatch='*'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] in CONFLICT_ERROR_CODES:
+            print(f"metadata.json 없이 마커만 있는 기존 폴더: {folder_name}")
+            remove_folder_structure(folder_name, keep_marker=True)
+            return False
+        remove_folder_structure(folder_name)
+        raise
+    except Exception:
+        remove_folder_structure(folder_name)
+        raise
+
+    return True
+
+def remove_folder_structure(folder_name, keep_marker=False):
+    """
+    생성 도중 실패한 폴더의 마커와 metadata.json 삭제 (실패해도 원래 오류를 우선)
+    - keep_marker: 기존 폴더의 마커는 남기고 이번 요청이 쓴 metadata.json만 삭제
+    """
+    base_prefix = f"{folder_name}/"
+    keys = [f"{base_prefix}metadata.json"] if keep_marker else [base_prefix, f"{base_prefix}metadata.json"]
+    for key in keys:
+        try:
+            s3.delete_object(Bucket=TARGET_BUCKET, Key=key)
+        except ClientError as e:
+            print(f"폴더 정리 실패: {key} ({str(e)})")
+
+def create_folder_stats(folder_name, description, created_at):
+    """
+    폴더 통계 테이블에 폴더 행 생성
+    - 문서 수/페이지 수는 ai_tutor_process_document에서 원자적으로 증가
+    - 이미 행이 있으면 덮어쓰지 않음 (기존 문서 수/페이지 수/documents 집합 보존)
+    반환값: 생성 여부 (이미 존재하면 False)
+    """
+    try:
+        stats_table.put_item(
+            Item={
+                'folder_name': folder_name,
+                'description': description,
+                'createdAt': created_at,
+                'documentCount': 0,
+                'pageCount': 0
+            },
+            ConditionExpression='attribute_not_exists(folder_name)'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
     return True
 
 def validate_folder_name(folder_name):
@@ -37,94 +126,147 @@ def validate_folder_name(folder_name):
     """
     # 특수문자 등 제한
     pattern = r'^[a-zA-Z0-9가-힣_\-\s]{2,50}$'
-    
+
     if not re.match(pattern, folder_name):
         return False
-    
+
     # 공백만으로 이루어진 경우 체크
     if folder_name.strip() == '':
         return False
-    
+
     return True
 
-def check_folder_exists(folder_name):
+def create_folder(folder_name, description):
+    """
+    폴더 하나 생성
+    반환값: (상태 코드, 응답 본문)
+    """
+    # 폴더 이름 유효성 검사
+    if not validate_folder_name(folder_name):
+        return 400, {
+            'error': '유효하지 않은 폴더 이름입니다. 2-50자의 영문, 숫자, 한글, 언더스코어, 하이픈만 허용됩니다.'
+        }
+
+    created_at = datetime.datetime.now().isoformat()
+    metadata = {
+        'name': folder_name,
+        'description': description,
+        'createdAt': created_at
+    }
+
+    # 폴더 생성 (이미 존재하면 409)
+    conflict = 409, {
+        'error': f'폴더 "{folder_name}"이(가) 이미 존재합니다.'
+    }
+    if not create_folder_structure(folder_name, metadata):
+        return conflict
+
+    try:
+        created = create_folder_stats(folder_name, description, created_at)
+    except Exception:
+        remove_folder_structure(folder_name)
+        raise
+    if not created:
+        print(f"폴더 통계 행이 이미 존재: {folder_name} (생성 취소)")
+        remove_folder_structure(folder_name)
+        return conflict
+
+    return 201, {
+        'name': folder_name,
+        'description': description,
+        'createdAt': created_at,
+        'documentCount': 0,
+        'pageCount': 0
+    }
+
+def create_folders(folders):
     """
-    동일한 이름의 폴더가 이미 존재하는지 확인
+    여러 폴더를 동시에 생성
+    - 폴더별 결과(statusCode 포함)를 요청 순서대로 반환
     """
-    response = s3.list_objects_v2(
-        Bucket=TARGET_BUCKET,
-        Prefix=f"{folder_name}/",
-        MaxKeys=1
-    )
-    
-    return 'Contents' in response
+    def create(folder):
+        folder = folder if isinstance(folder, dict) else {}
+        folder_name = (folder.get('name') or '').strip()
+        try:
+            status_code, body = create_folder(folder_name, folder.get('description', ''))
+        except Exception as e:
+            print(f"Error creating folder {folder_name}: {str(e)}")
+            status_code, body = 500, {'error': f'폴더 생성 중 오류가 발생했습니다: {str(e)}'}
+        return {'name': folder_name, 'statusCode': status_code, **body}
+
+    with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(folders))) as executor:
+        return list(executor.map(create, folders))
 
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     새 폴더 생성 핸들러
-    
+
     - 요청 본문에서 폴더 이름과 설명 추출
     - 폴더 이름 유효성 검사
-    - S3에 폴더 구조 생성
-    
+    - 조건부 쓰기로 S3에 metadata.json과 폴더 마커 생성 (사전 목록 조회 없음)
+    - 폴더 통계 테이블에 폴더 행(설명 포함) 생성
+
     요청 형식:
     {
         "name": "폴더명",
         "description": "폴더 설명(선택)"
     }
+    일괄 생성 요청 형식 (최대 MAX_BATCH_FOLDERS개):
+    {
+        "folders": [{"name": "폴더명", "description": "폴더 설명(선택)"}, ...]
+    }
     """
     try:
         # 요청 본문 파싱
         body = json.loads(event['body']) if 'body' in event else {}
-        
-        # 폴더 이름 가져오기
-        folder_name = body.get('name', '').strip()
-        description = body.get('description', '')
-        
-        # 폴더 이름 유효성 검사
-        if not validate_folder_name(folder_name):
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': '유효하지 않은 폴더 이름입니다. 2-50자의 영문, 숫자, 한글, 언더스코어, 하이픈만 허용됩니다.'
-                })
-            }
-        
-        # 동일 이름 폴더 존재 확인
-        if check_folder_exists(folder_name):
+
+        # 일괄 생성
+        if 'folders' in body:
+            folders = body.get('folders')
+            if not isinstance(folders, list) or not folders or len(folders) > MAX_BATCH_FOLDERS:
+                return {
+                    'statusCode': 400,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    },
+                    'body': json.dumps({
+                        'error': f'folders는 1-{MAX_BATCH_FOLDERS}개의 폴더 목록이어야 합니다.'
+                    })
+                }
+
+            results = create_folders(folders)
+            created = sum(1 for result in results if result['statusCode'] == 201)
             return {
-                'statusCode': 409,
+                'statusCode': 200,
                 'headers': {
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
                 'body': json.dumps({
-                    'error': f'폴더 "{folder_name}"이(가) 이미 존재합니다.'
+                    'results': results,
+                    'created': created,
+                    'failed': len(results) - created
                 })
             }
-        
-        # 폴더 생성
-        create_folder_structure(folder_name)
-        
-        # 성공 응답
+
+        # 폴더 이름 가져오기
+        folder_name = body.get('name', '').strip()
+        description = body.get('description', '')
+
+        # 폴더 생성 (유효성 검사 실패 400, 이미 존재 409, 성공 201)
+        status_code, response_body = create_folder(folder_name, description)
+
         return {
-            'statusCode': 201,
+            'statusCode': status_code,
             'headers': {
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
-                'name': folder_name,
-                'description': description,
-                'createdAt': datetime.datetime.now().isoformat(),
-                'documentCount': 0
-            })
+            'body': json.dumps(response_body)
         }
-    
+
     except Exception as e:
         # 오류 응답
         print(f"Error creating folder: {str(e)}")
@@ -0,0 +1,92 @@
+import json
+import os
+import datetime
+import urllib.parse
+from ai_tutor_common import jobs, lazy, metrics  # 공통 레이어
+
+# 환경 변수 가져오기
+SOURCE_BUCKET = os.environ.get('SOURCE_BUCKET', 'source 버킷')  # 처리 대기 버킷
+PROCESSING_QUEUE_URL = os.environ.get('PROCESSING_QUEUE_URL', '큐 URL')  # ai_tutor_process_document가 구독하는 SQS 큐
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+SEND_BATCH_SIZE = 10  # SQS SendMessageBatch 최대 메시지 수
+
+# SQS 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_sqs_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('sqs', region_name=AWS_REGION), 'sqs')
+
+sqs = lazy.LazyClient(create_sqs_client, 'sqs')
+lazy.prewarm(sqs)
+
+def build_job(record):
+    """
+    S3 이벤트 레코드 -> 작업 메시지 (처리 대상이 아니면 None)
+    """
+    bucket_name = record['s3']['bucket']['name']
+    object_key = record['s3']['object']['key']
+    if bucket_name != SOURCE_BUCKET:
+        print(f"소스 버킷({SOURCE_BUCKET})이 아닌 {bucket_name}에서 이벤트 발생. 무시합니다.")
+        return None
+    parsed = jobs.parse_upload_key(object_key)
+    if parsed is None:
+        print(f"처리 대상이 아닌 객체 (upload/ 경로 또는 파일명 형식 불일치): {object_key}")
+        return None
+    folder_name, document_name, _ = parsed
+    return {
+        'job_id': jobs.job_id(folder_name, document_name),
+        'upload_id': jobs.upload_id_for(record),
+        'folder_name': folder_name,
+        'document_name': document_name,
+        'bucket': bucket_name,
+        'key': object_key,
+        'queued_at': datetime.datetime.utcnow().isoformat()
+    }
+
+@metrics.instrument_handler
+def lambda_handler(event, context):
+    """
+    소스 버킷 upload/ 업로드(S3 트리거)를 문서 처리 큐에 넣습니다.
+
+    - 레코드마다 작업 행(JOB_TABLE)을 queued 상태로 기록하고 작업 메시지를 SQS로 전송 (최대 10개씩 묶어 전송)
+    - 문서 처리는 큐를 구독하는 ai_tutor_process_document 작업자가 수행
+      (동시 처리 수는 이벤트 소스 매핑의 MaximumConcurrency, 재시도/DLQ는 큐의 재처리 정책으로 설정)
+    - 전송에 실패한 메시지가 있으면 예외를 발생시켜 S3 비동기 호출의 재시도를 받음
+
+    필요한 IAM 권한:
+    - sqs:SendMessage
+    - dynamodb:PutItem (JOB_TABLE 사용 시)
+    """
+    print("ai_tutor_enqueue_document 함수 시작")
+    messages = [message for message in map(build_job, event.get('Records', [])) if message is not None]
+    if not messages:
+        return {"statusCode": 200, "body": json.dumps({"message": "처리할 업로드 없음", "queued": 0})}
+
+    # 작업 행을 queued 상태로 기록 (같은 문서의 이전 작업은 새 업로드로 교체)
+    for message in messages:
+        job = jobs.JobTracker(message['upload_id'], queued_at=message['queued_at'], create=True)
+        job.bind(message['folder_name'], message['document_name'], urllib.parse.unquote_plus(message['key']))
+
+    failed = []
+    for start in range(0, len(messages), SEND_BATCH_SIZE):
+        batch = messages[start:start + SEND_BATCH_SIZE]
+        response = sqs.send_message_batch(
+            QueueUrl=PROCESSING_QUEUE_URL,
+            Entries=[{'Id': str(index), 'MessageBody': json.dumps(message, ensure_ascii=False)}
+                     for index, message in enumerate(batch)]
+        )
+        failed.extend(batch[int(entry['Id'])]['job_id'] for entry in response.get('Failed', []))
+
+    if failed:
+        # S3 비동기 호출은 예외가 발생해야 재시도하므로 응답 대신 예외로 실패를 알림
+        raise RuntimeError(f"처리 큐 전송 실패: {failed}")
+
+    for message in messages:
+        print(f"처리 대기열 등록: {message['job_id']} (업로드 {message['upload_id']})")
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "message": "문서 처리 대기열 등록 완료",
+            "queued": len(messages),
+            "job_ids": [message['job_id'] for message in messages]
+        }, ensure_ascii=False)
+    }
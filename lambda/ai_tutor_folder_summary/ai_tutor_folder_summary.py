@@ -0,0 +1,449 @@
+import json
+import os
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.exceptions import ClientError
+from ai_tutor_common import lazy, metrics, scheduler  # 공통 레이어
+
+# 환경 변수 가져오기
+TARGET_BUCKET = os.environ.get('TARGET_BUCKET', 'target버킷')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+UPSTAGE_API_KEY = os.environ.get('UPSTAGE_API_KEY', 'api-key')
+SUMMARY_MODEL = os.environ.get('SUMMARY_MODEL', 'solar-pro')
+SUMMARY_CONCURRENCY = int(os.environ.get('SUMMARY_CONCURRENCY', '4'))  # 동시에 생성하는 문서 요약 수
+SUMMARY_MAX_WAIT = float(os.environ.get('SUMMARY_MAX_WAIT', '10'))  # 공유 LLM 한도가 부족할 때 문서당 최대 대기(초)
+PROGRESS_INTERVAL = float(os.environ.get('PROGRESS_INTERVAL', '2'))  # 진행 상황 파일 갱신 최소 간격(초)
+RUNNING_STALE_SECONDS = 15 * 60  # 이 시간 동안 갱신이 없는 'running' 진행 상황은 중단된 것으로 봄
+STUDY_GUIDE_QUEUE_URL = os.environ.get('STUDY_GUIDE_QUEUE_URL', '')  # 설정 시 POST는 작업만 큐에 넣고 이 함수(SQS 트리거)가 생성
+TIME_BUDGET_MARGIN_MS = 60 * 1000  # Lambda 남은 실행 시간이 이보다 적으면 시작하지 않은 문서는 다음 실행으로 넘김
+MAX_QUEUE_DELAY = 900  # SQS DelaySeconds 최대값(초)
+
+# S3 / SQS / solar-pro 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3', region_name=AWS_REGION), 's3')
+
+def create_sqs_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('sqs', region_name=AWS_REGION), 'sqs')
+
+def create_llm_client():
+    from openai import OpenAI  # openai 패키지 (openai==1.52.2)
+    return metrics.instrument_llm_client(OpenAI(
+        api_key=UPSTAGE_API_KEY,
+        base_url=os.environ.get('OPENAI_BASE_URL', 'https://api.upstage.ai/v1')
+    ))
+
+s3 = lazy.LazyClient(create_s3_client, 's3')
+sqs = lazy.LazyClient(create_sqs_client, 'sqs')
+llm_client = lazy.LazyClient(create_llm_client, 'openai')
+lazy.prewarm(s3, sqs, llm_client)
+
+SUMMARY_PROMPT = (
+    "You are a professional technical writer helping students prepare for exams.\n"
+    "Summarize the following content with a focus on **key points likely to be tested in an exam**.\n"
+    "The output must be in clean, structured, and condensed **Markdown format** suitable for Notion.\n"
+    "Use clear section titles (##), bullet points (-), and tables if helpful.\n"
+    "Ignore any metadata, introductions, or copyright information.\n"
+    "Prioritize concepts, definitions, processes, and comparisons that are important for test-taking.\n"
+    "Avoid verbosity. Be direct and focused.\n\n"
+    "Now summarize the following lecture document with that goal in mind:\n\n"
+)
+
+def response(status_code, body, headers=None):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **(headers or {})
+        },
+        'body': json.dumps(body, ensure_ascii=False)
+    }
+
+def study_guide_key(folder_name):
+    return f"{folder_name}/_study_guide.md"
+
+def progress_key(folder_name):
+    return f"{folder_name}/_study_guide_progress.json"
+
+def read_json_object(key):
+    """
+    S3 JSON 객체 조회 (없으면 None)
+    """
+    try:
+        s3_response = s3.get_object(Bucket=TARGET_BUCKET, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return json.loads(s3_response['Body'].read().decode('utf-8'))
+
+def list_folder_documents(folder_name):
+    """
+    폴더 내 처리된 문서와 캐시된 요약 조회 (목록 요청만 사용)
+    경로 패턴: {folder}/{document}/processed/{document}_result.json (요약: 같은 경로의 .md)
+    반환값: [{'document', 'result_key', 'summary_key', 'fresh', 'digests_fresh'}] (문서 이름 순)
+      fresh: 요약이 처리 결과보다 나중에 저장됨 (재처리 후 다시 만들지 않은 요약은 사용하지 않음)
+      digests_fresh: 페이지별 digest가 처리 결과보다 나중에 저장됨 (재처리 전 digest는 사용하지 않음)
+    """
+    results = {}
+    summaries = {}
+    digests = {}
+    list_kwargs = {'Bucket': TARGET_BUCKET, 'Prefix': f"{folder_name}/"}
+    while True:
+        list_response = s3.list_objects_v2(**list_kwargs)
+        for item in list_response.get('Contents', []):
+            key_parts = item['Key'].split('/')
+            if len(key_parts) != 4 or key_parts[2] != 'processed':
+                continue
+            document_name = key_parts[1]
+            if key_parts[3] == f"{document_name}_result.json":
+                results[document_name] = item
+            elif key_parts[3] == f"{document_name}_result.md":
+                summaries[document_name] = item
+            elif key_parts[3] == f"{document_name}_digests.json":
+                digests[document_name] = item
+        if not list_response.get('IsTruncated'):
+            break
+        list_kwargs['ContinuationToken'] = list_response['NextContinuationToken']
+
+    documents = []
+    for document_name in sorted(results):
+        result = results[document_name]
+        summary = summaries.get(document_name)
+        digest = digests.get(document_name)
+        documents.append({
+            'document': document_name,
+            'result_key': result['Key'],
+            'summary_key': result['Key'].rsplit('.', 1)[0] + '.md',
+            'fresh': summary is not None and summary['LastModified'] >= result['LastModified'],
+            'digests_fresh': digest is not None and digest['LastModified'] >= result['LastModified']
+        })
+    return documents
+
+def document_source(document):
+    """
+    요약 대상 텍스트
+    - 처리 결과 이후에 저장된 페이지별 digest({문서}_digests.json)가 모든 페이지에 있으면 digest 사용
+    - 없으면 처리 결과의 페이지 본문(markdown)만 이어 붙여 사용 (결과 JSON 전체를 보내지 않음)
+    """
+    result_key = document['result_key']
+    digests = read_json_object(result_key[:-len('_result.json')] + '_digests.json') \
+        if document['digests_fresh'] else None
+    if digests and len(digests.get('pages', [])) >= digests.get('total_pages', 0):
+        lines = ["(The document is given as per-page digests with keywords.)", ""]
+        for page in digests['pages']:
+            if not page.get('digest'):
+                continue
+            lines.append(f"[Page {page['page']}] {page['digest']}")
+            if page.get('keywords'):
+                lines.append(f"Keywords: {', '.join(page['keywords'])}")
+        return 'digests', "\n".join(lines)
+
+    result = read_json_object(result_key)
+    if result is None:
+        raise ValueError(f"처리 결과 없음: {result_key}")
+    lines = []
+    for page in result.get('pages', []):
+        text = "\n".join(item.get('markdown', '') for item in page.get('contents', []) if item.get('markdown'))
+        if text:
+            lines.append(f"[Page {page.get('page')}]\n{text}")
+    return 'pages', "\n\n".join(lines)
+
+def summarize_document(document):
+    """
+    문서 하나의 요약 생성 후 ai_tutor_get_document와 같은 위치(.md)에 저장 (작업자 스레드에서 실행)
+    반환값: {'status': 'generated' | 'deferred', 'summary', 'summary_source', 'retry_after'}
+    """
+    summary_source, document_text = document_source(document)
+    messages = [{"role": "user", "content": SUMMARY_PROMPT + document_text}]
+    admission = scheduler.acquire('summary', scheduler.estimate_tokens(messages, 4000),
+                                  max_wait=SUMMARY_MAX_WAIT, queue_id=document['result_key'])
+    if not admission.admitted:
+        return {'status': 'deferred', 'retry_after': admission.retry_after}
+
+    completion = llm_client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=messages,
+        temperature=0.2,
+        top_p=0.4,
+        stream=False,
+        max_tokens=4000
+    )
+    summary = completion.choices[0].message.content
+    s3.put_object(
+        Bucket=TARGET_BUCKET,
+        Key=document['summary_key'],
+        Body=summary,
+        ContentType='text/markdown'
+    )
+    return {'status': 'generated', 'summary': summary, 'summary_source': summary_source}
+
+def load_summary(document):
+    s3_response = s3.get_object(Bucket=TARGET_BUCKET, Key=document['summary_key'])
+    return s3_response['Body'].read().decode('utf-8')
+
+def demote_headings(markdown):
+    """
+    문서 요약의 제목 수준을 한 단계 낮춤 (학습 가이드에서 문서 제목이 ## 이므로)
+    """
+    lines = []
+    in_code = False
+    for line in markdown.splitlines():
+        if line.lstrip().startswith('```'):
+            in_code = not in_code
+        if not in_code and line.startswith('#'):
+            line = '#' + line
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+def build_study_guide(folder_name, documents, summaries):
+    """
+    문서별 요약을 폴더 학습 가이드 Markdown 하나로 합침 (문서 이름 순, 목차 포함)
+    """
+    sections = [document for document in documents if document['document'] in summaries]
+    lines = [f"# {folder_name} 학습 가이드", ""]
+    lines.append(f"> 문서 {len(sections)}개 요약 · 생성 {datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC")
+    lines.append("")
+    lines.append("## 목차")
+    lines.extend(f"{index}. {document['document']}" for index, document in enumerate(sections, start=1))
+    for document in sections:
+        lines.extend(["", "---", "", f"## {document['document']}", ""])
+        lines.append(demote_headings(summaries[document['document']]))
+    return "\n".join(lines) + "\n"
+
+class ProgressReporter:
+    """
+    {folder}/_study_guide_progress.json 진행 상황 기록 (PROGRESS_INTERVAL 간격으로 제한, 완료 시 항상 기록)
+    """
+
+    def __init__(self, folder_name, documents):
+        now = datetime.datetime.utcnow().isoformat()
+        self.key = progress_key(folder_name)
+        self.written_at = 0.0
+        self.state = {
+            'folder_name': folder_name,
+            'status': 'running',
+            'started_at': now,
+            'updated_at': now,
+            'total': len(documents),
+            'completed': 0,
+            'documents': [{'document': document['document'], 'status': 'pending'} for document in documents],
+            'study_guide': None
+        }
+        self.entries = {entry['document']: entry for entry in self.state['documents']}
+
+    def update(self, document_name, status, **details):
+        self.entries[document_name].update(status=status, **details)
+        if status in ('reused', 'generated', 'failed'):
+            self.state['completed'] += 1
+
+    def counts(self):
+        counts = {}
+        for entry in self.state['documents']:
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        return counts
+
+    def write(self, force=False, **fields):
+        self.state.update(fields)
+        if not force and time.monotonic() - self.written_at < PROGRESS_INTERVAL:
+            return
+        self.state['updated_at'] = datetime.datetime.utcnow().isoformat()
+        self.state['counts'] = self.counts()
+        s3.put_object(
+            Bucket=TARGET_BUCKET,
+            Key=self.key,
+            Body=json.dumps(self.state, ensure_ascii=False),
+            ContentType='application/json'
+        )
+        self.written_at = time.monotonic()
+
+def is_running(progress):
+    """
+    다른 실행이 같은 폴더의 학습 가이드를 만들고 있거나 큐에서 기다리는지 (오래 갱신되지 않은 진행 상황은 제외)
+    """
+    if not progress or progress.get('status') not in ('queued', 'running'):
+        return False
+    try:
+        updated_at = datetime.datetime.fromisoformat(progress['updated_at'])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return (datetime.datetime.utcnow() - updated_at).total_seconds() < RUNNING_STALE_SECONDS
+
+def send_study_guide_job(folder_name, delay_seconds=0):
+    """
+    학습 가이드 생성 작업을 큐에 넣음 (이 함수가 SQS 트리거로 받아 생성)
+    """
+    sqs.send_message(
+        QueueUrl=STUDY_GUIDE_QUEUE_URL,
+        MessageBody=json.dumps({'folder_name': folder_name}, ensure_ascii=False),
+        DelaySeconds=max(0, min(MAX_QUEUE_DELAY, int(delay_seconds)))
+    )
+
+def generate_study_guide(folder_name, documents, context, requeue=False):
+    """
+    학습 가이드 생성 (큐 작업자, 또는 큐를 쓰지 않는 배포에서는 API 요청 안에서 실행)
+    - 진행 중인 요약은 항상 끝까지 기다림 (핸들러가 반환하면 실행 환경이 멈추므로 기다리지 않은 요약은 사라짐)
+    - Lambda 남은 실행 시간이 TIME_BUDGET_MARGIN_MS보다 적으면 시작하지 않은 문서는 다음 실행으로 넘김
+    - requeue: 남은 문서가 있으면 작업을 다시 큐에 넣음 (LLM 한도 보류 시 Retry-After만큼 지연)
+    반환값: (상태 코드, 응답 본문, 추가 헤더)
+    """
+    reporter = ProgressReporter(folder_name, documents)
+    reporter.write(force=True)
+
+    summaries = {}
+    for document in documents:
+        if not document['fresh']:
+            continue
+        try:
+            summaries[document['document']] = load_summary(document)
+            reporter.update(document['document'], 'reused')
+        except ClientError as e:
+            print(f"캐시된 요약 조회 실패 (다시 생성): {document['summary_key']} - {str(e)}")
+    missing = [document for document in documents if document['document'] not in summaries]
+    print(f"학습 가이드 생성: 문서 {len(documents)}개 중 요약 재사용 {len(summaries)}개, 생성 {len(missing)}개")
+
+    # 2. 빠진 요약을 동시에 생성 (실행 시간이 부족하면 시작하지 않은 문서는 다음 실행으로)
+    retry_after = []
+    if missing:
+        with metrics.span('study_guide.summaries'), \
+                ThreadPoolExecutor(max_workers=max(1, min(SUMMARY_CONCURRENCY, len(missing)))) as executor:
+            futures = {executor.submit(summarize_document, document): document for document in missing}
+            stopped = False
+            for future in as_completed(futures):
+                document_name = futures[future]['document']
+                if future.cancelled():
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"문서 요약 생성 오류: {document_name} - {str(e)}")
+                    reporter.update(document_name, 'failed', error=str(e))
+                else:
+                    if result['status'] == 'deferred':
+                        reporter.update(document_name, 'deferred', retry_after=result['retry_after'])
+                        retry_after.append(result['retry_after'])
+                    else:
+                        summaries[document_name] = result['summary']
+                        reporter.update(document_name, 'generated', summary_source=result['summary_source'])
+                reporter.write()
+                if not stopped and context is not None and \
+                        context.get_remaining_time_in_millis() < TIME_BUDGET_MARGIN_MS:
+                    stopped = True
+                    cancelled = sum(1 for pending in futures if pending.cancel())
+                    if cancelled:
+                        print(f"남은 실행 시간 부족: 문서 {cancelled}개는 다음 실행에서 생성합니다.")
+
+    counts = reporter.counts()
+    if counts.get('pending') or counts.get('deferred'):
+        retry_seconds = min(retry_after) if retry_after and not counts.get('pending') else 1
+        if requeue:
+            send_study_guide_job(folder_name, retry_seconds)
+            reporter.write(force=True, status='queued', retry_after=retry_seconds)
+        else:
+            reporter.write(force=True, status='partial', retry_after=retry_seconds)
+        print(f"학습 가이드 보류: {counts}")
+        return 202, reporter.state, {'Retry-After': str(retry_seconds)}
+
+    if not summaries:
+        reporter.write(force=True, status='failed')
+        return 500, {**reporter.state, 'error': '문서 요약을 하나도 만들지 못했습니다.'}, {}
+
+    # 3. 학습 가이드 저장
+    guide = build_study_guide(folder_name, documents, summaries)
+    s3.put_object(
+        Bucket=TARGET_BUCKET,
+        Key=study_guide_key(folder_name),
+        Body=guide,
+        ContentType='text/markdown'
+    )
+    reporter.write(force=True, status='done', study_guide=f"{TARGET_BUCKET}/{study_guide_key(folder_name)}")
+    print(f"학습 가이드 저장 완료: s3://{TARGET_BUCKET}/{study_guide_key(folder_name)} ({counts})")
+
+    return 200, {**reporter.state, 'guide': guide}, {}
+
+def process_queue_batch(records, context):
+    """
+    학습 가이드 작업 큐(SQS) 메시지 묶음 처리 (메시지: {folder_name})
+    - 남은 문서가 있으면 generate_study_guide가 작업을 다시 큐에 넣으므로 메시지는 성공으로 처리
+    - 예외로 실패한 메시지만 batchItemFailures로 반환 (큐 설정의 maxReceiveCount 이후 DLQ로 이동)
+    """
+    failures = []
+    for record in records:
+        try:
+            folder_name = json.loads(record['body'])['folder_name']
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"잘못된 작업 메시지 (재시도하지 않음): {record.get('messageId')} - {str(e)}")
+            continue
+        try:
+            documents = list_folder_documents(folder_name)
+            if not documents:
+                print(f"처리된 문서가 없는 폴더 (작업 생략): {folder_name}")
+                continue
+            generate_study_guide(folder_name, documents, context, requeue=True)
+        except Exception as e:
+            print(f"학습 가이드 작업 실패: {folder_name} - {str(e)}")
+            failures.append({'itemIdentifier': record['messageId']})
+    return {'batchItemFailures': failures}
+
+@metrics.instrument_handler
+def lambda_handler(event, context):
+    """
+    폴더 전체 문서를 하나의 시험 대비 학습 가이드로 요약
+
+    - POST /folders/{id}/study-guide: 학습 가이드 생성
+      1. 폴더 목록 요청으로 처리된 문서와 캐시된 문서 요약(.md) 확인 (처리 결과보다 나중에 저장된 요약만 재사용)
+      2. 요약이 없거나 오래된 문서만 SUMMARY_CONCURRENCY개씩 동시에 생성 (공유 LLM 한도 사용, 같은 .md 위치에 저장)
+      3. 문서별 요약을 {folder}/_study_guide.md 하나로 합쳐 저장
+      진행 상황은 {folder}/_study_guide_progress.json에 문서별 상태로 기록
+      STUDY_GUIDE_QUEUE_URL 설정 시: 작업을 큐에 넣고 바로 202 + Retry-After (API Gateway 29초 제한과 무관),
+      이 함수가 SQS 트리거로 1~3을 실행하고 남은 문서가 있으면 작업을 다시 큐에 넣음
+      설정하지 않으면 요청 안에서 생성 (29초를 넘기면 API Gateway는 504를 반환하지만 Lambda는 끝까지 실행되어
+      결과를 저장하므로 GET으로 확인), LLM 한도 부족으로 보류된 문서가 있으면 202 + Retry-After
+    - GET /folders/{id}/study-guide: 진행 상황 조회
+    - SQS 이벤트 (학습 가이드 작업 큐): process_queue_batch
+
+    필요한 IAM 권한:
+    - s3:ListBucket, s3:GetObject, s3:PutObject
+    - sqs:SendMessage (큐 사용 시, 트리거에는 sqs:ReceiveMessage, sqs:DeleteMessage, sqs:GetQueueAttributes)
+    """
+    records = event.get('Records') or []
+    if records and records[0].get('eventSource') == 'aws:sqs':
+        return process_queue_batch(records, context)
+
+    try:
+        folder_name = (event.get('pathParameters') or {}).get('id')
+        if not folder_name:
+            return response(400, {'error': '폴더 이름이 제공되지 않았습니다.'})
+
+        progress = read_json_object(progress_key(folder_name))
+        if event.get('httpMethod') == 'GET':
+            if progress is None:
+                return response(404, {'error': f'폴더 "{folder_name}"의 학습 가이드 생성 기록이 없습니다.'})
+            return response(200, progress)
+
+        if is_running(progress):
+            print(f"이미 학습 가이드 생성 중인 폴더: {folder_name}")
+            return response(202, progress, {'Retry-After': str(int(PROGRESS_INTERVAL * 5))})
+
+        # 1. 문서 및 캐시된 요약 확인
+        documents = list_folder_documents(folder_name)
+        if not documents:
+            return response(404, {'error': f'폴더 "{folder_name}"에 처리된 문서가 없습니다.'})
+
+        if STUDY_GUIDE_QUEUE_URL:
+            reporter = ProgressReporter(folder_name, documents)
+            send_study_guide_job(folder_name)
+            reporter.write(force=True, status='queued')
+            print(f"학습 가이드 작업 대기열 등록: {folder_name} (문서 {len(documents)}개)")
+            return response(202, reporter.state, {'Retry-After': str(int(PROGRESS_INTERVAL * 5))})
+
+        status_code, body, headers = generate_study_guide(folder_name, documents, context)
+        return response(status_code, body, headers)
+
+    except Exception as e:
+        error_message = f"학습 가이드 생성 중 오류가 발생했습니다: {str(e)}"
+        print(error_message)
+        return response(500, {'error': error_message})
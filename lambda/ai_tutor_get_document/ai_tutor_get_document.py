@@ -1,15 +1,73 @@
 import json
 import os
-import boto3
 import sys
-from openai import OpenAI  # openai 패키지 (openai==1.52.2)
+from ai_tutor_common import lazy, metrics, scheduler  # 공통 레이어
 
-# S3 클라이언트 초기화
-s3_client = boto3.client("s3")
 # 결과 JSON 파일이 저장된 S3 버킷명 (환경변수 또는 기본값)
 RESULT_BUCKET = os.environ.get("RESULT_BUCKET", "target버킷")
 
+# S3 / solar-pro 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+# - document_id가 없는 400 응답 경로에서는 boto3 / openai를 import 하지 않음
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client("s3"), "s3")
 
+def create_llm_client():
+    from openai import OpenAI  # openai 패키지 (openai==1.52.2)
+    return metrics.instrument_llm_client(OpenAI(
+        api_key=os.environ.get("UPSTAGE_API_KEY", "up_ZHV5KSiPKtoVUgTlQfuHiIk7LaUmg"),
+        base_url="https://api.upstage.ai/v1"
+    ))
+
+s3_client = lazy.LazyClient(create_s3_client, "s3")
+llm_client = lazy.LazyClient(create_llm_client, "openai")
+lazy.prewarm(s3_client, llm_client)
+
+
+def load_page_digests(document_id):
+    """
+    ai_tutor_process_document가 결과 옆에 저장한 페이지별 digest ({문서}_digests.json) 조회
+    digest 파일이 없거나 일부 페이지가 빠져 있거나 결과보다 먼저 저장된(재처리 전) digest면 None (원문 페이지로 요약)
+    """
+    if not document_id.endswith("_result.json"):
+        return None
+    digests_key = document_id[:-len("_result.json")] + "_digests.json"
+    try:
+        s3_response = s3_client.get_object(Bucket=RESULT_BUCKET, Key=digests_key)
+        digests = json.loads(s3_response["Body"].read().decode("utf-8"))
+    except Exception as e:
+        print(f"페이지 digest 없음 (원문으로 요약): {str(e)}")
+        return None
+    try:
+        result_head = s3_client.head_object(Bucket=RESULT_BUCKET, Key=document_id)
+    except Exception as e:
+        print(f"처리 결과 확인 실패 (원문으로 요약): {str(e)}")
+        return None
+    if s3_response["LastModified"] < result_head["LastModified"]:
+        print("페이지 digest가 처리 결과보다 오래됨 (재처리 전 digest), 원문으로 요약")
+        return None
+    pages = digests.get("pages", [])
+    if len(pages) < digests.get("total_pages", 0):
+        print(f"페이지 digest 일부 누락 ({len(pages)}/{digests.get('total_pages')}), 원문으로 요약")
+        return None
+    return pages
+
+
+def format_page_digests(pages):
+    """
+    페이지별 digest를 요약 프롬프트용 텍스트로 변환 (빈 페이지 제외)
+    """
+    lines = []
+    for page in pages:
+        if not page.get("digest"):
+            continue
+        lines.append(f"[Page {page['page']}] {page['digest']}")
+        if page.get("keywords"):
+            lines.append(f"Keywords: {', '.join(page['keywords'])}")
+    return "\n".join(lines)
+
+
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     API Gateway에서 전달받은 document_id (S3 객체 키)를 이용해 JSON 파일을 읽고,
@@ -28,16 +86,26 @@ def lambda_handler(event, context):
     print(f"요청받은 document_id (S3 객체 키): {document_id}")
     sys.stdout.flush()
     
-    # 2. S3에서 JSON 파일 가져오기
-    try:
-        s3_response = s3_client.get_object(Bucket=RESULT_BUCKET, Key=document_id)
-        file_content = s3_response["Body"].read().decode("utf-8")
-        document_json = json.loads(file_content)
-    except Exception as e:
-        error_message = f"S3에서 JSON 파일을 가져오는 중 오류 발생: {str(e)}"
-        print(error_message)
-        sys.stdout.flush()
-        return {"statusCode": 500, "body": error_message}
+    # 2. 페이지별 digest가 있으면 digest를, 없으면 S3의 JSON 파일(원문 페이지)을 요약 대상으로 사용
+    page_digests = load_page_digests(document_id)
+    if page_digests is not None:
+        summary_source = "digests"
+        document_text = (
+            "(The document is given as per-page digests with keywords.)\n\n" + format_page_digests(page_digests)
+        )
+    else:
+        summary_source = "pages"
+        try:
+            s3_response = s3_client.get_object(Bucket=RESULT_BUCKET, Key=document_id)
+            file_content = s3_response["Body"].read().decode("utf-8")
+            document_json = json.loads(file_content)
+        except Exception as e:
+            error_message = f"S3에서 JSON 파일을 가져오는 중 오류 발생: {str(e)}"
+            print(error_message)
+            sys.stdout.flush()
+            return {"statusCode": 500, "body": error_message}
+        document_text = json.dumps(document_json, ensure_ascii=False, indent=2)
+    print(f"요약 대상: {summary_source}")
     
     # 3. 대화형 프롬프트 구성
     prompt_text = (
@@ -50,20 +118,32 @@ def lambda_handler(event, context):
         "Avoid verbosity. Be direct and focused.\n\n"
         
         "Now summarize the following lecture document with that goal in mind:\n\n"
-        + json.dumps(document_json, ensure_ascii=False, indent=2)
-    )
-    
-    # 4. Upstage의 solar‑pro 모델 호출을 위한 클라이언트 생성
-    client = OpenAI(
-        api_key=os.environ.get("UPSTAGE_API_KEY", "up_ZHV5KSiPKtoVUgTlQfuHiIk7LaUmg"),
-        base_url="https://api.upstage.ai/v1"
+        + document_text
     )
     
+    # 4. 공유 LLM 한도 확보 (대화용 몫은 남겨 두며, 한도가 부족하면 202 + Retry-After로 보류)
+    messages = [{"role": "user", "content": prompt_text}]
+    admission = scheduler.acquire("summary", scheduler.estimate_tokens(messages, 4000), queue_id=document_id)
+    if not admission.admitted:
+        print(f"LLM 한도 부족으로 요약 보류: {admission}")
+        sys.stdout.flush()
+        return {
+            "statusCode": 202,
+            "headers": {"Retry-After": str(admission.retry_after)},
+            "body": json.dumps({
+                "document_id": document_id,
+                "status": "deferred",
+                "retry_after": admission.retry_after,
+                "queue_depth": admission.queue_depth
+            }, ensure_ascii=False)
+        }
+
+    # 5. Upstage의 solar‑pro 모델 호출 (클라이언트는 웜 스타트 간 재사용)
     try:
         # Chat Completion API 호출 (동기 호출, stream=False)
-        response = client.chat.completions.create(
+        response = llm_client.chat.completions.create(
             model="solar-pro",
-            messages=[{"role": "user", "content": prompt_text}],
+            messages=messages,
             temperature=0.2,
             top_p=0.4,
             stream=False,
@@ -77,7 +157,7 @@ def lambda_handler(event, context):
         sys.stdout.flush()
         return {"statusCode": 500, "body": error_message}
     
-    # 5. Markdown 파일 형식으로 S3에 저장하기
+    # 6. Markdown 파일 형식으로 S3에 저장하기
     # 기존 JSON 파일 이름에서 확장자만 .md로 변경하여 저장할 수 있습니다.
     markdown_key = document_id.rsplit('.', 1)[0] + '.md'
     try:
@@ -94,10 +174,11 @@ def lambda_handler(event, context):
         sys.stdout.flush()
         return {"statusCode": 500, "body": error_message}
     
-    # 6. 최종 요약 결과를 API 응답으로 반환
+    # 7. 최종 요약 결과를 API 응답으로 반환
     response_body = {
         "document_id": document_id,
         "summary": summary_result,
+        "summary_source": summary_source,
         "markdown_file": f"{RESULT_BUCKET}/{markdown_key}"
     }
     print("최종 요약 결과:")
@@ -0,0 +1,67 @@
+import json
+import os
+import urllib.parse
+from decimal import Decimal
+from ai_tutor_common import jobs, lazy, metrics  # 공통 레이어
+
+# 작업 테이블 클라이언트는 ai_tutor_common.jobs가 관리 (PREWARM 설정 시 초기화 단계에서 생성)
+lazy.prewarm(jobs.job_table)
+
+def to_json(value):
+    """
+    DynamoDB 값(Decimal 포함)을 JSON 직렬화 가능한 값으로 변환
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, set)):
+        return [to_json(item) for item in value]
+    return value
+
+def response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'no-store'
+        },
+        'body': json.dumps(body, ensure_ascii=False)
+    }
+
+@metrics.instrument_handler
+def lambda_handler(event, context):
+    """
+    문서 처리 작업 상태 조회
+
+    - 경로 파라미터 id: 작업 ID ("{folder}/{document}"를 URL 인코딩, ai_tutor_upload_document 응답의 job_id)
+      또는 쿼리 파라미터 folder_name + document_name
+    - 작업 테이블에서 키 하나만 조회 (GetItem)
+    - state: queued / parsing / saving / done / failed, 상태별 시각과 구간별 소요 시간(durations) 포함
+
+    필요한 IAM 권한:
+    - dynamodb:GetItem
+    """
+    try:
+        job_id = (event.get('pathParameters') or {}).get('id')
+        query_params = event.get('queryStringParameters') or {}
+        if job_id:
+            job_id = urllib.parse.unquote(job_id)
+        elif query_params.get('folder_name') and query_params.get('document_name'):
+            job_id = jobs.job_id(query_params['folder_name'], query_params['document_name'])
+        else:
+            return response(400, {'error': '작업 ID 또는 folder_name과 document_name이 필요합니다.'})
+
+        if not jobs.JOB_TABLE:
+            return response(501, {'error': '작업 상태 테이블(JOB_TABLE)이 설정되지 않았습니다.'})
+
+        item = jobs.get_job(job_id)
+        if item is None:
+            return response(404, {'error': f'작업 "{job_id}"를 찾을 수 없습니다.'})
+        return response(200, to_json(item))
+
+    except Exception as e:
+        error_message = f"작업 상태 조회 중 오류가 발생했습니다: {str(e)}"
+        print(error_message)
+        return response(500, {'error': error_message})
@@ -1,22 +1,55 @@
 import json
 import os
-import boto3
 from botocore.exceptions import ClientError
+from ai_tutor_common import http_cache, lazy, metrics  # 공통 레이어
 import re
 
 # 환경 변수 가져오기
 TARGET_BUCKET = os.environ.get('TARGET_BUCKET', 'target버킷')
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+CACHE_MAX_AGE = int(os.environ.get('CACHE_MAX_AGE', '5'))  # 폴링 응답 캐시 시간(초)
 
-# S3 클라이언트 초기화
-s3 = boto3.client('s3', region_name=AWS_REGION)
+# S3 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3', region_name=AWS_REGION), 's3')
 
+s3 = lazy.LazyClient(create_s3_client, 's3')
+lazy.prewarm(s3)
+
+def list_folder_objects(folder_name):
+    """
+    폴더 내의 모든 객체 조회 (페이지네이션 처리)
+    """
+    contents = []
+    list_kwargs = {
+        'Bucket': TARGET_BUCKET,
+        'Prefix': f"{folder_name}/"
+    }
+    while True:
+        response = s3.list_objects_v2(**list_kwargs)
+        contents.extend(response.get('Contents', []))
+        if not response.get('IsTruncated'):
+            break
+        list_kwargs['ContinuationToken'] = response['NextContinuationToken']
+    return contents
+
+def compute_etag(contents):
+    """
+    객체 목록(키 + S3 ETag)으로부터 강한 ETag 계산
+    - 문서 추가/삭제/재처리 시 키 또는 객체 ETag가 바뀌므로 응답도 바뀜
+    """
+    return http_cache.compute_etag(
+        [item['Key'], item.get('ETag', '')] for item in sorted(contents, key=lambda x: x['Key']))
+
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
     특정 폴더의 문서 폴더 목록 조회
     
     - 경로 파라미터에서 폴더 이름 추출
     - S3에서 해당 폴더 내의 문서 폴더 목록 조회
+    - If-None-Match가 현재 ETag와 일치하면 본문 없이 304 응답
     
     필요한 IAM 권한:
     - s3:ListBucket
@@ -38,25 +71,9 @@ def lambda_handler(event, context):
                 })
             }
         
-        # 2. 폴더 존재 여부 확인
+        # 2. 폴더 내의 모든 콘텐츠 조회 (존재 여부 확인 겸용)
         try:
-            response = s3.list_objects_v2(
-                Bucket=TARGET_BUCKET,
-                Prefix=f"{folder_name}/",
-                MaxKeys=1
-            )
-            
-            if 'Contents' not in response:
-                return {
-                    'statusCode': 404,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({
-                        'error': f'폴더 "{folder_name}"를 찾을 수 없습니다.'
-                    })
-                }
+            contents = list_folder_objects(folder_name)
         except ClientError as e:
             if e.response['Error']['Code'] == 'AccessDenied':
                 print("접근 권한 오류: s3:ListBucket 권한이 필요합니다.")
@@ -72,20 +89,43 @@ def lambda_handler(event, context):
                 }
             else:
                 raise
-        
-        # 3. 폴더 내의 모든 콘텐츠 조회
-        response = s3.list_objects_v2(
-            Bucket=TARGET_BUCKET,
-            Prefix=f"{folder_name}/"
-        )
+
+        if not contents:
+            return {
+                'statusCode': 404,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'error': f'폴더 "{folder_name}"를 찾을 수 없습니다.'
+                })
+            }
+
+        # 3. 목록 기반 ETag 비교: 변경이 없으면 문서별 GET 없이 304 응답
+        etag = compute_etag(contents)
+        cache_headers = {
+            'ETag': etag,
+            'Cache-Control': f'private, max-age={CACHE_MAX_AGE}',
+            'Access-Control-Expose-Headers': 'ETag'
+        }
+        if http_cache.etag_matches(http_cache.get_header(event, 'If-None-Match'), etag):
+            return {
+                'statusCode': 304,
+                'headers': {
+                    'Access-Control-Allow-Origin': '*',
+                    **cache_headers
+                },
+                'body': ''
+            }
         
         # 4. 문서 폴더 추출
         documents = []
         processed_documents = {}  # 처리 결과가 있는 문서 추적을 위한 딕셔너리
         
-        if 'Contents' in response:
+        if contents:
             # 첫 번째 패스: processed 폴더에서 메타데이터 파일 찾기
-            for item in response['Contents']:
+            for item in contents:
                 # processed/ 경로에서 _result.json 파일 찾기
                 if '/processed/' in item['Key'] and item['Key'].endswith('_result.json'):
                     try:
@@ -119,7 +159,7 @@ def lambda_handler(event, context):
             
             # 두 번째 패스: 모든 문서 폴더 찾기
             document_folders = set()
-            for item in response['Contents']:
+            for item in contents:
                 # 경로 패턴: {folder}/{document}/
                 if item['Key'].count('/') >= 2:
                     parts = item['Key'].split('/', 2)
@@ -153,7 +193,8 @@ def lambda_handler(event, context):
             'statusCode': 200,
             'headers': {
                 'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
+                'Access-Control-Allow-Origin': '*',
+                **cache_headers
             },
             'body': json.dumps({
                 'documents': documents,
@@ -1,62 +1,90 @@
 import json
 import os
-import boto3
-from collections import defaultdict
 from botocore.exceptions import ClientError
+from ai_tutor_common import http_cache, lazy, metrics  # 공통 레이어
 
 # 환경 변수 가져오기
-DOCS_BUCKET = os.environ['DOCS_BUCKET']
+FOLDER_STATS_TABLE = os.environ.get('FOLDER_STATS_TABLE', 'ai-tutor-folder-stats')
 AWS_REGION = os.environ['AWS_REGION']
+CACHE_MAX_AGE = int(os.environ.get('CACHE_MAX_AGE', '5'))  # 폴링 응답 캐시 시간(초)
 
-# S3 클라이언트 초기화
-s3 = boto3.client('s3', region_name=AWS_REGION)
+# DynamoDB 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_stats_table():
+    import boto3
+    dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+    return metrics.instrument_client(dynamodb.Table(FOLDER_STATS_TABLE), 'dynamodb')
 
-# 필요한 권한: s3:ListBucket (List 작업에 필요)
+stats_table = lazy.LazyClient(create_stats_table, 'dynamodb')
+lazy.prewarm(stats_table)
 
-def get_document_count(folder_name):
+# 필요한 권한: dynamodb:Scan (폴더 통계 테이블)
+
+def scan_folder_stats():
     """
-    특정 폴더의 processed/ 디렉토리에 있는 문서 수 조회
-    
+    폴더 통계 테이블 전체 조회 (페이지네이션 처리)
+
     필요한 IAM 권한:
-    - s3:ListBucket
+    - dynamodb:Scan
     """
-    try:
-        response = s3.list_objects_v2(
-            Bucket=DOCS_BUCKET,
-            Prefix=f"{folder_name}/processed/",
-            Delimiter="/"
-        )
-    except ClientError as e:
-        print(f"문서 수 조회 오류: {str(e)}")
-        return 0
-    
-    # 'Contents' 키가 있으면 파일이 존재
-    if 'Contents' in response:
-        # 첫 번째 항목은 디렉토리 자체이므로 제외 (-1)
-        return len(response['Contents']) - 1 if len(response['Contents']) > 0 else 0
-    else:
-        return 0
+    items = []
+    scan_kwargs = {
+        'ProjectionExpression': 'folder_name, description, createdAt, documentCount, pageCount'
+    }
+    while True:
+        response = stats_table.scan(**scan_kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items
+
+def to_folder_info(item):
+    """
+    DynamoDB 항목을 API 응답 형식으로 변환 (Decimal -> int)
+    """
+    folder_info = {
+        'name': item['folder_name'],
+        'documentCount': int(item.get('documentCount', 0)),
+        'pageCount': int(item.get('pageCount', 0))
+    }
+    if item.get('description'):
+        folder_info['description'] = item['description']
+    if item.get('createdAt'):
+        folder_info['createdAt'] = item['createdAt']
+    return folder_info
 
+def compute_etag(items):
+    """
+    폴더 통계 항목으로부터 강한 ETag 계산
+    - 응답 본문이 아닌 원본 상태(통계 행)를 기준으로 계산하므로
+      변경이 없으면 응답 직렬화 없이 304를 반환할 수 있음
+    """
+    return http_cache.compute_etag([
+        item['folder_name'],
+        str(item.get('documentCount', 0)),
+        str(item.get('pageCount', 0)),
+        item.get('description', ''),
+        item.get('createdAt', '')
+    ] for item in sorted(items, key=lambda x: x['folder_name']))
+
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
-    S3에서 모든 폴더(주제) 목록 조회
-    
-    - S3의 최상위 디렉토리 목록 조회
-    - 각 폴더의 문서 수 계산
-    
+    폴더 통계 테이블에서 모든 폴더(주제) 목록 조회
+
+    - 폴더 수/문서 수는 ai_tutor_create_folder, ai_tutor_process_document가 기록
+    - 버킷의 객체 수와 무관하게 한 번의 Scan으로 응답
+    - If-None-Match가 현재 ETag와 일치하면 본문 없이 304 응답
+
     필요한 IAM 권한:
-    - s3:ListBucket
+    - dynamodb:Scan
     """
     try:
-        # S3에서 최상위 '폴더' 목록 조회 (구분자 '/' 사용)
         try:
-            response = s3.list_objects_v2(
-                Bucket=DOCS_BUCKET,
-                Delimiter='/'
-            )
+            items = scan_folder_stats()
         except ClientError as e:
-            if e.response['Error']['Code'] == 'AccessDenied':
-                print("접근 권한 오류: s3:ListBucket 권한이 필요합니다.")
+            if e.response['Error']['Code'] == 'AccessDeniedException':
+                print("접근 권한 오류: dynamodb:Scan 권한이 필요합니다.")
                 return {
                     'statusCode': 403,
                     'headers': {
@@ -64,71 +92,49 @@ def lambda_handler(event, context):
                         'Access-Control-Allow-Origin': '*'
                     },
                     'body': json.dumps({
-                        'error': 'S3 버킷 접근 권한이 없습니다. 필요한 권한: s3:ListBucket'
+                        'error': '폴더 통계 테이블 접근 권한이 없습니다. 필요한 권한: dynamodb:Scan'
                     })
                 }
             else:
                 raise
-        
-        folders = []
-        
-        # CommonPrefixes에는 구분자로 끝나는 접두사(즉, 폴더)가 포함됨
-        if 'CommonPrefixes' in response:
-            for prefix in response['CommonPrefixes']:
-                folder_prefix = prefix['Prefix']
-                # 마지막 '/' 제거하여 폴더 이름 추출
-                folder_name = folder_prefix.rstrip('/')
-                
-                # 문서 수 조회
-                document_count = get_document_count(folder_name)
-                
-                # 폴더 정보 생성
-                folder_info = {
-                    'name': folder_name,
-                    'documentCount': document_count
-                }
-                
-                # 추가 메타데이터 조회 시도 (향후 확장성 고려)
-                try:
-                    meta_response = s3.list_objects_v2(
-                        Bucket=DOCS_BUCKET,
-                        Prefix=f"{folder_name}/metadata.json"
-                    )
-                    
-                    if 'Contents' in meta_response and len(meta_response['Contents']) > 0:
-                        metadata_obj = s3.get_object(
-                            Bucket=DOCS_BUCKET, 
-                            Key=f"{folder_name}/metadata.json"
-                        )
-                        metadata = json.loads(metadata_obj['Body'].read().decode('utf-8'))
-                        
-                        # 메타데이터에서 설명 추출
-                        if 'description' in metadata:
-                            folder_info['description'] = metadata['description']
-                        if 'createdAt' in metadata:
-                            folder_info['createdAt'] = metadata['createdAt']
-                except Exception as e:
-                    # 메타데이터 파일이 없거나 읽을 수 없는 경우 무시
-                    print(f"메타데이터 조회 오류 (무시됨): {str(e)}")
-                
-                folders.append(folder_info)
-        
+
+        etag = compute_etag(items)
+        cache_headers = {
+            'ETag': etag,
+            'Cache-Control': f'private, max-age={CACHE_MAX_AGE}',
+            'Access-Control-Expose-Headers': 'ETag'
+        }
+
+        # 변경 없음: 본문 없이 304 응답
+        if http_cache.etag_matches(http_cache.get_header(event, 'If-None-Match'), etag):
+            return {
+                'statusCode': 304,
+                'headers': {
+                    'Access-Control-Allow-Origin': '*',
+                    **cache_headers
+                },
+                'body': ''
+            }
+
+        folders = [to_folder_info(item) for item in items]
+
         # 문서 수 기준 내림차순 정렬 (선택적)
         folders.sort(key=lambda x: x['documentCount'], reverse=True)
-        
+
         # 성공 응답
         return {
             'statusCode': 200,
             'headers': {
                 'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
+                'Access-Control-Allow-Origin': '*',
+                **cache_headers
             },
             'body': json.dumps({
                 'folders': folders,
                 'count': len(folders)
             })
         }
-    
+
     except Exception as e:
         # 오류 응답
         print(f"Error listing folders: {str(e)}")
@@ -1,58 +1,878 @@
 import json
 import os
-import boto3
-import requests
+import hashlib
+import math
+import re
+import tempfile
+import textwrap
+import time
 import urllib.parse
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
+from ai_tutor_common import jobs, lazy, metrics, scheduler, search_index  # 공통 레이어
 
 # 환경 변수 가져오기
 SOURCE_BUCKET = os.environ.get('SOURCE_BUCKET', 'source 버킷')  # 처리 대기 버킷
 TARGET_BUCKET = os.environ.get('TARGET_BUCKET', 'target버킷')  # 대상 버킷
 UPSTAGE_API_ENDPOINT = os.environ.get('UPSTAGE_API_ENDPOINT', 'https://api.upstage.ai/v1/document-digitization')
 UPSTAGE_API_KEY = os.environ.get('UPSTAGE_API_KEY', 'api-key')
+UPSTAGE_ASYNC_ENDPOINT = os.environ.get('UPSTAGE_ASYNC_ENDPOINT', f"{UPSTAGE_API_ENDPOINT}/async")  # 대용량 문서용 비동기 파싱
+UPSTAGE_REQUESTS_ENDPOINT = os.environ.get('UPSTAGE_REQUESTS_ENDPOINT', f"{UPSTAGE_API_ENDPOINT}/requests")  # 비동기 요청 상태 조회
+FOLDER_STATS_TABLE = os.environ.get('FOLDER_STATS_TABLE', 'ai-tutor-folder-stats')
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+INCREMENTAL_PROCESSING = os.environ.get('INCREMENTAL_PROCESSING', 'true').lower() == 'true'  # 변경된 페이지만 재처리
+RESULT_PART_SIZE = max(int(os.environ.get('RESULT_PART_SIZE', str(8 * 1024 * 1024))), 5 * 1024 * 1024)  # 결과 업로드 파트 크기 (S3 최소 5MB)
+STREAM_READ_SIZE = 1024 * 1024  # Upstage 응답 / 이전 결과를 읽는 단위
+STRIP_BOILERPLATE = os.environ.get('STRIP_BOILERPLATE', 'true').lower() == 'true'  # 페이지마다 반복되는 요소 제거
+BOILERPLATE_MIN_RATIO = float(os.environ.get('BOILERPLATE_MIN_RATIO', '0.5'))  # 전체 페이지 중 이 비율 이상에 나오면 반복 요소
+BOILERPLATE_MIN_PAGES = int(os.environ.get('BOILERPLATE_MIN_PAGES', '3'))  # 반복 요소로 보는 최소 페이지 수
+ENABLE_PAGE_DIGESTS = os.environ.get('ENABLE_PAGE_DIGESTS', 'false').lower() == 'true'  # 페이지별 요약(digest) 생성 단계
+DIGEST_MODEL = os.environ.get('DIGEST_MODEL', 'solar-pro')
+DIGEST_BATCH_PAGES = int(os.environ.get('DIGEST_BATCH_PAGES', '20'))  # LLM 호출 한 번에 묶는 최대 페이지 수
+DIGEST_BATCH_CHARS = int(os.environ.get('DIGEST_BATCH_CHARS', '24000'))  # LLM 호출 한 번에 보내는 최대 본문 길이
+DIGEST_PAGE_CHARS = int(os.environ.get('DIGEST_PAGE_CHARS', '4000'))  # 페이지당 최대 본문 길이 (초과분은 잘라냄)
+DIGEST_CONCURRENCY = int(os.environ.get('DIGEST_CONCURRENCY', '4'))  # 동시에 보내는 digest 요청 수
+DIGEST_MAX_WAIT = float(os.environ.get('DIGEST_MAX_WAIT', '30'))  # 공유 LLM 한도가 부족할 때 묶음당 최대 대기(초)
+ENABLE_SEARCH_INDEX = os.environ.get('ENABLE_SEARCH_INDEX', 'true').lower() == 'true'  # 폴더 검색 색인 갱신 (ai_tutor_search)
+SEARCH_INDEX_MAX_ATTEMPTS = 5  # 다른 문서 처리와 동시에 색인을 갱신해 조건부 쓰기가 실패한 경우 재시도 횟수
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))  # 처리 큐 메시지 최대 처리 횟수 (큐의 maxReceiveCount와 같게 설정)
+QUEUE_TIME_MARGIN_MS = 3 * 60 * 1000  # 문서 하나를 처리하기에 남은 실행 시간이 부족하다고 보는 기준
+PREFLIGHT_RANGE_BYTES = 1024  # 사전 검사에서 읽는 파일 앞/뒤 크기 (PDF 헤더는 앞 1024바이트, %%EOF는 끝 1024바이트 안에 있어야 함)
+TEXT_LAYER_SAMPLE_PAGES = int(os.environ.get('TEXT_LAYER_SAMPLE_PAGES', '10'))  # 텍스트 레이어 확인에 표본으로 보는 페이지 수
+SYNC_PARSE_MAX_PAGES = int(os.environ.get('SYNC_PARSE_MAX_PAGES', '100'))  # 이보다 많은 페이지는 비동기 API로 파싱
+SYNC_PARSE_MAX_BYTES = int(os.environ.get('SYNC_PARSE_MAX_BYTES', str(50 * 1024 * 1024)))  # 이보다 큰 파일은 비동기 API로 파싱
+ASYNC_POLL_SECONDS = float(os.environ.get('ASYNC_POLL_SECONDS', '5'))  # 비동기 파싱 상태 조회 간격
+ASYNC_MAX_WAIT = float(os.environ.get('ASYNC_MAX_WAIT', '600'))  # 비동기 파싱 완료를 기다리는 최대 시간(초)
 
-# S3 클라이언트 초기화
-s3_client = boto3.client('s3', region_name=AWS_REGION)
+# S3 / DynamoDB 클라이언트, requests 모듈 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3', region_name=AWS_REGION), 's3')
 
-def transform_result(api_result, folder_name, document_name, original_filename):
+def create_stats_table():
+    import boto3
+    dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+    return metrics.instrument_client(dynamodb.Table(FOLDER_STATS_TABLE), 'dynamodb')
+
+def create_llm_client():
+    from openai import OpenAI  # openai 패키지 (openai==1.52.2), ENABLE_PAGE_DIGESTS 사용 시에만 필요
+    return metrics.instrument_llm_client(OpenAI(
+        api_key=UPSTAGE_API_KEY,
+        base_url=os.environ.get('OPENAI_BASE_URL', 'https://api.upstage.ai/v1')
+    ))
+
+s3_client = lazy.LazyClient(create_s3_client, 's3')
+stats_table = lazy.LazyClient(create_stats_table, 'dynamodb')
+llm_client = lazy.LazyClient(create_llm_client, 'openai')
+requests = lazy.LazyModule('requests')
+lazy.prewarm(s3_client, stats_table, requests, *([llm_client] if ENABLE_PAGE_DIGESTS else []))
+
+class PageSpool:
     """
-    Upstage API 응답을 변환하고 메타데이터를 추가합니다.
+    페이지별 요소 목록을 /tmp 임시 파일에 기록하고 페이지 번호로 다시 읽는 저장소
+    - 메모리에는 페이지별 (오프셋, 길이) 색인만 유지하므로 페이지 수가 늘어도 메모리 사용량이 거의 일정
     """
-    pages_dict = {}
-    for element in api_result.get("elements", []):
-        page_num = element.get("page", 1)
-        category = element.get("category", "unknown")
-        markdown = element.get("content", {}).get("markdown", "")
-        
-        if page_num not in pages_dict:
-            pages_dict[page_num] = []
-        pages_dict[page_num].append({
-            "category": category,
-            "markdown": markdown
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.index = {}
+
+    def append(self, page_number, contents):
+        data = json.dumps(contents, ensure_ascii=False).encode('utf-8')
+        self.file.seek(0, os.SEEK_END)
+        self.index.setdefault(page_number, []).append((self.file.tell(), len(data)))
+        self.file.write(data)
+
+    def page_numbers(self):
+        return sorted(self.index)
+
+    def read(self, page_number):
+        contents = []
+        for offset, length in self.index.get(page_number, []):
+            self.file.seek(offset)
+            contents.extend(json.loads(self.file.read(length)))
+        return contents
+
+    def close(self):
+        self.file.close()
+
+class S3StreamingWriter:
+    """
+    S3 객체를 파트 단위로 업로드하는 쓰기 전용 스트림
+    - RESULT_PART_SIZE만큼 모일 때마다 upload_part (멀티파트 업로드)
+    - 전체 크기가 파트 하나 이하이면 put_object 한 번으로 저장
+    """
+
+    def __init__(self, bucket_name, key, content_type, metadata=None, part_size=None):
+        self.bucket_name = bucket_name
+        self.key = key
+        self.content_type = content_type
+        self.metadata = metadata or {}
+        self.part_size = part_size or RESULT_PART_SIZE
+        self.buffer = bytearray()
+        self.parts = []
+        self.upload_id = None
+        self.size = 0
+
+    def write(self, text):
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        self.buffer += data
+        self.size += len(data)
+        if len(self.buffer) >= self.part_size:
+            self.upload_part()
+
+    def upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = s3_client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                ContentType=self.content_type,
+                Metadata=self.metadata
+            )['UploadId']
+        part_number = len(self.parts) + 1
+        response = s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=bytes(self.buffer)
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self.buffer = bytearray()
+
+    def close(self):
+        if self.upload_id is None:
+            s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                Body=bytes(self.buffer),
+                ContentType=self.content_type,
+                Metadata=self.metadata
+            )
+            return
+        if self.buffer:
+            self.upload_part()
+        s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self):
+        if self.upload_id is not None:
+            s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id)
+
+def iter_json_values(stream, prefixes):
+    """
+    JSON 스트림에서 지정한 경로(ijson 접두사, 예: 'usage.pages', 'elements.item')의 값을 문서 순서대로 반환
+    - ijson이 있으면 STREAM_READ_SIZE씩 읽으며 완성된 값 하나씩만 메모리에 올림
+    - ijson이 없으면 json.load로 전체를 읽은 뒤 같은 값을 반환 (메모리 사용량이 응답 크기에 비례)
+    반환값: (접두사, 값) 생성기
+    """
+    try:
+        import ijson
+    except ImportError:
+        document = json.load(stream)
+        for prefix in prefixes:
+            for value in walk_json(document, prefix.split('.')):
+                yield prefix, value
+        return
+
+    builder, builder_prefix = None, None
+    for prefix, event, value in ijson.parse(stream, buf_size=STREAM_READ_SIZE):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == builder_prefix and event in ('end_map', 'end_array'):
+                yield builder_prefix, builder.value
+                builder, builder_prefix = None, None
+        elif prefix in prefixes:
+            if event in ('start_map', 'start_array'):
+                builder, builder_prefix = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+            elif event != 'map_key':
+                yield prefix, value
+
+def walk_json(value, path):
+    if not path:
+        yield value
+    elif path[0] == 'item' and isinstance(value, list):
+        for item in value:
+            yield from walk_json(item, path[1:])
+    elif isinstance(value, dict) and path[0] in value:
+        yield from walk_json(value[path[0]], path[1:])
+
+def spool_upstage_result(stream, spool, first_page=1):
+    """
+    Upstage API 응답을 스트리밍으로 읽어 elements를 페이지별로 spool에 기록
+    (응답 전체, 페이지별 재구성 결과를 메모리에 동시에 두지 않음)
+    first_page: 비동기 파싱 묶음의 시작 페이지 (묶음 안의 페이지 번호가 1부터 시작하면 문서 기준 번호로 보정)
+    반환값: {'api': ..., 'model': ..., 'total_pages': ...}
+    """
+    info = {}
+    page_number, page_contents = None, []
+    page_offset = None
+    for prefix, value in iter_json_values(stream, ('api', 'model', 'usage.pages', 'elements.item')):
+        if prefix != 'elements.item':
+            info['total_pages' if prefix == 'usage.pages' else prefix] = int(value) if prefix == 'usage.pages' else value
+            continue
+        element_page = int(value.get("page", 1))
+        if page_offset is None:
+            page_offset = first_page - 1 if element_page < first_page else 0
+        element_page += page_offset
+        if element_page != page_number and page_contents:
+            spool.append(page_number, page_contents)
+            page_contents = []
+        page_number = element_page
+        page_contents.append({
+            "category": value.get("category", "unknown"),
+            "markdown": value.get("content", {}).get("markdown", "")
         })
-    
-    pages = [{"page": k, "contents": v} for k, v in sorted(pages_dict.items())]
-    
-    created_at = datetime.datetime.utcnow().isoformat()
-    final_structure = {
-        "folder_name": folder_name,
-        "document_name": document_name,
-        "original_filename": original_filename,
-        "created_at": created_at,
-        "metadata": {
-            "api_version": api_result.get("api"),
-            "model": api_result.get("model"),
-            "total_pages": api_result.get("usage", {}).get("pages"),
-            "file_type": "application/pdf",
-            "indexed": False,
-            "last_updated": created_at
-        },
-        "pages": pages
+    if page_contents:
+        spool.append(page_number, page_contents)
+    return info
+
+def spool_previous_pages(folder_name, document_name, page_numbers, spool):
+    """
+    이전 처리 결과에서 재사용할 페이지만 스트리밍으로 읽어 spool에 기록
+    반환값: (이전 결과의 created_at, 이전 결과에서 제거된 반복 요소 목록, 이전 결과의 metadata)
+    """
+    response = s3_client.get_object(
+        Bucket=TARGET_BUCKET,
+        Key=f"{folder_name}/{document_name}/processed/{document_name}_result.json"
+    )
+    created_at = None
+    boilerplate = []
+    metadata = {}
+    for prefix, value in iter_json_values(response['Body'], ('created_at', 'pages.item', 'boilerplate.item', 'metadata')):
+        if prefix == 'created_at':
+            created_at = value
+        elif prefix == 'boilerplate.item':
+            boilerplate.append(value)
+        elif prefix == 'metadata':
+            metadata = value
+        elif int(value.get("page", 0)) in page_numbers:
+            spool.append(int(value["page"]), value.get("contents", []))
+    return created_at, boilerplate, metadata
+
+DIGITS_PATTERN = re.compile(r'\d+')
+
+class BoilerplateFilter:
+    """
+    여러 페이지에 반복되는 요소(머리글, 바닥글, 과목명, 저작권 문구 등)를 페이지에서 제거하고 문서 단위 필드로 옮김
+    - (category, 정규화한 텍스트)가 같은 요소를 같은 요소로 보고 등장한 페이지 수를 셈 (1차: count)
+    - BOILERPLATE_MIN_PAGES 이상, 전체 페이지의 BOILERPLATE_MIN_RATIO 이상에 나오면 반복 요소 (finalize)
+    - 결과를 쓰면서 반복 요소를 제거하고 제거한 페이지를 기록 (2차: strip)
+    머리글/바닥글은 숫자를 무시하고 비교 (페이지 번호가 들어 있어도 같은 요소)
+    """
+
+    NUMBERED_CATEGORIES = ('header', 'footer')
+
+    def __init__(self):
+        self.counts = {}  # {요소 키: [마지막으로 센 페이지, 페이지 수]}
+        self.keys = set()
+        self.entries = {}  # {요소 키: {'category', 'markdown', 'pages'}}
+
+    def element_key(self, category, markdown):
+        text = ' '.join((markdown or '').split()).lower()
+        if category in self.NUMBERED_CATEGORIES:
+            text = DIGITS_PATTERN.sub('#', text)
+        if not text:
+            return None
+        return hashlib.sha1(f"{category}\x00{text}".encode('utf-8')).digest()[:12]
+
+    def count(self, page_number, contents):
+        for item in contents:
+            key = self.element_key(item.get("category"), item.get("markdown"))
+            if key is None:
+                continue
+            counted = self.counts.get(key)
+            if counted is None:
+                self.counts[key] = [page_number, 1]
+            elif counted[0] != page_number:
+                counted[0] = page_number
+                counted[1] += 1
+
+    def carry_over(self, previous_entries, reused_pages):
+        """
+        이전 결과에서 이미 제거된 반복 요소를 재사용 페이지({새 페이지 번호: 이전 페이지 번호})에 등장한 것으로 셈
+        (재사용 페이지는 제거된 상태 그대로 사용)
+        """
+        new_pages = {}
+        for page_number, previous_page in reused_pages.items():
+            new_pages.setdefault(previous_page, []).append(page_number)
+        for entry in previous_entries:
+            key = self.element_key(entry.get("category"), entry.get("markdown"))
+            pages = [page_number for previous_page in entry.get("pages", []) for page_number in new_pages.get(previous_page, [])]
+            if key is None or not pages:
+                continue
+            self.entries[key] = {"category": entry.get("category"), "markdown": entry.get("markdown", ""), "pages": pages}
+            self.counts.setdefault(key, [0, 0])[1] += len(pages)
+
+    def finalize(self, page_count):
+        threshold = max(BOILERPLATE_MIN_PAGES, math.ceil(page_count * BOILERPLATE_MIN_RATIO))
+        self.keys = {key for key, (_, pages) in self.counts.items() if pages >= threshold} | set(self.entries)
+        self.counts = {}
+        return len(self.keys)
+
+    def strip(self, page_number, contents, record=True):
+        """
+        반복 요소를 뺀 요소 목록 (record가 True면 제거한 페이지를 문서 단위 필드에 기록)
+        """
+        if not self.keys:
+            return contents
+        kept = []
+        for item in contents:
+            key = self.element_key(item.get("category"), item.get("markdown"))
+            if key not in self.keys:
+                kept.append(item)
+                continue
+            if record:
+                entry = self.entries.setdefault(key, {
+                    "category": item.get("category"), "markdown": item.get("markdown", ""), "pages": []
+                })
+                entry["pages"].append(page_number)
+        return kept
+
+    def document_field(self):
+        """
+        문서 단위 boilerplate 필드: [{'category', 'markdown', 'pages'}] (처음 등장한 페이지 순)
+        """
+        entries = [{**entry, "pages": sorted(set(entry["pages"]))} for entry in self.entries.values() if entry["pages"]]
+        return sorted(entries, key=lambda entry: (entry["pages"][0], entry["category"] or ''))
+
+    def report(self, document_field):
+        """
+        제거로 줄어든 결과 JSON 크기와 LLM 입력 토큰 추정치 (문서 단위 필드에 한 번 남는 분량은 차감)
+        """
+        removed_bytes = removed_chars = field_chars = elements = 0
+        for entry in document_field:
+            element_bytes = len(json.dumps({"category": entry["category"], "markdown": entry["markdown"]},
+                                           ensure_ascii=False).encode('utf-8'))
+            removed_bytes += element_bytes * len(entry["pages"])
+            removed_chars += len(entry["markdown"]) * len(entry["pages"])
+            field_chars += len(entry["markdown"])
+            elements += len(entry["pages"])
+        field_bytes = len(json.dumps(document_field, ensure_ascii=False).encode('utf-8'))
+        return {
+            "elements_removed": elements,
+            "bytes_saved": max(0, removed_bytes - field_bytes),
+            "estimated_tokens_saved": max(0, removed_chars - field_chars) // 3  # 3자당 1토큰으로 어림
+        }
+
+def write_result_json(writer, header, pages, metadata, boilerplate=None):
+    """
+    처리 결과 JSON을 페이지 단위로 직렬화하여 writer에 기록 (json.dumps(..., indent=2)와 같은 형식)
+    pages: (페이지 번호, 요소 목록) 생성기
+    boilerplate: 페이지를 모두 쓴 뒤 문서 단위 반복 요소 필드와 metadata.boilerplate_report를 기록할 BoilerplateFilter
+    """
+    writer.write('{\n')
+    for key, value in header.items():
+        writer.write(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n')
+    writer.write('  "pages": [')
+    written = 0
+    for page_number, contents in pages:
+        page_json = json.dumps({"page": page_number, "contents": contents}, ensure_ascii=False, indent=2)
+        writer.write((',\n' if written else '\n') + textwrap.indent(page_json, '    '))
+        written += 1
+    writer.write('\n  ],\n' if written else '],\n')
+    if boilerplate is not None:
+        document_field = boilerplate.document_field()
+        metadata["boilerplate_report"] = boilerplate.report(document_field)
+        writer.write('  "boilerplate": ' + json.dumps(document_field, ensure_ascii=False, indent=2).replace('\n', '\n  ') + ',\n')
+    writer.write('  "metadata": ' + json.dumps(metadata, ensure_ascii=False, indent=2).replace('\n', '\n  ') + '\n}')
+    return written
+
+def page_fingerprint(page):
+    """
+    PDF 페이지 하나의 내용 해시 (콘텐츠 스트림, 이미지 등 XObject, 페이지 크기/회전)
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([float(value) for value in page.mediabox]).encode())
+    digest.update(str(page.get('/Rotate', 0)).encode())
+
+    contents = page.get('/Contents')
+    if contents is not None:
+        contents = contents.get_object()
+        for stream in (contents if isinstance(contents, list) else [contents]):
+            digest.update(stream.get_object().get_data())
+
+    resources = page.get('/Resources')
+    xobjects = resources.get_object().get('/XObject') if resources is not None else None
+    if xobjects is not None:
+        xobjects = xobjects.get_object()
+        for name in sorted(xobjects):
+            digest.update(name.encode())
+            digest.update(xobjects[name].get_object().get_data())
+    return digest.hexdigest()
+
+def compute_page_hashes(reader):
+    """
+    원본 PDF의 페이지별 해시 목록
+    PDF를 읽지 못했거나(reader가 None) 해시를 계산할 수 없으면 None (전체 재처리)
+    """
+    if reader is None:
+        return None
+    try:
+        return [page_fingerprint(page) for page in reader.pages]
+    except Exception as e:
+        print(f"페이지 해시 계산 실패 (전체 문서 처리): {str(e)}")
+        return None
+
+FILE_SIGNATURES = (  # PDF가 아닌 파일의 형식 표시용
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+    (b'PK\x03\x04', 'application/zip'),  # docx / pptx / xlsx 포함
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),  # doc / ppt / hwp
+)
+PDF_VERSION_PATTERN = re.compile(rb'%PDF-(\d\.\d)')
+
+def detect_file_type(head):
+    """
+    파일 앞부분으로 형식 판별 (PDF 헤더는 앞 1024바이트 안 어디에 있어도 허용)
+    """
+    if b'%PDF-' in head:
+        return 'application/pdf'
+    for signature, file_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return file_type
+    return 'application/octet-stream'
+
+def read_object_range(bucket_name, key, byte_range):
+    """
+    객체 일부 조회 (Range GET)
+    반환값: (데이터, 전체 객체 크기)
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=key, Range=byte_range)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'InvalidRange':  # 빈 객체
+            return b'', 0
+        raise
+    data = response['Body'].read()
+    content_range = response.get('ContentRange') or ''
+    total_size = int(content_range.rsplit('/', 1)[-1]) if '/' in content_range else len(data)
+    return data, total_size
+
+def preflight_source(bucket_name, key):
+    """
+    다운로드 전 사전 검사: 파일 앞/뒤 PREFLIGHT_RANGE_BYTES만 읽어 형식과 잘림 여부 확인
+    반환값: (검사 결과, 오류 메시지) - 오류 메시지가 있으면 처리하지 않고 거부
+    """
+    head, size = read_object_range(bucket_name, key, f"bytes=0-{PREFLIGHT_RANGE_BYTES - 1}")
+    if size == 0:
+        return None, "빈 파일입니다."
+    file_type = detect_file_type(head)
+    if file_type != 'application/pdf':
+        return None, f"PDF 파일이 아닙니다. (감지된 형식: {file_type})"
+
+    tail = head if size <= PREFLIGHT_RANGE_BYTES else \
+        read_object_range(bucket_name, key, f"bytes=-{PREFLIGHT_RANGE_BYTES}")[0]
+    if b'%%EOF' not in tail:
+        return None, "PDF 끝 표시(%%EOF)가 없습니다. 업로드가 중간에 끊겼거나 손상된 파일입니다."
+
+    version = PDF_VERSION_PATTERN.search(head)
+    return {
+        "file_type": file_type,
+        "pdf_version": version.group(1).decode() if version else None,
+        "size": size,
+        "encrypted": b'/Encrypt' in tail or b'/Encrypt' in head  # 트레일러 기준 추정 (open_pdf에서 확정)
+    }, None
+
+def open_pdf(pdf_path):
+    """
+    PDF 열기 (암호가 걸려 있으면 빈 암호로 해제 시도)
+    반환값: (PdfReader, 오류 메시지) - pypdf가 없으면 (None, None)
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        print("pypdf 미설치: 페이지 해시 / 페이지 구조 검사 없이 전체 문서를 처리합니다.")
+        return None, None
+    try:
+        reader = PdfReader(pdf_path)
+        if reader.is_encrypted:
+            try:
+                decrypted = reader.decrypt('')
+            except Exception as e:  # 암호화 방식에 필요한 라이브러리 없음 등: 판단하지 않고 API에 맡김
+                print(f"암호화된 PDF 해제 확인 불가 (검사 생략): {str(e)}")
+                return None, None
+            if not decrypted:
+                return None, "암호로 보호된 PDF입니다. 암호를 해제한 뒤 다시 업로드해 주세요."
+        if len(reader.pages) == 0:
+            return None, "페이지가 없는 PDF입니다."
+        return reader, None
+    except Exception as e:
+        return None, f"PDF 구조를 읽을 수 없습니다 (손상된 파일): {str(e)}"
+
+def page_has_text_layer(page):
+    """
+    페이지에 글꼴 리소스가 있는지 (페이지 또는 폼 XObject) - 스캔 이미지만 있는 페이지는 글꼴이 없음
+    """
+    resources = page.get('/Resources')
+    resources = resources.get_object() if resources is not None else {}
+    if resources.get('/Font'):
+        return True
+    xobjects = resources.get('/XObject')
+    for xobject in (xobjects.get_object().values() if xobjects is not None else []):
+        xobject = xobject.get_object()
+        form_resources = xobject.get('/Resources') if xobject.get('/Subtype') == '/Form' else None
+        if form_resources is not None and form_resources.get_object().get('/Font'):
+            return True
+    return False
+
+def inspect_pdf(reader):
+    """
+    페이지 구조 검사: 페이지 수, 암호화 여부, 텍스트 레이어 (페이지 TEXT_LAYER_SAMPLE_PAGES개를 고르게 표본 조사)
+    반환값: {'page_count', 'encrypted', 'text_layer': 'all' | 'partial' | 'none', 'ocr'}
+    """
+    page_count = len(reader.pages)
+    sample_size = max(1, min(TEXT_LAYER_SAMPLE_PAGES, page_count))
+    sample = sorted({index * (page_count - 1) // max(sample_size - 1, 1) for index in range(sample_size)})
+    with_text = sum(1 for index in sample if page_has_text_layer(reader.pages[index]))
+    text_layer = 'all' if with_text == len(sample) else ('none' if with_text == 0 else 'partial')
+    return {
+        "page_count": page_count,
+        "encrypted": bool(reader.is_encrypted),
+        "text_layer": text_layer,
+        # 텍스트 레이어가 없는 스캔 문서는 전체 OCR, 그 외에는 API가 이미지 영역에만 OCR 적용
+        "ocr": "force" if text_layer == 'none' else "auto"
     }
-    
-    return final_structure
+
+def parse_document_async(headers, files, data, spool, parse_span):
+    """
+    대용량 문서를 Upstage 비동기 API로 파싱
+    - 요청 후 ASYNC_POLL_SECONDS마다 상태 확인, 완료되면 묶음(batch)별 결과를 스트리밍으로 받아 spool에 기록
+    반환값: {'api': ..., 'model': ..., 'total_pages': ...} (실패 / ASYNC_MAX_WAIT 초과 시 예외)
+    """
+    response = requests.post(UPSTAGE_ASYNC_ENDPOINT, headers=headers, files=files, data=data)
+    if response.status_code >= 300:
+        raise RuntimeError(f"비동기 파싱 요청 오류: 상태 코드 {response.status_code}, 응답: {response.text}")
+    request_id = response.json()["request_id"]
+    print(f"Upstage 비동기 파싱 요청: {request_id}")
+
+    deadline = time.monotonic() + ASYNC_MAX_WAIT
+    while True:
+        status_response = requests.get(f"{UPSTAGE_REQUESTS_ENDPOINT}/{request_id}", headers=headers)
+        if status_response.status_code != 200:
+            raise RuntimeError(f"비동기 파싱 상태 조회 오류: 상태 코드 {status_response.status_code}")
+        status = status_response.json()
+        if status.get("status") == "completed":
+            break
+        if status.get("status") == "failed":
+            raise RuntimeError(f"비동기 파싱 실패: {status.get('failure_message')}")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"비동기 파싱 대기 시간 초과 ({ASYNC_MAX_WAIT}초, {status.get('completed_pages')}/"
+                               f"{status.get('total_pages')}페이지 완료)")
+        time.sleep(ASYNC_POLL_SECONDS)
+
+    info = {"total_pages": status.get("total_pages")}
+    for batch in sorted(status.get("batches", []), key=lambda item: item.get("start_page", 0)):
+        if batch.get("status") == "failed":
+            raise RuntimeError(f"비동기 파싱 묶음 실패 ({batch.get('start_page')}-{batch.get('end_page')}페이지): "
+                               f"{batch.get('failure_message')}")
+        # download_url은 미리 서명된 URL이므로 인증 헤더 없이 요청
+        with requests.get(batch["download_url"], stream=True) as batch_response:
+            if batch_response.status_code != 200:
+                raise RuntimeError(f"비동기 파싱 결과 다운로드 오류: 상태 코드 {batch_response.status_code}")
+            batch_response.raw.decode_content = True
+            batch_info = spool_upstage_result(batch_response.raw, spool, batch.get("start_page", 1))
+            parse_span.add_bytes(bytes_in=batch_response.raw.tell())
+        for name in ("api", "model"):
+            info.setdefault(name, batch_info.get(name))
+    info["total_pages"] = info["total_pages"] or len(spool.page_numbers())
+    return info
+
+def read_json_object(bucket_name, key):
+    """
+    S3 JSON 객체 조회 (없으면 None)
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return json.loads(response['Body'].read().decode('utf-8'))
+
+def load_previous_hashes(folder_name, document_name):
+    """
+    같은 문서의 이전 페이지 해시 조회
+    반환값: 이전 페이지 해시 목록 (이전 처리 결과나 해시가 없으면 None)
+    """
+    processed_prefix = f"{folder_name}/{document_name}/processed/{document_name}"
+    page_hashes = read_json_object(TARGET_BUCKET, f"{processed_prefix}_pages.json")
+    if not page_hashes or not page_hashes.get('pages'):
+        return None
+    try:
+        s3_client.head_object(Bucket=TARGET_BUCKET, Key=f"{processed_prefix}_result.json")
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return page_hashes['pages']
+
+def plan_page_changes(page_hashes, previous_hashes):
+    """
+    새 PDF의 각 페이지를 이전 페이지 해시와 비교
+    - 같은 해시의 페이지가 이전 문서에 있으면 그 결과를 재사용 (페이지 삽입/삭제로 번호가 밀려도 재사용)
+    반환값: (재처리할 페이지 번호 목록, {새 페이지 번호: 재사용할 이전 페이지 번호})
+    """
+    previous_pages = {}
+    for page_number, page_hash in enumerate(previous_hashes, start=1):
+        previous_pages.setdefault(page_hash, page_number)
+
+    changed_pages = []
+    reused_pages = {}
+    for page_number, page_hash in enumerate(page_hashes, start=1):
+        if page_hash in previous_pages:
+            reused_pages[page_number] = previous_pages[page_hash]
+        else:
+            changed_pages.append(page_number)
+    return changed_pages, reused_pages
+
+def build_partial_pdf(reader, page_numbers, output_path):
+    """
+    지정한 페이지만 담은 PDF 생성 (Upstage 파싱 대상 축소)
+    reader: 사전 검사에서 연 PdfReader (파일을 다시 읽지 않음)
+    """
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for page_number in page_numbers:
+        writer.add_page(reader.pages[page_number - 1])
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+    return output_path
+
+DIGEST_PROMPT = (
+    "You are helping students review lecture material.\n"
+    "For each page below, write a digest of at most 3 sentences that keeps the definitions, formulas and facts "
+    "a student would need, and list up to 8 keywords (terms that appear on the page).\n"
+    "Write in the same language as the page. Skip pages that contain no meaningful content.\n"
+    "Respond with JSON only, in this format:\n"
+    '{"pages": [{"page": <page number>, "digest": "<digest>", "keywords": ["<keyword>", ...]}]}\n'
+)
+
+def page_text(contents, limit=None):
+    """
+    페이지 요소 목록의 markdown을 이어 붙인 본문 (limit 글자까지)
+    """
+    text = "\n".join(item.get("markdown", "") for item in contents if item.get("markdown"))
+    return text[:limit] if limit else text
+
+def batch_digest_pages(pages):
+    """
+    (페이지 번호, 본문) 목록을 DIGEST_BATCH_PAGES / DIGEST_BATCH_CHARS 한도로 묶음
+    """
+    batches, batch, batch_chars = [], [], 0
+    for page_number, text in pages:
+        if batch and (len(batch) >= DIGEST_BATCH_PAGES or batch_chars + len(text) > DIGEST_BATCH_CHARS):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append((page_number, text))
+        batch_chars += len(text)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def parse_page_digests(content, page_numbers):
+    """
+    LLM 응답(JSON)에서 요청한 페이지의 digest만 추출
+    반환값: {페이지 번호: {'page', 'digest', 'keywords'}}
+    """
+    start, end = content.find('{'), content.rfind('}')
+    try:
+        data = json.loads(content[start:end + 1]) if start != -1 else {}
+    except ValueError:
+        print(f"digest 응답 파싱 실패: {content[:200]}")
+        return {}
+
+    digests = {}
+    for item in data.get("pages", []) if isinstance(data, dict) else []:
+        try:
+            page_number = int(item.get("page"))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if page_number in page_numbers:
+            digests[page_number] = {
+                "page": page_number,
+                "digest": str(item.get("digest") or "").strip(),
+                "keywords": [str(keyword).strip() for keyword in item.get("keywords") or [] if str(keyword).strip()][:8]
+            }
+    return digests
+
+def request_page_digests(batch):
+    """
+    페이지 묶음 하나의 digest 요청 (실패하면 빈 결과, 빠진 페이지는 다음 처리 때 다시 생성)
+    """
+    prompt = DIGEST_PROMPT + "".join(f"\n=== Page {page_number} ===\n{text}\n" for page_number, text in batch)
+    messages = [{"role": "user", "content": prompt}]
+    # 공유 LLM 한도에서 요약 우선순위로 확보 (대화용 몫은 남겨 둠)
+    admission = scheduler.acquire('summary', scheduler.estimate_tokens(messages, 200 * len(batch)),
+                                  max_wait=DIGEST_MAX_WAIT)
+    if not admission.admitted:
+        print(f"LLM 한도 부족으로 digest 생략 (페이지 {batch[0][0]}-{batch[-1][0]}, 다음 처리 때 생성)")
+        return {}
+    try:
+        response = llm_client.chat.completions.create(
+            model=DIGEST_MODEL,
+            messages=messages,
+            temperature=0.2,
+            stream=False,
+            max_tokens=200 * len(batch)
+        )
+        return parse_page_digests(response.choices[0].message.content, {page_number for page_number, _ in batch})
+    except Exception as e:
+        print(f"digest 생성 실패 (페이지 {batch[0][0]}-{batch[-1][0]}): {str(e)}")
+        return {}
+
+def generate_page_digests(read_page, page_numbers):
+    """
+    페이지별 digest 생성 (여러 페이지를 한 번의 LLM 호출로 묶어 DIGEST_CONCURRENCY개씩 동시 요청)
+    read_page: 페이지 번호 -> 요소 목록
+    반환값: {페이지 번호: digest 항목}
+    """
+    digests, pending = {}, []
+    for page_number in page_numbers:
+        text = page_text(read_page(page_number), DIGEST_PAGE_CHARS).strip()
+        if text:
+            pending.append((page_number, text))
+        else:
+            digests[page_number] = {"page": page_number, "digest": "", "keywords": []}  # 빈 페이지는 호출 생략
+
+    batches = batch_digest_pages(pending)
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(DIGEST_CONCURRENCY, len(batches)))) as executor:
+            for batch_digests in executor.map(request_page_digests, batches):
+                digests.update(batch_digests)
+    return digests
+
+def store_page_digests(folder_name, document_name, read_page, page_count, reused_pages):
+    """
+    {document_name}_digests.json 생성/갱신
+    - 재사용한 페이지(reused_pages: {새 페이지 번호: 이전 페이지 번호})는 이전 digest를 그대로 사용
+    - 나머지 페이지와 이전 digest가 없는 페이지만 LLM으로 생성
+    반환값: (생성한 페이지 수, 재사용한 페이지 수)
+    """
+    digests_key = f"{folder_name}/{document_name}/processed/{document_name}_digests.json"
+    digests = {}
+    if reused_pages:
+        previous = read_json_object(TARGET_BUCKET, digests_key) or {}
+        previous_pages = {item.get("page"): item for item in previous.get("pages", [])}
+        for page_number, previous_page in reused_pages.items():
+            if previous_page in previous_pages:
+                digests[page_number] = {**previous_pages[previous_page], "page": page_number}
+    reused_count = len(digests)
+
+    missing_pages = [page_number for page_number in range(1, page_count + 1) if page_number not in digests]
+    digests.update(generate_page_digests(read_page, missing_pages))
+
+    s3_client.put_object(
+        Bucket=TARGET_BUCKET,
+        Key=digests_key,
+        Body=json.dumps({
+            "model": DIGEST_MODEL,
+            "total_pages": page_count,
+            "created_at": datetime.datetime.utcnow().isoformat(),
+            "pages": [digests[page_number] for page_number in sorted(digests)]
+        }, ensure_ascii=False),
+        ContentType="application/json"
+    )
+    return len(digests) - reused_count, reused_count
+
+def remove_page_digests(folder_name, document_name):
+    """
+    새 결과와 맞지 않는 {document_name}_digests.json 삭제 (삭제 실패는 읽는 쪽의 LastModified 비교로 걸러짐)
+    """
+    try:
+        s3_client.delete_object(
+            Bucket=TARGET_BUCKET,
+            Key=f"{folder_name}/{document_name}/processed/{document_name}_digests.json"
+        )
+    except ClientError as e:
+        print(f"이전 페이지 digest 삭제 중 오류 (무시됨): {str(e)}")
+
+def update_search_index(folder_name, document_name, read_page, page_numbers, page_count, reused_pages):
+    """
+    폴더 검색 색인({folder}/_search_index.json.z)에 문서 반영
+    - 새로 파싱한 페이지만 토큰화하고, 재사용한 페이지(reused_pages)는 이전 색인을 새 페이지 번호로 옮김
+      (이전 색인에 문서가 없으면 재사용한 페이지도 토큰화)
+    - 같은 폴더의 다른 문서가 동시에 갱신할 수 있으므로 ETag 조건부 쓰기(If-Match / If-None-Match)로 저장, 충돌 시 다시 읽어 병합
+    반환값: 색인한 페이지 수
+    """
+    def tokenize_pages(numbers):
+        return {number: search_index.page_terms(page_text(read_page(number))) for number in numbers}
+
+    pages = tokenize_pages(page_number for page_number in page_numbers if page_number not in reused_pages)
+    kept_pages = {previous_page: page_number for page_number, previous_page in reused_pages.items()}
+    index_key = search_index.index_key(folder_name)
+
+    for attempt in range(1, SEARCH_INDEX_MAX_ATTEMPTS + 1):
+        try:
+            response = s3_client.get_object(Bucket=TARGET_BUCKET, Key=index_key)
+            index = search_index.decode_index(response['Body'].read())
+            condition = {'IfMatch': response['ETag']}
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                raise
+            index = search_index.empty_index()
+            condition = {'IfNoneMatch': '*'}
+
+        if reused_pages and document_name not in index['documents'] and len(pages) < len(page_numbers):
+            pages.update(tokenize_pages(reused_pages))
+        search_index.merge_document(index, document_name, pages, page_count, kept_pages)
+        try:
+            s3_client.put_object(
+                Bucket=TARGET_BUCKET,
+                Key=index_key,
+                Body=search_index.encode_index(index),
+                ContentType='application/zlib',
+                **condition
+            )
+            return len(pages)
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                raise
+            print(f"검색 색인 동시 갱신 충돌 (재시도 {attempt}/{SEARCH_INDEX_MAX_ATTEMPTS}): {index_key}")
+    raise RuntimeError(f"검색 색인 갱신 실패 (동시 갱신 충돌 반복): {index_key}")
+
+def increment_folder_stats(folder_name, document_name, page_count, previous_page_count=None):
+    """
+    폴더 통계 테이블의 문서 수/페이지 수를 원자적으로 증가시킵니다.
+    - documents 집합에 이미 포함된 문서(재처리)는 중복 집계하지 않습니다.
+    - 재처리 시 이전 페이지 수를 알면 페이지 수 차이만 반영하고,
+      남는 불일치는 ai_tutor_reconcile_folder_stats가 보정합니다.
+    """
+    try:
+        stats_table.update_item(
+            Key={'folder_name': folder_name},
+            UpdateExpression="ADD documentCount :one, pageCount :pages, documents :doc",
+            ConditionExpression="attribute_not_exists(documents) OR NOT contains(documents, :name)",
+            ExpressionAttributeValues={
+                ':one': 1,
+                ':pages': page_count,
+                ':doc': {document_name},
+                ':name': document_name
+            }
+        )
+        print(f"폴더 통계 갱신 완료: {folder_name} (+1 문서, +{page_count} 페이지)")
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            print(f"이미 집계된 문서 (재처리): {folder_name}/{document_name}")
+            page_delta = page_count - previous_page_count if previous_page_count is not None else 0
+            if page_delta:
+                stats_table.update_item(
+                    Key={'folder_name': folder_name},
+                    UpdateExpression="ADD pageCount :delta",
+                    ExpressionAttributeValues={':delta': page_delta}
+                )
+                print(f"폴더 페이지 수 보정: {folder_name} ({page_delta:+d} 페이지)")
+            return False
+        raise
 
 def ensure_document_structure(bucket_name, folder_name, document_name):
     """
@@ -97,27 +917,27 @@ def ensure_document_structure(bucket_name, folder_name, document_name):
         print(f"폴더 구조 확인/생성 중 오류: {str(e)}")
         return False
 
-def lambda_handler(event, context):
+def reject_upload(decoded_key, error_message):
     """
-    S3에 새 파일 업로드 시 트리거되어 처리합니다.
-    파일명 형식: {folder_name}___{document_name}___{filename}.pdf
+    사전 검사에서 처리할 수 없는 파일로 판단 (재시도해도 같은 결과이므로 4xx)
     """
-    print("ai_tutor_process_document 함수 시작")
+    print(f"처리 거부: {decoded_key} - {error_message}")
+    metrics.put_metric('preflight.rejected', 1)
+    return {"statusCode": 400, "body": json.dumps({"message": error_message}, ensure_ascii=False)}
 
+def process_upload(bucket_name, object_key, job):
+    """
+    소스 버킷에 업로드된 파일 하나를 처리합니다. (S3 트리거 / 처리 큐 공통)
+    파일명 형식: {folder_name}___{document_name}___{filename}.pdf
+    job: 작업 상태 기록 (jobs.JobTracker, parsing / saving 단계 기록)
+    """
+    # /tmp에 만든 파일 (웜 컨테이너 / SQS 배치에서 /tmp가 차지 않도록 처리 후 삭제)
+    temp_paths = []
     try:
-        # 1. S3 Event 처리
-        records = event.get("Records", [])
-        if not records:
-            print("Error: 이벤트에 레코드가 없습니다.")
-            return {"statusCode": 400, "body": json.dumps({"message": "No records in event"})}
-        
-        bucket_name = records[0]["s3"]["bucket"]["name"]
-        # 소스 버킷에서만 처리
+        # 1. 소스 버킷에서만 처리
         if bucket_name != SOURCE_BUCKET:
             print(f"소스 버킷({SOURCE_BUCKET})이 아닌 {bucket_name}에서 이벤트 발생. 무시합니다.")
             return {"statusCode": 200, "body": json.dumps({"message": "Not from source bucket"})}
-            
-        object_key = records[0]["s3"]["object"]["key"]
         
         # Object key 디코딩 (한글 처리)
         decoded_key = urllib.parse.unquote_plus(object_key)
@@ -142,12 +962,21 @@ def lambda_handler(event, context):
         
         print(f"처리 시작: 소스 버킷: {bucket_name}, 대상 버킷: {TARGET_BUCKET}, " +
               f"폴더: {folder_name}, 문서: {document_name}, 파일: {actual_filename}")
+        job.bind(folder_name, document_name, decoded_key)
+        job.transition('parsing')
+
+        # 사전 검사: 파일 앞/뒤만 읽어 PDF가 아니거나 잘린 파일은 다운로드 / API 호출 전에 거부
+        with metrics.span('preflight'):
+            preflight, error_message = preflight_source(bucket_name, decoded_key)
+        if error_message:
+            return reject_upload(decoded_key, error_message)
         
         # 2. 대상 버킷에 문서별 폴더 구조 확인/생성
         ensure_document_structure(TARGET_BUCKET, folder_name, document_name)
         
         # 3. 원본 파일 다운로드
         download_path = f"/tmp/{actual_filename}"
+        temp_paths.append(download_path)
         try:
             print(f"다운로드 시도: s3://{bucket_name}/{decoded_key}")
             s3_client.download_file(bucket_name, decoded_key, download_path)
@@ -157,82 +986,267 @@ def lambda_handler(event, context):
             print(error_message)
             return {"statusCode": 500, "body": json.dumps({"message": error_message})}
         
-        # 4. Upstage API 호출
-        headers = {"Authorization": f"Bearer {UPSTAGE_API_KEY}"}
-        data = {
-            "ocr": "auto",
-            "output_formats": "['markdown']",
-            "model": "document-parse",
-            "coordinates": "false"
-        }
-        files = {"document": open(download_path, "rb")}
-        
-        print("Upstage API 호출 시작")
-        
+        # 4. 페이지 구조 검사 (암호화 / 페이지 없음 / 손상 거부, 텍스트 레이어에 따라 OCR 방식 선택)
+        with metrics.span('preflight'):
+            reader, error_message = open_pdf(download_path)
+            if reader is not None:
+                preflight.update(inspect_pdf(reader))
+        if error_message:
+            return reject_upload(decoded_key, error_message)
+
+        # 페이지 해시 비교 (같은 문서의 재업로드면 변경된 페이지만 파싱)
+        with metrics.span('page_hashes'):
+            page_hashes = compute_page_hashes(reader)
+        previous_hashes = None
+        if INCREMENTAL_PROCESSING and page_hashes:
+            previous_hashes = load_previous_hashes(folder_name, document_name)
+
+        changed_pages, reused_pages = list(range(1, len(page_hashes or []) + 1)), {}
+        unchanged = False
+        if previous_hashes:
+            changed_pages, reused_pages = plan_page_changes(page_hashes, previous_hashes)
+            # 페이지 수와 순서까지 같을 때만 기존 결과를 그대로 유지 (삭제/순서 변경만 있어도 결과를 다시 씀)
+            unchanged = not changed_pages and len(page_hashes) == len(previous_hashes) and all(
+                page_number == previous_page for page_number, previous_page in reused_pages.items())
+            print(f"재업로드 문서: 전체 {len(page_hashes)}페이지 중 변경 {len(changed_pages)}페이지, "
+                  f"재사용 {len(reused_pages)}페이지 (이전 {len(previous_hashes)}페이지)")
+
+        parse_path = download_path
+        if previous_hashes and changed_pages and reused_pages:
+            temp_paths.append(f"/tmp/partial_{actual_filename}")
+            parse_path = build_partial_pdf(reader, changed_pages, temp_paths[-1])
+
+        # 파싱할 페이지 수 / 파일 크기가 동기 API 한도를 넘으면 비동기 API로 파싱
+        parse_pages = len(changed_pages) if parse_path != download_path else preflight.get("page_count")
+        large_document = (parse_pages or 0) > SYNC_PARSE_MAX_PAGES or os.path.getsize(parse_path) > SYNC_PARSE_MAX_BYTES
+        preflight["parse_mode"] = "async" if large_document else "sync"
+        preflight.setdefault("ocr", "auto")
+        print(f"사전 검사: PDF {preflight.get('pdf_version')}, {preflight.get('page_count')}페이지, "
+              f"텍스트 레이어 {preflight.get('text_layer')}, ocr={preflight['ocr']}, {preflight['parse_mode']} 파싱")
+
+        result_filename = f"{document_name}_result.json"
+        target_processed_key = f"{folder_name}/{document_name}/processed/{result_filename}"
+
+        # 파싱 결과 / 재사용할 이전 결과는 /tmp에 페이지 단위로 기록 (메모리에는 색인만 유지)
+        parsed_spool = PageSpool()
+        previous_spool = PageSpool()
         try:
-            response = requests.post(UPSTAGE_API_ENDPOINT, headers=headers, files=files, data=data)
-            if response.status_code != 200:
-                error_message = f"Upstage API 오류: 상태 코드 {response.status_code}, 응답: {response.text}"
+            # 5. Upstage API 호출 (새로 파싱할 페이지가 없으면 생략)
+            parse_info = None
+            if not previous_hashes or changed_pages:
+                headers = {"Authorization": f"Bearer {UPSTAGE_API_KEY}"}
+                data = {
+                    "ocr": preflight["ocr"],
+                    "output_formats": "['markdown']",
+                    "model": "document-parse",
+                    "coordinates": "false"
+                }
+                files = {"document": open(parse_path, "rb")}
+
+                print("Upstage API 호출 시작")
+
+                try:
+                    with metrics.span('upstage.document_parse', bytes_out=os.path.getsize(parse_path)) as parse_span:
+                        if preflight["parse_mode"] == "async":
+                            parse_info = parse_document_async(headers, files, data, parsed_spool, parse_span)
+                        else:
+                            # 응답 본문을 한 번에 읽지 않고 스트리밍으로 받으며 페이지별로 기록
+                            response = requests.post(UPSTAGE_API_ENDPOINT, headers=headers, files=files, data=data,
+                                                     stream=True)
+                            if response.status_code != 200:
+                                error_message = f"Upstage API 오류: 상태 코드 {response.status_code}, 응답: {response.text}"
+                                print(error_message)
+                                return {"statusCode": 500, "body": json.dumps({"message": error_message})}
+
+                            response.raw.decode_content = True  # gzip 응답 해제
+                            parse_info = spool_upstage_result(response.raw, parsed_spool)
+                            parse_span.add_bytes(bytes_in=response.raw.tell())
+                    print("Upstage API 응답 성공")
+                except Exception as e:
+                    error_message = f"Upstage API 호출 오류: {str(e)}"
+                    print(error_message)
+                    return {"statusCode": 500, "body": json.dumps({"message": error_message})}
+                finally:
+                    files["document"].close()
+                    print("업로드 파일 핸들 닫기 완료")
+
+            # 6. 결과 구성 (페이지 번호 순서로 생성)
+            created_at = datetime.datetime.utcnow().isoformat()
+            previous_boilerplate = []
+            if unchanged:
+                print("변경된 페이지 없음: 기존 처리 결과를 유지합니다.")
+                page_count = len(page_hashes)
+                page_numbers = []  # 결과를 다시 쓰지 않으므로 읽을 페이지 없음
+            elif parse_path != download_path or parse_info is None:
+                # 부분 파싱 결과(1..N 페이지)를 원래 페이지 번호로 되돌리고 재사용 페이지와 합침
+                # (새 페이지 없이 삭제/순서 변경만 있으면 재사용 페이지만으로 결과를 다시 구성)
+                previous_created_at, previous_boilerplate, previous_metadata = spool_previous_pages(
+                    folder_name, document_name, set(reused_pages.values()), previous_spool)
+                created_at = previous_created_at or created_at
+                if parse_info is None:
+                    parse_info = {"api": previous_metadata.get("api_version"), "model": previous_metadata.get("model")}
+                    print("새 페이지 없음: 페이지 삭제/순서 변경만 반영해 결과를 다시 저장합니다.")
+                parsed_index = {page_number: index for index, page_number in enumerate(changed_pages, start=1)}
+                page_count = len(page_hashes)
+
+                def read_page(page_number):
+                    if page_number in parsed_index:
+                        return parsed_spool.read(parsed_index[page_number])
+                    return previous_spool.read(reused_pages[page_number])
+
+                page_numbers = range(1, page_count + 1)
+            else:
+                page_count = len(page_hashes) if page_hashes else (
+                    parse_info.get("total_pages") or len(parsed_spool.page_numbers()))
+                read_page = parsed_spool.read
+                page_numbers = parsed_spool.page_numbers()
+
+            # 반복 요소(머리글/바닥글 등) 판별: 기록된 페이지를 한 번 더 읽어 빈도를 셈 (결과를 쓰면서 제거)
+            boilerplate = None
+            if not unchanged and STRIP_BOILERPLATE:
+                with metrics.span('boilerplate'):
+                    boilerplate = BoilerplateFilter()
+                    boilerplate.carry_over(previous_boilerplate, reused_pages)
+                    for page_number in page_numbers:
+                        boilerplate.count(page_number, read_page(page_number))
+                    boilerplate.finalize(page_count)
+            if boilerplate is not None:
+                pages = ((page_number, boilerplate.strip(page_number, read_page(page_number))) for page_number in page_numbers)
+            else:
+                pages = ((page_number, read_page(page_number)) for page_number in page_numbers)
+
+            job.transition('saving')
+            try:
+                # 1. 원본 파일을 대상 버킷의 문서별 upload/ 경로로 복사 (소스 원본은 결과 저장이 끝난 뒤 삭제)
+                target_upload_key = f"{folder_name}/{document_name}/upload/{actual_filename}"
+                print(f"원본 파일 복사: {SOURCE_BUCKET}/{decoded_key} -> {TARGET_BUCKET}/{target_upload_key}")
+
+                s3_client.copy_object(
+                    Bucket=TARGET_BUCKET,
+                    CopySource={'Bucket': SOURCE_BUCKET, 'Key': decoded_key},
+                    Key=target_upload_key
+                )
+
+                if unchanged:
+                    remove_source_upload(decoded_key)
+                    return {
+                        "statusCode": 200,
+                        "body": json.dumps({
+                            "message": "변경된 페이지가 없어 기존 처리 결과를 유지합니다.",
+                            "folder_name": folder_name,
+                            "document_name": document_name,
+                            "changed_pages": [],
+                            "result_path": target_processed_key
+                        })
+                    }
+
+                # 2. 처리 결과를 대상 버킷의 문서별 processed/ 폴더에 저장 (페이지 단위 직렬화, 멀티파트 업로드)
+                metadata = {
+                    "api_version": parse_info.get("api"),
+                    "model": parse_info.get("model"),
+                    "total_pages": page_count,
+                    "file_type": preflight["file_type"],
+                    "indexed": False,
+                    "last_updated": datetime.datetime.utcnow().isoformat(),
+                    "preflight": {name: preflight.get(name) for name in
+                                  ("pdf_version", "size", "encrypted", "text_layer", "ocr", "parse_mode")}
+                }
+                if page_hashes:
+                    # 이번 처리에서 새로 파싱한 페이지 (검색 인덱스 등은 이 페이지만 갱신)
+                    metadata["changed_pages"] = changed_pages
+                header = {
+                    "folder_name": folder_name,
+                    "document_name": document_name,
+                    "original_filename": actual_filename,
+                    "created_at": created_at
+                }
+                writer = S3StreamingWriter(TARGET_BUCKET, target_processed_key, "application/json",
+                                           {"total-pages": str(page_count)})
+                try:
+                    with metrics.span('transform'):
+                        write_result_json(writer, header, pages, metadata, boilerplate)
+                    writer.close()
+                except Exception:
+                    writer.abort()
+                    raise
+                print(f"처리 결과 저장 완료: s3://{TARGET_BUCKET}/{target_processed_key} ({writer.size} bytes)")
+                if boilerplate is not None:
+                    report = metadata["boilerplate_report"]
+                    print(f"반복 요소 제거: {report['elements_removed']}개, "
+                          f"{report['bytes_saved']} bytes / 약 {report['estimated_tokens_saved']} 토큰 절감")
+                    metrics.put_metric('boilerplate.bytes_saved', report['bytes_saved'], 'Bytes')
+                    metrics.put_metric('boilerplate.estimated_tokens_saved', report['estimated_tokens_saved'])
+
+                # 페이지 해시 저장 (다음 재업로드 시 비교 기준)
+                if page_hashes:
+                    s3_client.put_object(
+                        Bucket=TARGET_BUCKET,
+                        Key=f"{folder_name}/{document_name}/processed/{document_name}_pages.json",
+                        Body=json.dumps({"algorithm": "sha256", "pages": page_hashes}),
+                        ContentType="application/json"
+                    )
+
+                # 결과가 바뀌었으므로 이전 요약(ai_tutor_get_document가 생성한 .md)이 있으면 삭제
+                summary_key = target_processed_key.rsplit('.', 1)[0] + '.md'
+                s3_client.delete_object(Bucket=TARGET_BUCKET, Key=summary_key)
+
+                # 이후 단계(검색 색인, digest)는 반복 요소를 제거한 페이지를 사용
+                read_stripped = read_page if boilerplate is None else (
+                    lambda page_number: boilerplate.strip(page_number, read_page(page_number), record=False))
+
+                # 폴더 검색 색인 갱신 (실패해도 처리 결과는 유지)
+                if ENABLE_SEARCH_INDEX:
+                    try:
+                        with metrics.span('search_index'):
+                            indexed = update_search_index(folder_name, document_name, read_stripped, page_numbers,
+                                                          page_count, reused_pages)
+                        print(f"검색 색인 갱신 완료: {indexed}페이지 색인, {page_count - indexed}페이지 재사용")
+                    except Exception as e:
+                        print(f"검색 색인 갱신 중 오류 (무시됨): {str(e)}")
+
+                # 페이지별 digest 생성 (선택 단계, 실패해도 처리 결과는 유지)
+                if ENABLE_PAGE_DIGESTS:
+                    try:
+                        with metrics.span('page_digests'):
+                            generated, reused = store_page_digests(folder_name, document_name, read_stripped, page_count,
+                                                                   reused_pages)
+                        print(f"페이지 digest 저장 완료: 생성 {generated}페이지, 재사용 {reused}페이지")
+                    except Exception as e:
+                        # 이전 digest가 새 결과 옆에 남지 않도록 삭제 (요약/챗봇은 원문 페이지를 사용)
+                        print(f"페이지 digest 생성 중 오류 (digest 삭제 후 무시됨): {str(e)}")
+                        remove_page_digests(folder_name, document_name)
+                else:
+                    # 이전 digest는 새 결과와 맞지 않으므로 삭제 (요약/챗봇은 원문 페이지를 사용)
+                    remove_page_digests(folder_name, document_name)
+
+                # 3. 소스 버킷의 processed/ 폴더에 복사본 저장 (인덱싱 용도, 다시 업로드하지 않고 S3 내부 복사)
+                source_processed_key = f"processed/{folder_name}_{document_name}_result.json"
+                s3_client.copy_object(
+                    Bucket=SOURCE_BUCKET,
+                    CopySource={'Bucket': TARGET_BUCKET, 'Key': target_processed_key},
+                    Key=source_processed_key
+                )
+                print(f"인덱싱용 결과 저장 완료: s3://{SOURCE_BUCKET}/{source_processed_key}")
+
+            except ClientError as e:
+                error_message = f"결과 저장 중 오류 발생: {str(e)}"
                 print(error_message)
                 return {"statusCode": 500, "body": json.dumps({"message": error_message})}
-            
-            result = response.json()
-            print("Upstage API 응답 성공")
-        except Exception as e:
-            error_message = f"Upstage API 호출 오류: {str(e)}"
-            print(error_message)
-            return {"statusCode": 500, "body": json.dumps({"message": error_message})}
         finally:
-            files["document"].close()
-            print("업로드 파일 핸들 닫기 완료")
-        
-        # 5. 결과 변환 및 S3에 저장
-        transformed_result = transform_result(result, folder_name, document_name, actual_filename)
-        final_json = json.dumps(transformed_result, ensure_ascii=False, indent=2)
-        
+            parsed_spool.close()
+            previous_spool.close()
+
+        # 폴더 통계 갱신 (실패해도 처리 결과는 유지, 정합성은 reconcile 작업이 보정)
         try:
-            # 1. 원본 파일을 대상 버킷의 문서별 upload/ 경로로 이동
-            target_upload_key = f"{folder_name}/{document_name}/upload/{actual_filename}"
-            print(f"원본 파일 복사: {SOURCE_BUCKET}/{decoded_key} -> {TARGET_BUCKET}/{target_upload_key}")
-            
-            s3_client.copy_object(
-                Bucket=TARGET_BUCKET,
-                CopySource={'Bucket': SOURCE_BUCKET, 'Key': decoded_key},
-                Key=target_upload_key
-            )
-            
-            # 2. 소스 버킷에서 원본 파일 삭제
-            s3_client.delete_object(Bucket=SOURCE_BUCKET, Key=decoded_key)
-            print(f"소스 버킷에서 원본 파일 삭제 완료: {SOURCE_BUCKET}/{decoded_key}")
-            
-            # 3. 처리 결과를 대상 버킷의 문서별 processed/ 폴더에 저장
-            result_filename = f"{document_name}_result.json"
-            target_processed_key = f"{folder_name}/{document_name}/processed/{result_filename}"
-            
-            s3_client.put_object(
-                Bucket=TARGET_BUCKET,
-                Key=target_processed_key,
-                Body=final_json,
-                ContentType="application/json"
-            )
-            print(f"처리 결과 저장 완료: s3://{TARGET_BUCKET}/{target_processed_key}")
-            
-            # 4. 소스 버킷의 processed/ 폴더에 복사본 저장 (인덱싱 용도)
-            source_processed_key = f"processed/{folder_name}_{document_name}_result.json"
-            s3_client.put_object(
-                Bucket=SOURCE_BUCKET, 
-                Key=source_processed_key,
-                Body=final_json,
-                ContentType="application/json"
-            )
-            print(f"인덱싱용 결과 저장 완료: s3://{SOURCE_BUCKET}/{source_processed_key}")
-            
-        except ClientError as e:
-            error_message = f"결과 저장 중 오류 발생: {str(e)}"
-            print(error_message)
-            return {"statusCode": 500, "body": json.dumps({"message": error_message})}
+            increment_folder_stats(folder_name, document_name, page_count,
+                                   len(previous_hashes) if previous_hashes else None)
+        except Exception as e:
+            print(f"폴더 통계 갱신 중 오류 (무시됨): {str(e)}")
+
+        # 결과 저장이 모두 끝난 뒤에만 소스 원본 삭제 (이전에 실패하면 재시도가 원본을 다시 처리)
+        remove_source_upload(decoded_key)
         
-        # 6. 성공 응답 반환
+        # 7. 성공 응답 반환
         return {
             "statusCode": 200,
             "body": json.dumps({
@@ -242,7 +1256,8 @@ def lambda_handler(event, context):
                 "original_filename": actual_filename,
                 "source_bucket": SOURCE_BUCKET,
                 "target_bucket": TARGET_BUCKET,
-                "result_path": target_processed_key
+                "result_path": target_processed_key,
+                "changed_pages": changed_pages if page_hashes else None
             })
         }
         
@@ -250,3 +1265,98 @@ def lambda_handler(event, context):
         error_message = f"Lambda 함수 실행 중 오류 발생: {str(e)}"
         print(error_message)
         return {"statusCode": 500, "body": json.dumps({"message": error_message})}
+    finally:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def remove_source_upload(object_key):
+    """
+    처리 결과 저장 후 소스 버킷의 원본 삭제 (실패해도 처리 결과는 유지, 남은 원본은 다시 처리해도 같은 결과)
+    """
+    try:
+        s3_client.delete_object(Bucket=SOURCE_BUCKET, Key=object_key)
+        print(f"소스 버킷에서 원본 파일 삭제 완료: {SOURCE_BUCKET}/{object_key}")
+    except ClientError as e:
+        print(f"소스 버킷 원본 삭제 중 오류 (무시됨): {str(e)}")
+
+def finish_job(job, response, final):
+    """
+    처리 결과로 작업 상태 마무리
+    - 200: done / 4xx 또는 마지막 시도의 5xx: failed / 그 외 5xx: 재시도 대기(queued)
+    """
+    status_code = response.get("statusCode", 500)
+    try:
+        body = json.loads(response.get("body") or "{}")
+    except ValueError:
+        body = {}
+    if status_code == 200:
+        changed_pages = body.get("changed_pages")
+        job.finish("done", result_path=body.get("result_path"),
+                   changed_pages=len(changed_pages) if changed_pages is not None else None)
+    elif final or status_code < 500:
+        job.finish("failed", last_error=body.get("message", ""))
+    else:
+        job.transition("queued", last_error=body.get("message", ""))
+
+def process_queue_batch(records, context):
+    """
+    처리 큐(SQS) 메시지 묶음 처리 (메시지: ai_tutor_enqueue_document가 보낸 {job_id, upload_id, bucket, key, queued_at})
+    - 5xx로 실패한 메시지만 batchItemFailures로 반환해 다시 큐에 돌아가게 함
+      (ReceiveCount가 JOB_MAX_ATTEMPTS에 도달하면 작업은 failed, 메시지는 큐 설정에 따라 DLQ로 이동)
+    - 형식이 잘못된 메시지나 4xx 실패는 재시도하지 않음
+    - 남은 실행 시간이 부족하면 처리하지 않은 메시지는 실패로 반환 (다시 수신됨)
+    """
+    failures = []
+    for index, record in enumerate(records):
+        if context is not None and index > 0 and context.get_remaining_time_in_millis() < QUEUE_TIME_MARGIN_MS:
+            print(f"남은 실행 시간 부족: 메시지 {len(records) - index}개는 다시 큐로 돌려보냅니다.")
+            failures.extend({"itemIdentifier": remaining["messageId"]} for remaining in records[index:])
+            break
+        try:
+            message = json.loads(record["body"])
+            bucket_name, object_key = message["bucket"], message["key"]
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"잘못된 작업 메시지 (재시도하지 않음): {record.get('messageId')} - {str(e)}")
+            continue
+
+        attempt = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+        job = jobs.JobTracker(message.get("upload_id"), queued_at=message.get("queued_at"), attempt=attempt)
+        print(f"작업 처리: {message.get('job_id')} (시도 {attempt}/{JOB_MAX_ATTEMPTS})")
+        response = process_upload(bucket_name, object_key, job)
+        finish_job(job, response, final=attempt >= JOB_MAX_ATTEMPTS)
+        if response.get("statusCode", 500) >= 500:
+            failures.append({"itemIdentifier": record["messageId"]})
+
+    metrics.put_metric("jobs.batch_failures", len(failures))
+    return {"batchItemFailures": failures}
+
+@metrics.instrument_handler
+def lambda_handler(event, context):
+    """
+    문서 처리 작업자
+    - 처리 큐(SQS) 이벤트: 작업 메시지 묶음을 처리하고 실패한 메시지 목록(batchItemFailures) 반환
+    - S3 이벤트 (큐를 거치지 않는 배포): 업로드된 파일을 바로 처리
+    """
+    print("ai_tutor_process_document 함수 시작")
+
+    records = event.get("Records", [])
+    if not records:
+        print("Error: 이벤트에 레코드가 없습니다.")
+        return {"statusCode": 400, "body": json.dumps({"message": "No records in event"})}
+
+    if records[0].get("eventSource") == "aws:sqs":
+        return process_queue_batch(records, context)
+
+    # S3 트리거 직접 처리: 작업 행도 여기서 생성
+    try:
+        bucket_name = records[0]["s3"]["bucket"]["name"]
+        object_key = records[0]["s3"]["object"]["key"]
+    except (KeyError, TypeError) as e:
+        error_message = f"잘못된 S3 이벤트: {str(e)}"
+        print(error_message)
+        return {"statusCode": 400, "body": json.dumps({"message": error_message})}
+    job = jobs.JobTracker(jobs.upload_id_for(records[0]), create=True)
+    response = process_upload(bucket_name, object_key, job)
+    finish_job(job, response, final=True)
+    return response
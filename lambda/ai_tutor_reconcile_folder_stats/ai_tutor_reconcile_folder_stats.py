@@ -0,0 +1,188 @@
+import json
+import os
+import datetime
+from botocore.exceptions import ClientError
+from ai_tutor_common import lazy, metrics  # 공통 레이어
+
+# 환경 변수 가져오기
+TARGET_BUCKET = os.environ.get('TARGET_BUCKET', 'target버킷')
+FOLDER_STATS_TABLE = os.environ.get('FOLDER_STATS_TABLE', 'ai-tutor-folder-stats')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+# S3 / DynamoDB 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3', region_name=AWS_REGION), 's3')
+
+def create_stats_table():
+    import boto3
+    dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+    return metrics.instrument_client(dynamodb.Table(FOLDER_STATS_TABLE), 'dynamodb')
+
+s3 = lazy.LazyClient(create_s3_client, 's3')
+stats_table = lazy.LazyClient(create_stats_table, 'dynamodb')
+lazy.prewarm(s3, stats_table)
+
+def list_folder_names():
+    """
+    대상 버킷의 최상위 폴더 목록 조회
+    """
+    folder_names = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=TARGET_BUCKET, Delimiter='/'):
+        for prefix in page.get('CommonPrefixes', []):
+            folder_names.append(prefix['Prefix'].rstrip('/'))
+    return folder_names
+
+def get_result_page_count(key):
+    """
+    처리 결과 JSON의 페이지 수 조회
+    - 객체 메타데이터(total-pages)가 있으면 HEAD 요청만 사용
+    - 이전 버전에서 저장된 결과는 JSON을 읽어 계산
+    """
+    head = s3.head_object(Bucket=TARGET_BUCKET, Key=key)
+    total_pages = head.get('Metadata', {}).get('total-pages')
+    if total_pages:
+        return int(total_pages)
+
+    response = s3.get_object(Bucket=TARGET_BUCKET, Key=key)
+    document_data = json.loads(response['Body'].read().decode('utf-8'))
+    return document_data.get('metadata', {}).get('total_pages') or len(document_data.get('pages', []))
+
+def count_folder(folder_name):
+    """
+    폴더 내 처리 완료 문서 수와 페이지 수 계산
+    경로 패턴: {folder}/{document}/processed/{document}_result.json
+    """
+    documents = set()
+    page_count = 0
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=TARGET_BUCKET, Prefix=f"{folder_name}/"):
+        for item in page.get('Contents', []):
+            key_parts = item['Key'].split('/')
+            if len(key_parts) != 4 or key_parts[2] != 'processed':
+                continue
+            document_name = key_parts[1]
+            if key_parts[3] != f"{document_name}_result.json":
+                continue
+            try:
+                page_count += get_result_page_count(item['Key'])
+                documents.add(document_name)
+            except Exception as e:
+                print(f"문서 페이지 수 조회 오류 (건너뜀): {item['Key']} - {str(e)}")
+    return documents, page_count
+
+def get_folder_description(folder_name):
+    """
+    기존 통계 행이 없는 폴더의 설명을 metadata.json에서 조회
+    """
+    try:
+        response = s3.get_object(Bucket=TARGET_BUCKET, Key=f"{folder_name}/metadata.json")
+        metadata = json.loads(response['Body'].read().decode('utf-8'))
+        return metadata.get('description', ''), metadata.get('createdAt', '')
+    except ClientError:
+        return '', ''
+
+def reconcile_folder(folder_name, existing_item):
+    """
+    S3 상태를 기준으로 폴더 통계 행을 다시 기록
+    반환값: 보정 여부
+    """
+    documents, page_count = count_folder(folder_name)
+
+    if (existing_item is not None
+            and int(existing_item.get('documentCount', 0)) == len(documents)
+            and int(existing_item.get('pageCount', 0)) == page_count
+            and set(existing_item.get('documents', set())) == documents):
+        return False
+
+    update_expression = "SET documentCount = :count, pageCount = :pages"
+    expression_values = {
+        ':count': len(documents),
+        ':pages': page_count
+    }
+
+    # 통계 행이 없던 폴더는 설명/생성일도 함께 복구
+    if existing_item is None:
+        description, created_at = get_folder_description(folder_name)
+        update_expression += ", description = :description, createdAt = :created_at"
+        expression_values[':description'] = description
+        expression_values[':created_at'] = created_at
+
+    # DynamoDB는 빈 집합을 저장할 수 없으므로 문서가 없으면 속성 제거
+    if documents:
+        update_expression += ", documents = :documents"
+        expression_values[':documents'] = documents
+    else:
+        update_expression += " REMOVE documents"
+
+    stats_table.update_item(
+        Key={'folder_name': folder_name},
+        UpdateExpression=update_expression,
+        ExpressionAttributeValues=expression_values
+    )
+    print(f"폴더 통계 보정: {folder_name} (문서 {len(documents)}개, 페이지 {page_count}개)")
+    return True
+
+@metrics.instrument_handler
+def lambda_handler(event, context):
+    """
+    폴더 통계 테이블과 S3 실제 상태의 차이를 보정하는 주기 작업 (EventBridge 스케줄 트리거)
+
+    - S3의 각 폴더에서 처리 완료 문서 수/페이지 수를 다시 계산
+    - 값이 다른 행만 갱신, 통계 행이 없는 폴더는 새로 생성
+    - S3에서 사라진 폴더의 통계 행은 삭제
+
+    필요한 IAM 권한:
+    - s3:ListBucket, s3:GetObject
+    - dynamodb:Scan, dynamodb:UpdateItem, dynamodb:DeleteItem
+    """
+    started_at = datetime.datetime.now()
+    print("ai_tutor_reconcile_folder_stats 함수 시작")
+
+    try:
+        # 1. 기존 통계 행 조회
+        existing_items = {}
+        scan_kwargs = {}
+        while True:
+            response = stats_table.scan(**scan_kwargs)
+            for item in response.get('Items', []):
+                existing_items[item['folder_name']] = item
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        # 2. S3 폴더별 보정
+        folder_names = list_folder_names()
+        repaired = []
+        for folder_name in folder_names:
+            try:
+                if reconcile_folder(folder_name, existing_items.get(folder_name)):
+                    repaired.append(folder_name)
+            except Exception as e:
+                print(f"폴더 보정 오류 (건너뜀): {folder_name} - {str(e)}")
+
+        # 3. S3에 존재하지 않는 폴더의 통계 행 삭제
+        removed = []
+        for folder_name in set(existing_items) - set(folder_names):
+            stats_table.delete_item(Key={'folder_name': folder_name})
+            removed.append(folder_name)
+            print(f"존재하지 않는 폴더의 통계 행 삭제: {folder_name}")
+
+        elapsed = (datetime.datetime.now() - started_at).total_seconds()
+        print(f"폴더 통계 보정 완료: 폴더 {len(folder_names)}개, 보정 {len(repaired)}개, 삭제 {len(removed)}개 ({elapsed:.1f}초)")
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "message": "폴더 통계 보정 완료",
+                "folders": len(folder_names),
+                "repaired": repaired,
+                "removed": removed
+            }, ensure_ascii=False)
+        }
+
+    except Exception as e:
+        error_message = f"폴더 통계 보정 중 오류 발생: {str(e)}"
+        print(error_message)
+        return {"statusCode": 500, "body": json.dumps({"message": error_message}, ensure_ascii=False)}
@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from botocore.exceptions import ClientError
+from ai_tutor_common import lazy, metrics, search_index  # 공통 레이어
+
+# 환경 변수 가져오기
+TARGET_BUCKET = os.environ.get('TARGET_BUCKET', 'target버킷')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+MAX_RESULTS = int(os.environ.get('MAX_RESULTS', '20'))  # 반환할 최대 문서 수
+PAGES_PER_DOCUMENT = int(os.environ.get('PAGES_PER_DOCUMENT', '5'))  # 문서별 반환할 최대 페이지 수
+INDEX_REVALIDATE_SECONDS = float(os.environ.get('INDEX_REVALIDATE_SECONDS', '0'))  # 이 시간 동안은 캐시된 색인을 확인 없이 사용
+
+# S3 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3', region_name=AWS_REGION), 's3')
+
+s3 = lazy.LazyClient(create_s3_client, 's3')
+lazy.prewarm(s3)
+
+# 폴더별 색인 캐시 (웜 컨테이너에서 재사용): {폴더: (ETag, 색인, 확인 시각)}
+index_cache = {}
+
+def response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(body, ensure_ascii=False)
+    }
+
+def load_index(folder_name):
+    """
+    폴더 검색 색인 조회 (없으면 None)
+    - 캐시된 색인이 있으면 조건부 GET(If-None-Match)으로 변경 여부만 확인 (변경 없으면 304, 본문 전송 없음)
+    """
+    cached = index_cache.get(folder_name)
+    if cached and time.monotonic() - cached[2] < INDEX_REVALIDATE_SECONDS:
+        return cached[1]
+
+    request = {'Bucket': TARGET_BUCKET, 'Key': search_index.index_key(folder_name)}
+    if cached:
+        request['IfNoneMatch'] = cached[0]
+    try:
+        s3_response = s3.get_object(**request)
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        if cached and error_code in ('304', 'NotModified'):
+            index_cache[folder_name] = (cached[0], cached[1], time.monotonic())
+            return cached[1]
+        if error_code in ('NoSuchKey', '404'):
+            index_cache.pop(folder_name, None)
+            return None
+        raise
+
+    with metrics.span('search_index.decode'):
+        index = search_index.decode_index(s3_response['Body'].read())
+    index_cache[folder_name] = (s3_response.get('ETag'), index, time.monotonic())
+    return index
+
+@metrics.instrument_handler
+def lambda_handler(event, context):
+    """
+    폴더 내 처리된 문서 전체에서 검색어가 나오는 문서와 페이지 검색
+
+    - 경로 파라미터 id: 폴더 이름, 쿼리 파라미터 q: 검색어 (공백으로 구분한 단어별로 일치 여부 판단)
+    - ai_tutor_process_document가 문서 처리 시 갱신하는 폴더 색인({folder}/_search_index.json.z) 하나만 조회
+      (문서별 GET 없음, 웜 컨테이너에서는 조건부 GET으로 캐시된 색인 재사용)
+    - 결과는 문서별로 묶어 점수 순으로 정렬 (문서마다 일치한 상위 페이지 포함)
+
+    필요한 IAM 권한:
+    - s3:GetObject
+    """
+    try:
+        # 1. 폴더 이름과 검색어 추출
+        folder_name = (event.get('pathParameters') or {}).get('id')
+        query_params = event.get('queryStringParameters') or {}
+        query = (query_params.get('q') or '').strip()
+
+        if not folder_name:
+            return response(400, {'error': '폴더 이름이 제공되지 않았습니다.'})
+        if not search_index.tokenize(query):
+            return response(400, {'error': '검색어(q)가 제공되지 않았습니다.'})
+
+        try:
+            limit = max(1, min(int(query_params.get('limit') or MAX_RESULTS), MAX_RESULTS))
+        except ValueError:
+            return response(400, {'error': 'limit은 숫자여야 합니다.'})
+
+        # 2. 폴더 색인 조회
+        index = load_index(folder_name)
+        if index is None:
+            return response(404, {'error': f'폴더 "{folder_name}"의 검색 색인이 없습니다. (처리된 문서 없음)'})
+
+        # 3. 검색
+        with metrics.span('search_index.search'):
+            results = search_index.search(index, query, limit, PAGES_PER_DOCUMENT)
+
+        return response(200, {
+            'folderName': folder_name,
+            'query': query,
+            'results': results,
+            'count': len(results),
+            'indexedDocuments': len(index['documents']),
+            'indexUpdatedAt': index.get('updated_at')
+        })
+
+    except Exception as e:
+        error_message = f"문서 검색 중 오류가 발생했습니다: {str(e)}"
+        print(error_message)
+        return response(500, {'error': error_message})
@@ -1,17 +1,45 @@
 import json
 import os
-import boto3
+import math
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
-import base64
+from ai_tutor_common import jobs, lazy, metrics  # 공통 레이어
 
 # 환경 변수 가져오기
 SOURCE_BUCKET = os.environ.get('SOURCE_BUCKET', 'source버킷')  # 처리 대기 버킷
 TARGET_BUCKET = os.environ.get('TARGET_BUCKET', 'target버킷')  # 대상 버킷
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+PRESIGNED_URL_EXPIRES = int(os.environ.get('PRESIGNED_URL_EXPIRES', '3600'))  # 업로드 URL 유효 시간(초)
+MULTIPART_THRESHOLD = int(os.environ.get('MULTIPART_THRESHOLD', str(16 * 1024 * 1024)))  # 이 크기 이상이면 멀티파트
+MULTIPART_PART_SIZE = max(int(os.environ.get('MULTIPART_PART_SIZE', str(8 * 1024 * 1024))), 5 * 1024 * 1024)  # S3 최소 파트 크기 5MB
+MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_SIZE', str(500 * 1024 * 1024)))
+MAX_PART_COUNT = 10000  # S3 멀티파트 업로드 최대 파트 수
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', '50'))  # 일괄 업로드 최대 파일 수
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '8'))  # 일괄 업로드 동시 처리 수
 
-# S3 클라이언트 초기화
-s3_client = boto3.client('s3', region_name=AWS_REGION)
+CONTENT_TYPE = 'application/pdf'  # 현재는 PDF만 지원
+
+# S3 클라이언트 (첫 사용 시 생성, PREWARM 설정 시 초기화 단계에서 생성)
+def create_s3_client():
+    import boto3
+    return metrics.instrument_client(boto3.client('s3', region_name=AWS_REGION), 's3')
+
+s3_client = lazy.LazyClient(create_s3_client, 's3')
+lazy.prewarm(s3_client)
+
+def make_response(status_code, body):
+    """
+    API Gateway 응답 생성
+    """
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(body)
+    }
 
 def check_folder_exists(folder_name):
     """
@@ -44,7 +72,7 @@ def create_document_structure(folder_name, document_name):
             f"{folder_name}/{document_name}/processed/",
             f"{folder_name}/{document_name}/chat/"
         ]
-        
+
         # 각 폴더 생성
         for folder_path in folders:
             s3_client.put_object(
@@ -53,125 +81,341 @@ def create_document_structure(folder_name, document_name):
                 Body=''
             )
             print(f"폴더 생성 완료: s3://{TARGET_BUCKET}/{folder_path}")
-        
+
         return True
     except Exception as e:
         print(f"문서 폴더 구조 생성 중 오류: {str(e)}")
         return False
 
+def build_upload_key(folder_name, original_filename):
+    """
+    소스 버킷 업로드용 객체 키 생성: upload/{folder_name}___{document_name}___{original_filename}
+    반환값: (document_name, object_key)
+    """
+    # 문서명 추출 (확장자 제외)
+    document_name = os.path.splitext(original_filename)[0]
+    upload_filename = f"{folder_name}___{document_name}___{original_filename}"
+    return document_name, f'upload/{upload_filename}'
+
+def validate_upload_request(folder_name, original_filename):
+    """
+    업로드 요청 파라미터 검사
+    반환값: 오류 메시지 (문제가 없으면 None)
+    """
+    if not all([folder_name, original_filename]):
+        return '폴더명과 파일명이 모두 필요합니다.'
+    # ai_tutor_process_document가 '___' 구분자로 키를 분해하므로 이름에 포함될 수 없음
+    if '___' in folder_name or '___' in original_filename or '/' in original_filename:
+        return "폴더명과 파일명에는 '___' 또는 '/'를 사용할 수 없습니다."
+    if not original_filename.lower().endswith('.pdf'):
+        return '현재는 PDF 파일만 업로드할 수 있습니다.'
+    return None
+
+def create_presigned_post(object_key, file_size):
+    """
+    단일 요청 업로드용 presigned POST 생성
+    - 파일 크기와 Content-Type을 정책 조건으로 고정
+    """
+    presigned = s3_client.generate_presigned_post(
+        Bucket=SOURCE_BUCKET,
+        Key=object_key,
+        Fields={'Content-Type': CONTENT_TYPE},
+        Conditions=[
+            {'Content-Type': CONTENT_TYPE},
+            ['content-length-range', 1, file_size]
+        ],
+        ExpiresIn=PRESIGNED_URL_EXPIRES
+    )
+    return {
+        'upload_type': 'post',
+        'url': presigned['url'],
+        'fields': presigned['fields']
+    }
+
+def create_presigned_multipart(object_key, file_size):
+    """
+    멀티파트 업로드 시작 및 파트별 presigned PUT URL 생성
+    - 클라이언트는 파트를 병렬로 PUT 하고, 응답의 ETag 헤더를 모아 complete 요청을 보냄
+    """
+    part_size = max(MULTIPART_PART_SIZE, math.ceil(file_size / MAX_PART_COUNT))
+    part_count = math.ceil(file_size / part_size)
+
+    multipart = s3_client.create_multipart_upload(
+        Bucket=SOURCE_BUCKET,
+        Key=object_key,
+        ContentType=CONTENT_TYPE
+    )
+    upload_id = multipart['UploadId']
+
+    parts = []
+    for part_number in range(1, part_count + 1):
+        url = s3_client.generate_presigned_url(
+            'upload_part',
+            Params={
+                'Bucket': SOURCE_BUCKET,
+                'Key': object_key,
+                'UploadId': upload_id,
+                'PartNumber': part_number
+            },
+            ExpiresIn=PRESIGNED_URL_EXPIRES
+        )
+        parts.append({'part_number': part_number, 'url': url})
+
+    return {
+        'upload_type': 'multipart',
+        'upload_id': upload_id,
+        'part_size': part_size,
+        'parts': parts
+    }
+
+def initiate_upload(folder_name, original_filename, file_size):
+    """
+    업로드 시작: 문서 폴더 구조 생성 후 업로드 대상(presigned POST 또는 멀티파트 URL) 반환
+    """
+    document_name, object_key = build_upload_key(folder_name, original_filename)
+
+    # 대상 버킷에 문서 폴더 구조 생성
+    create_document_structure(folder_name, document_name)
+
+    if file_size >= MULTIPART_THRESHOLD:
+        upload_target = create_presigned_multipart(object_key, file_size)
+    else:
+        upload_target = create_presigned_post(object_key, file_size)
+
+    print(f"업로드 URL 발급: s3://{SOURCE_BUCKET}/{object_key} ({upload_target['upload_type']})")
+
+    return {
+        'message': '업로드 URL 발급 및 문서 구조 생성 성공',
+        'folder_name': folder_name,
+        'document_name': document_name,
+        'filename': original_filename,
+        'upload_path': object_key,
+        'job_id': jobs.job_id(folder_name, document_name),  # 업로드 후 처리 상태 조회용 (GET /jobs/{job_id})
+        'expires_in': PRESIGNED_URL_EXPIRES,
+        'created_at': datetime.datetime.now().isoformat(),
+        **upload_target
+    }
+
+def parse_file_size(value):
+    """
+    file_size 값 검사 (presigned POST의 크기 조건과 멀티파트 여부를 정하므로 필수)
+    반환값: (파일 크기, 오류 메시지)
+    """
+    if value is None or value == '':
+        return None, 'file_size(바이트)가 필요합니다.'
+    try:
+        file_size = int(value)
+    except (TypeError, ValueError):
+        return None, 'file_size는 바이트 단위 정수여야 합니다.'
+    if file_size <= 0 or file_size > MAX_FILE_SIZE:
+        return None, f'파일 크기는 1 이상 {MAX_FILE_SIZE} 바이트 이하여야 합니다.'
+    return file_size, None
+
+def initiate_batch_upload(folder_name, files):
+    """
+    여러 파일의 업로드를 한 번에 시작
+    - 폴더 존재 여부는 호출 전에 한 번만 확인
+    - 파일별 문서 구조 생성과 presigned URL 발급을 동시에 수행
+    - 파일별 결과(statusCode 포함)를 요청 순서대로 반환
+    """
+    results = [None] * len(files)
+    pending = []
+    seen_documents = set()
+
+    # 1. 파일별 파라미터 검사 (실패한 파일은 바로 결과 기록)
+    for index, file_info in enumerate(files):
+        file_info = file_info if isinstance(file_info, dict) else {}
+        original_filename = file_info.get('filename')
+        error_message = validate_upload_request(folder_name, original_filename)
+        file_size = None
+        if not error_message:
+            file_size, error_message = parse_file_size(file_info.get('file_size'))
+        if not error_message:
+            document_name, _ = build_upload_key(folder_name, original_filename)
+            if document_name in seen_documents:
+                error_message = f'같은 문서명이 요청에 중복되었습니다: {document_name}'
+            seen_documents.add(document_name)
+
+        if error_message:
+            results[index] = {'filename': original_filename, 'statusCode': 400, 'message': error_message}
+        else:
+            pending.append((index, original_filename, file_size))
+
+    # 2. 유효한 파일에 대해 동시 처리
+    def initiate(item):
+        index, original_filename, file_size = item
+        try:
+            return index, {'statusCode': 200, **initiate_upload(folder_name, original_filename, file_size)}
+        except Exception as e:
+            print(f"일괄 업로드 항목 처리 오류: {original_filename} - {str(e)}")
+            return index, {'filename': original_filename, 'statusCode': 500, 'message': str(e)}
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(pending))) as executor:
+            for index, result in executor.map(initiate, pending):
+                results[index] = result
+
+    return results
+
+def parse_parts(value):
+    """
+    멀티파트 완료 요청의 parts 검사 ([{"part_number": 정수, "etag": 문자열}, ...])
+    반환값: (PartNumber 순으로 정렬한 S3 Parts 목록, 오류 메시지)
+    """
+    if not isinstance(value, list) or not value:
+        return None, 'parts 목록이 필요합니다.'
+    parts = {}
+    for part in value:
+        if not isinstance(part, dict):
+            return None, 'parts의 각 항목은 {"part_number", "etag"} 객체여야 합니다.'
+        part_number, etag = part.get('part_number'), part.get('etag')
+        if isinstance(part_number, str) and part_number.isdigit():
+            part_number = int(part_number)
+        if not isinstance(part_number, int) or isinstance(part_number, bool) or not 1 <= part_number <= MAX_PART_COUNT:
+            return None, f'part_number는 1-{MAX_PART_COUNT} 범위의 정수여야 합니다.'
+        if not isinstance(etag, str) or not etag:
+            return None, 'etag는 문자열이어야 합니다.'
+        if part_number in parts:
+            return None, f'part_number가 중복되었습니다: {part_number}'
+        parts[part_number] = etag
+    return [{'PartNumber': number, 'ETag': parts[number]} for number in sorted(parts)], None
+
+def complete_upload(folder_name, original_filename, upload_id, parts):
+    """
+    멀티파트 업로드 완료 (S3 ObjectCreated 이벤트로 ai_tutor_process_document가 트리거됨)
+    parts: parse_parts로 검사한 S3 Parts 목록
+    """
+    document_name, object_key = build_upload_key(folder_name, original_filename)
+    s3_client.complete_multipart_upload(
+        Bucket=SOURCE_BUCKET,
+        Key=object_key,
+        UploadId=upload_id,
+        MultipartUpload={'Parts': parts}
+    )
+    print(f"멀티파트 업로드 완료: s3://{SOURCE_BUCKET}/{object_key}")
+    return {
+        'message': '파일 업로드 완료',
+        'folder_name': folder_name,
+        'document_name': document_name,
+        'filename': original_filename,
+        'upload_path': object_key,
+        'job_id': jobs.job_id(folder_name, document_name)
+    }
+
+def abort_upload(folder_name, original_filename, upload_id):
+    """
+    멀티파트 업로드 취소 (업로드된 파트 삭제)
+    """
+    _, object_key = build_upload_key(folder_name, original_filename)
+    s3_client.abort_multipart_upload(
+        Bucket=SOURCE_BUCKET,
+        Key=object_key,
+        UploadId=upload_id
+    )
+    print(f"멀티파트 업로드 취소: s3://{SOURCE_BUCKET}/{object_key}")
+    return {
+        'message': '파일 업로드 취소',
+        'upload_path': object_key
+    }
+
+@metrics.instrument_handler
 def lambda_handler(event, context):
     """
-    파일을 소스 버킷의 upload 폴더에 업로드하고, 대상 버킷에 문서 폴더 구조를 생성합니다.
-    
+    소스 버킷 upload 폴더로의 직접 업로드(presigned URL)를 준비하고, 대상 버킷에 문서 폴더 구조를 생성합니다.
+    Lambda는 파일 바이트를 직접 다루지 않으며, 클라이언트가 S3에 바로 업로드합니다.
+
     요청 형식:
+    1) 업로드 시작 (action 생략 가능)
+    {
+        "action": "init",
+        "folder_name": "폴더명",
+        "filename": "원본 파일명.pdf",
+        "file_size": 12345678  (필수, 바이트, MULTIPART_THRESHOLD 이상이면 멀티파트 URL 발급)
+    }
+    2) 멀티파트 업로드 완료
     {
+        "action": "complete",
         "folder_name": "폴더명",
-        "file_content": "base64로 인코딩된 파일 내용",
-        "filename": "원본 파일명.pdf"
+        "filename": "원본 파일명.pdf",
+        "upload_id": "...",
+        "parts": [{"part_number": 1, "etag": "\"...\""}, ...]
+    }
+    3) 일괄 업로드 시작 (강의 자료 묶음, 최대 MAX_BATCH_FILES개)
+    {
+        "folder_name": "폴더명",
+        "files": [{"filename": "1주차.pdf", "file_size": 12345}, ...]
+    }
+    4) 멀티파트 업로드 취소
+    {
+        "action": "abort",
+        "folder_name": "폴더명",
+        "filename": "원본 파일명.pdf",
+        "upload_id": "..."
     }
     """
     try:
         # 요청에서 데이터 추출
-        body = json.loads(event.get('body', '{}'))
+        body = json.loads(event.get('body') or '{}')
+        action = body.get('action', 'init')
         folder_name = body.get('folder_name')
-        file_content = body.get('file_content')
         original_filename = body.get('filename')
-        
-        # 요청에서 file_content 추출 후 디코딩
-        encoded_file_content = body.get('file_content')
-        # 만약 file_content가 base64 인코딩된 문자열이라면 디코딩
-        file_content = base64.b64decode(encoded_file_content)
+
+        # 일괄 업로드: 폴더 확인 1회 후 파일별 결과를 한 번에 반환
+        if action == 'init' and 'files' in body:
+            files = body.get('files')
+            if not folder_name or not isinstance(files, list) or not files:
+                return make_response(400, {'message': '폴더명과 파일 목록(files)이 필요합니다.'})
+            if len(files) > MAX_BATCH_FILES:
+                return make_response(400, {'message': f'한 번에 최대 {MAX_BATCH_FILES}개 파일까지 업로드할 수 있습니다.'})
+            if not check_folder_exists(folder_name):
+                return make_response(404, {'message': f'폴더 "{folder_name}"를 찾을 수 없습니다.'})
+
+            results = initiate_batch_upload(folder_name, files)
+            succeeded = sum(1 for result in results if result['statusCode'] == 200)
+            return make_response(200, {
+                'folder_name': folder_name,
+                'results': results,
+                'succeeded': succeeded,
+                'failed': len(results) - succeeded
+            })
 
         # 필수 파라미터 검증
-        if not all([folder_name, file_content, original_filename]):
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'message': '폴더명, 파일 내용, 파일명이 모두 필요합니다.'
-                })
-            }
-        
-        # 대상 버킷에서 폴더 존재 여부 확인
-        if not check_folder_exists(folder_name):
-            return {
-                'statusCode': 404,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'message': f'폴더 "{folder_name}"를 찾을 수 없습니다.'
-                })
-            }
-        
-        # 문서명 추출 (확장자 제외)
-        document_name = os.path.splitext(original_filename)[0]
-        
-        # 대상 버킷에 문서 폴더 구조 생성
-        create_document_structure(folder_name, document_name)
-        
-        # 소스 버킷 업로드용 파일명: {folder_name}___{document_name}___{original_filename}
-        upload_filename = f"{folder_name}___{document_name}___{original_filename}"
-        object_key = f'upload/{upload_filename}'
-        
-        try:
-            # 소스 버킷에 파일 업로드
-            s3_client.put_object(
-                Bucket=SOURCE_BUCKET,
-                Key=object_key,
-                Body=file_content,
-                ContentType='application/pdf'  # 현재는 PDF만 지원
-            )
-            
-            print(f"파일 업로드 성공: s3://{SOURCE_BUCKET}/{object_key}")
-            
-            # 생성 시간
-            created_at = datetime.datetime.now().isoformat()
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'message': '파일 업로드 및 문서 구조 생성 성공',
-                    'folder_name': folder_name,
-                    'document_name': document_name,
-                    'filename': original_filename,
-                    'upload_path': object_key,
-                    'created_at': created_at
-                })
-            }
-            
-        except ClientError as e:
-            error_message = f"파일 업로드 중 오류 발생: {str(e)}"
-            print(error_message)
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'message': error_message
-                })
-            }
-            
+        error_message = validate_upload_request(folder_name, original_filename)
+        if error_message:
+            return make_response(400, {'message': error_message})
+
+        if action == 'init':
+            file_size, error_message = parse_file_size(body.get('file_size'))
+            if error_message:
+                return make_response(400, {'message': error_message})
+
+            # 대상 버킷에서 폴더 존재 여부 확인
+            if not check_folder_exists(folder_name):
+                return make_response(404, {'message': f'폴더 "{folder_name}"를 찾을 수 없습니다.'})
+
+            return make_response(200, initiate_upload(folder_name, original_filename, file_size))
+
+        if action in ('complete', 'abort'):
+            upload_id = body.get('upload_id')
+            if not upload_id:
+                return make_response(400, {'message': 'upload_id가 필요합니다.'})
+
+            try:
+                if action == 'complete':
+                    parts, error_message = parse_parts(body.get('parts'))
+                    if error_message:
+                        return make_response(400, {'message': error_message})
+                    return make_response(200, complete_upload(folder_name, original_filename, upload_id, parts))
+                return make_response(200, abort_upload(folder_name, original_filename, upload_id))
+            except ClientError as e:
+                error_code = e.response['Error']['Code']
+                if error_code in ('NoSuchUpload', 'InvalidPart', 'InvalidPartOrder', 'EntityTooSmall'):
+                    return make_response(400, {'message': f'멀티파트 업로드 오류: {error_code}'})
+                raise
+
+        return make_response(400, {'message': f'지원하지 않는 action입니다: {action}'})
+
     except Exception as e:
         error_message = f"Lambda 함수 실행 중 오류 발생: {str(e)}"
         print(error_message)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'message': error_message
-            })
-        }
+        return make_response(500, {'message': error_message})
@@ -0,0 +1,9 @@
+"""
+로컬 개발/측정 도구
+
+- localdev.fakes: S3 / DynamoDB / Upstage / solar-pro 인메모리 대체 구현
+- localdev.runtime: 대체 구현 위에서 lambda/ai_tutor_* 핸들러를 실행하는 LocalRuntime
+- localdev.bench: 오프라인 벤치마크 (python -m localdev.bench)
+- localdev.importtime: 핸들러별 콜드 스타트 import 시간 분석 (실제 패키지 사용)
+- localdev.devserver: 핸들러 전체를 API Gateway 형태 라우트로 띄우는 로컬 개발/부하 테스트 서버
+"""
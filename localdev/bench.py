@@ -0,0 +1,601 @@
+"""
+Lambda 핸들러 오프라인 벤치마크
+
+인메모리 S3 / DynamoDB, 가짜 Upstage document-parse / solar-pro 위에서
+lambda/ai_tutor_* 핸들러를 시나리오별로 실행하고 다음을 측정합니다.
+- wall_ms: 시나리오 전체 실행 시간 (반복 측정 중앙값), invocation_ms: 호출별 p50/p95/max
+- init_ms: 핸들러 모듈 import (콜드 스타트 초기화) 시간
+- calls: AWS/HTTP 호출 수 (작업별), bytes_out / bytes_in: 핸들러가 보낸/받은 바이트
+- peak_memory_kb: 실행 중 Python 힙 최대 증가량 (tracemalloc, 별도 1회 실행)
+
+사용 예:
+    python -m localdev.bench                              # 전체 시나리오
+    python -m localdev.bench -s list_documents_1000       # 일부 시나리오 (여러 번 지정 가능)
+    python -m localdev.bench --output bench.json          # 결과 저장
+    python -m localdev.bench --compare bench.json         # 저장된 결과와 비교 (회귀 시 종료 코드 1)
+    python -m localdev.bench --aws-latency-ms 5 --upstage-latency-ms 2000
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import urllib.parse
+
+from localdev import fakes
+from localdev.runtime import (
+    CHAT_BUCKET, CHAT_TABLE, FOLDER_STATS_TABLE, JOB_TABLE, LLM_QUOTA_TABLE, PROCESSING_QUEUE_URL, SOURCE_BUCKET,
+    STUDY_GUIDE_QUEUE_URL, TARGET_BUCKET, LocalRuntime
+)
+
+SCENARIOS = {}
+
+COMPARED_METRICS = ('wall_ms', 'calls_total', 'bytes_out', 'bytes_in', 'peak_memory_kb')
+
+
+class Scenario:
+    def __init__(self, name, handler, prepare, description, expected_status, runtime_options):
+        self.name = name
+        self.handler = handler
+        self.prepare = prepare
+        self.description = description
+        self.expected_status = expected_status
+        self.runtime_options = runtime_options
+
+
+def scenario(name, handler, expected_status=(200,), **runtime_options):
+    """
+    시나리오 등록 데코레이터
+    prepare(runtime, handler_module) 함수는 시드 데이터를 적재하고 호출할 이벤트 목록을 반환
+    (prepare 안의 호출은 측정에서 제외됨)
+    """
+    def register(prepare):
+        SCENARIOS[name] = Scenario(name, handler, prepare, (prepare.__doc__ or '').strip(),
+                                   expected_status, runtime_options)
+        return prepare
+    return register
+
+
+# 시드 데이터 도우미 ------------------------------------------------------------
+
+def api_event(body=None, path_parameters=None, query=None, headers=None):
+    event = {'headers': headers or {}, 'pathParameters': path_parameters, 'queryStringParameters': query}
+    if body is not None:
+        event['body'] = json.dumps(body, ensure_ascii=False)
+    return event
+
+
+def s3_event(bucket, key):
+    return {'Records': [{'s3': {'bucket': {'name': bucket}, 'object': {'key': key}}}]}
+
+
+def seed_folder(runtime, folder_name, description=''):
+    runtime.s3.seed(TARGET_BUCKET, f'{folder_name}/', b'')
+    runtime.s3.seed(TARGET_BUCKET, f'{folder_name}/metadata.json',
+                    json.dumps({'name': folder_name, 'description': description}, ensure_ascii=False))
+    runtime.dynamodb.Table(FOLDER_STATS_TABLE).seed({
+        'folder_name': folder_name, 'description': description, 'createdAt': '2025-03-01T09:00:00',
+        'documentCount': 0, 'pageCount': 0
+    })
+
+
+def processed_result(runtime, folder_name, document_name, pages):
+    """
+    FakeUpstage 응답을 ai_tutor_process_document와 같은 구조로 변환한 결과 JSON
+    """
+    api_result = runtime.upstage.build_result(fakes.make_pdf(pages))
+    pages_dict = {}
+    for element in api_result['elements']:
+        pages_dict.setdefault(element['page'], []).append({
+            'category': element['category'], 'markdown': element['content']['markdown']
+        })
+    return {
+        'folder_name': folder_name,
+        'document_name': document_name,
+        'original_filename': f'{document_name}.pdf',
+        'created_at': '2025-03-01T09:00:00',
+        'metadata': {
+            'api_version': api_result['api'], 'model': api_result['model'], 'total_pages': pages,
+            'file_type': 'application/pdf', 'indexed': False, 'last_updated': '2025-03-01T09:00:00'
+        },
+        'pages': [{'page': page, 'contents': contents} for page, contents in sorted(pages_dict.items())]
+    }
+
+
+def page_digests(result):
+    """
+    처리 결과 JSON의 페이지별 digest (ai_tutor_process_document의 {문서}_digests.json 구조)
+    """
+    digests = []
+    for page in result['pages']:
+        text = '\n'.join(item['markdown'] for item in page['contents'])
+        digests.append({'page': page['page'], 'digest': fakes.filler_text(text[:200], 160),
+                        'keywords': list(dict.fromkeys(fakes.filler_text(text[:200], 80).split(' ')))[:5]})
+    return {'model': 'solar-pro', 'total_pages': result['metadata']['total_pages'],
+            'created_at': '2025-03-01T09:00:00', 'pages': digests}
+
+
+def seed_processed_document(runtime, folder_name, document_name, pages, digests=False, buckets=(TARGET_BUCKET,)):
+    result = processed_result(runtime, folder_name, document_name, pages)
+    for suffix in ('', 'upload/', 'processed/', 'chat/'):
+        runtime.s3.seed(TARGET_BUCKET, f'{folder_name}/{document_name}/{suffix}', b'')
+    key = f'{folder_name}/{document_name}/processed/{document_name}_result.json'
+    for bucket in buckets:
+        runtime.s3.seed(bucket, key, json.dumps(result, ensure_ascii=False, indent=2),
+                        'application/json', {'total-pages': str(pages)})
+        if digests:
+            runtime.s3.seed(bucket, key[:-len('_result.json')] + '_digests.json',
+                            json.dumps(page_digests(result), ensure_ascii=False), 'application/json')
+    return key
+
+
+# 시나리오 ----------------------------------------------------------------------
+
+@scenario('create_folder', 'ai_tutor_create_folder', expected_status=(201,))
+def create_folder(runtime, handler):
+    """폴더 1개 생성"""
+    return [api_event({'name': '인공지능 개론', 'description': '2025년 1학기'})]
+
+
+@scenario('create_folders_bulk_50', 'ai_tutor_create_folder')
+def create_folders_bulk(runtime, handler):
+    """폴더 50개 일괄 생성"""
+    return [api_event({'folders': [{'name': f'과목 {index:02d}', 'description': '설명'} for index in range(50)]})]
+
+
+@scenario('list_folders_200', 'ai_tutor_list_folders')
+def list_folders(runtime, handler):
+    """폴더 200개 목록 조회"""
+    for index in range(200):
+        seed_folder(runtime, f'과목 {index:03d}', '설명')
+    return [api_event()]
+
+
+@scenario('list_documents_1000', 'ai_tutor_list_documents')
+def list_documents(runtime, handler):
+    """처리 완료 문서 1000개가 있는 폴더의 문서 목록 조회"""
+    seed_folder(runtime, '대형 과목')
+    for index in range(1000):
+        seed_processed_document(runtime, '대형 과목', f'lecture-{index:04d}', 5)
+    return [api_event(path_parameters={'id': '대형 과목'})]
+
+
+@scenario('list_documents_1000_not_modified', 'ai_tutor_list_documents', expected_status=(304,))
+def list_documents_not_modified(runtime, handler):
+    """문서 1000개 폴더를 변경 없이 다시 폴링 (If-None-Match -> 304)"""
+    events = list_documents(runtime, handler)
+    etag = runtime.invoke(handler, events[0])['headers']['ETag']
+    return [api_event(path_parameters={'id': '대형 과목'}, headers={'If-None-Match': etag})]
+
+
+@scenario('upload_document', 'ai_tutor_upload_document')
+def upload_document(runtime, handler):
+    """단일 파일 업로드 URL 발급 (40MB, 멀티파트)"""
+    seed_folder(runtime, '인공지능 개론')
+    return [api_event({'folder_name': '인공지능 개론', 'filename': '1주차.pdf', 'file_size': 40 * 1024 * 1024})]
+
+
+@scenario('upload_document_batch_50', 'ai_tutor_upload_document')
+def upload_document_batch(runtime, handler):
+    """강의 자료 50개 일괄 업로드 URL 발급"""
+    seed_folder(runtime, '인공지능 개론')
+    files = [{'filename': f'{week:02d}주차.pdf', 'file_size': 3 * 1024 * 1024} for week in range(50)]
+    return [api_event({'folder_name': '인공지능 개론', 'files': files})]
+
+
+@scenario('process_document_300_pages', 'ai_tutor_process_document',
+          upstage={'elements_per_page': 6, 'chars_per_element': 500})
+def process_document(runtime, handler):
+    """300페이지 PDF 파싱 및 결과 저장"""
+    seed_folder(runtime, '인공지능 개론')
+    key = 'upload/인공지능 개론___강의노트___강의노트.pdf'
+    runtime.s3.seed(SOURCE_BUCKET, key, fakes.make_pdf(300), 'application/pdf')
+    return [s3_event(SOURCE_BUCKET, key)]
+
+
+@scenario('process_document_reupload_300_pages', 'ai_tutor_process_document',
+          upstage={'elements_per_page': 6, 'chars_per_element': 500})
+def process_document_reupload(runtime, handler):
+    """처리된 300페이지 PDF를 2페이지만 고쳐 다시 업로드 (변경 페이지만 파싱)"""
+    seed_folder(runtime, '인공지능 개론')
+    key = 'upload/인공지능 개론___강의노트___강의노트.pdf'
+    page_texts = [f'Lecture page {number}' for number in range(1, 301)]
+    runtime.s3.seed(SOURCE_BUCKET, key, fakes.make_pdf(page_texts), 'application/pdf')
+    runtime.invoke(handler, s3_event(SOURCE_BUCKET, key))
+    page_texts[41] += ' (fixed typo)'
+    page_texts[199] += ' (fixed typo)'
+    runtime.s3.seed(SOURCE_BUCKET, key, fakes.make_pdf(page_texts), 'application/pdf')
+    return [s3_event(SOURCE_BUCKET, key)]
+
+
+@scenario('process_document_300_pages_digests', 'ai_tutor_process_document',
+          upstage={'elements_per_page': 6, 'chars_per_element': 500}, env={'ENABLE_PAGE_DIGESTS': 'true'})
+def process_document_digests(runtime, handler):
+    """300페이지 PDF 파싱 후 페이지별 digest 생성 (ENABLE_PAGE_DIGESTS)"""
+    return process_document(runtime, handler)
+
+
+JOB_ENV = {'JOB_TABLE': JOB_TABLE}
+
+
+def upload_records(keys):
+    """
+    업로드 키별 S3 ObjectCreated 레코드 (sequencer 포함)
+    """
+    return [{'s3': {'bucket': {'name': SOURCE_BUCKET}, 'object': {'key': key, 'sequencer': f'{index + 1:016X}'}}}
+            for index, key in enumerate(keys)]
+
+
+@scenario('process_document_queue_20', 'ai_tutor_process_document', env=JOB_ENV)
+def process_document_queue(runtime, handler):
+    """처리 큐에 쌓인 20페이지 PDF 20개를 5개씩 묶은 SQS 이벤트로 처리 (작업 상태 기록 포함)"""
+    seed_folder(runtime, '인공지능 개론')
+    keys = [f'upload/인공지능 개론___{week:02d}주차___{week:02d}주차.pdf' for week in range(1, 21)]
+    for key in keys:
+        runtime.s3.seed(SOURCE_BUCKET, key, fakes.make_pdf(20), 'application/pdf')
+    enqueue = runtime.load_handler('ai_tutor_enqueue_document')
+    runtime.invoke(enqueue, {'Records': upload_records(keys)})
+    return list(iter(lambda: runtime.sqs.receive_event(PROCESSING_QUEUE_URL, batch_size=5), None))
+
+
+@scenario('get_job_status_50', 'ai_tutor_get_job_status', env=JOB_ENV)
+def get_job_status(runtime, handler):
+    """작업 2000개 중 50개 상태 조회 (작업 ID당 GetItem 1회)"""
+    table = runtime.dynamodb.Table(JOB_TABLE)
+    for index in range(2000):
+        folder_name, document_name = f'과목 {index // 100:02d}', f'lecture-{index % 100:02d}'
+        table.seed({
+            'job_id': f'{folder_name}/{document_name}', 'upload_id': f'{index:016X}', 'state': 'done',
+            'folder_name': folder_name, 'document_name': document_name, 'attempts': 1,
+            'queued_at': '2025-03-01T09:00:00', 'parsing_at': '2025-03-01T09:00:01',
+            'saving_at': '2025-03-01T09:00:20', 'finished_at': '2025-03-01T09:00:22',
+            'durations': {'queue_ms': 1000, 'parse_ms': 19000, 'save_ms': 2000, 'total_ms': 22000}
+        })
+    return [api_event(path_parameters={'id': urllib.parse.quote(f'과목 {index % 20:02d}/lecture-{index:02d}', safe='')})
+            for index in range(50)]
+
+
+@scenario('get_document_100_pages', 'ai_tutor_get_document')
+def get_document(runtime, handler):
+    """100페이지 문서 요약"""
+    key = seed_processed_document(runtime, '인공지능 개론', '강의노트', 100)
+    return [api_event(query={'document_id': key})]
+
+
+@scenario('get_document_100_pages_digests', 'ai_tutor_get_document')
+def get_document_digests(runtime, handler):
+    """페이지별 digest가 있는 100페이지 문서 요약"""
+    key = seed_processed_document(runtime, '인공지능 개론', '강의노트', 100, digests=True)
+    return [api_event(query={'document_id': key})]
+
+
+def chatbot_events(key):
+    """한 세션의 50턴 대화 이벤트 (5턴마다 페이지 참조 질문)"""
+    events = []
+    for turn in range(50):
+        message = f'{turn % 30 + 1}페이지 내용을 설명해줘' if turn % 5 == 0 else f'질문 {turn}: 정규화가 왜 필요한가요?'
+        events.append(api_event(query={'session_id': 'bench-session', 'message': message, 'document_path': key}))
+    return events
+
+
+QUOTA_ENV = {'LLM_QUOTA_TABLE': LLM_QUOTA_TABLE, 'LLM_TOKENS_PER_MINUTE': '300000', 'LLM_CHAT_MAX_WAIT': '0'}
+
+
+def seed_llm_quota(runtime, tokens):
+    """
+    공유 LLM 한도(토큰 버킷)의 현재 잔량
+    """
+    runtime.dynamodb.Table(LLM_QUOTA_TABLE).seed({
+        'bucket': 'solar-pro', 'tokens': tokens, 'updated_at': round(time.time(), 3), 'waiting': {}
+    })
+
+
+@scenario('get_document_burst_20', 'ai_tutor_get_document', expected_status=(200, 202), env=QUOTA_ENV)
+def get_document_burst(runtime, handler):
+    """시험 전 100페이지 문서 20개 요약 동시 요청 (공유 LLM 한도 초과분은 202 + Retry-After로 보류)"""
+    seed_llm_quota(runtime, 300000)
+    return [api_event(query={'document_id': seed_processed_document(runtime, '인공지능 개론', f'강의노트 {index:02d}', 100)})
+            for index in range(20)]
+
+
+@scenario('chatbot_50_turns_quota_exhausted', 'ai_tutor_chatbot', env=QUOTA_ENV)
+def chatbot_quota_exhausted(runtime, handler):
+    """요약 요청으로 공유 LLM 한도가 소진된 상태에서 50턴 대화 (대화는 우선 처리되어 보류되지 않음)"""
+    seed_llm_quota(runtime, 0)
+    return chatbot(runtime, handler)
+
+
+@scenario('chatbot_50_turns', 'ai_tutor_chatbot')
+def chatbot(runtime, handler):
+    """한 세션에서 50턴 대화 (5턴마다 페이지 참조 질문)"""
+    return chatbot_events(seed_processed_document(runtime, '인공지능 개론', '강의노트', 30,
+                                                  buckets=(TARGET_BUCKET, CHAT_BUCKET)))
+
+
+@scenario('chatbot_50_turns_digests', 'ai_tutor_chatbot')
+def chatbot_digests(runtime, handler):
+    """페이지별 digest가 있는 문서로 50턴 대화 (일반 질문은 관련 페이지 digest로 답변)"""
+    return chatbot_events(seed_processed_document(runtime, '인공지능 개론', '강의노트', 30, digests=True,
+                                                  buckets=(TARGET_BUCKET, CHAT_BUCKET)))
+
+
+def seed_chat_session(runtime, session_id, turns, document_path=None, updated_at='2025-03-01T09:00:00'):
+    """
+    turns턴 분량의 대화 이력을 가진 챗봇 세션 행
+    """
+    messages = []
+    for turn in range(turns):
+        messages.append({'role': 'user', 'content': f'질문 {turn}: 정규화가 왜 필요한가요?'})
+        messages.append({'role': 'assistant', 'content': '## 요약\n' + fakes.filler_text(f'{session_id}-{turn}', 600)})
+    item = {'tt': session_id, 'messages': messages, 'updated_at': updated_at}
+    if document_path:
+        item['document_path'] = document_path
+    runtime.dynamodb.Table(CHAT_TABLE).seed(item)
+
+
+@scenario('chatbot_resume_archived_session', 'ai_tutor_chatbot', env={'HOT_TURNS': '10'})
+def chatbot_resume_archived(runtime, handler):
+    """200턴 중 190턴이 S3로 보관된 세션에서 10턴 대화 (보관 이력은 첫 턴에 한 번만 읽음)"""
+    key = seed_processed_document(runtime, '인공지능 개론', '강의노트', 30, buckets=(TARGET_BUCKET, CHAT_BUCKET))
+    seed_chat_session(runtime, 'bench-session', 200, key)
+    archiver = runtime.load_handler('ai_tutor_archive_chat_sessions')
+    runtime.invoke(archiver, {})
+    return chatbot_events(key)[:10]
+
+
+@scenario('archive_chat_sessions_200', 'ai_tutor_archive_chat_sessions', env={'HOT_TURNS': '10'})
+def archive_chat_sessions(runtime, handler):
+    """대화 40턴씩 쌓인 유휴 세션 200개 보관 (최근 10턴만 DynamoDB에 유지)"""
+    for index in range(200):
+        key = seed_processed_document(runtime, f'과목 {index % 20:02d}', f'lecture-{index // 20:02d}', 1) \
+            if index < 20 else None
+        seed_chat_session(runtime, f'session-{index:03d}', 40, key)
+    return [{}]
+
+
+@scenario('search_folder_20_documents', 'ai_tutor_search')
+def search_folder(runtime, handler):
+    """100페이지 문서 20개가 색인된 폴더에서 검색 50회 (색인은 첫 호출에만 읽고 이후 조건부 GET)"""
+    search_index = handler.search_index  # 핸들러가 사용하는 공통 레이어 모듈
+    index = search_index.empty_index()
+    for document_index in range(20):
+        result = processed_result(runtime, '인공지능 개론', f'{document_index + 1:02d}주차', 100)
+        pages = {page['page']: search_index.page_terms('\n'.join(item['markdown'] for item in page['contents']))
+                 for page in result['pages']}
+        search_index.merge_document(index, f'{document_index + 1:02d}주차', pages, 100, {})
+    runtime.s3.seed(TARGET_BUCKET, search_index.index_key('인공지능 개론'), search_index.encode_index(index),
+                    'application/zlib')
+    queries = ('정규화', '경사 하강법', 'overfitting', '손실 함수', '확률 분포', '학습 데이터 검증', '회귀', '벡터 행렬')
+    return [api_event(path_parameters={'id': '인공지능 개론'}, query={'q': queries[turn % len(queries)]})
+            for turn in range(50)]
+
+
+@scenario('folder_study_guide_12_documents', 'ai_tutor_folder_summary')
+def folder_study_guide(runtime, handler):
+    """30페이지 문서 12개 폴더의 학습 가이드 (요약 4개 재사용, 1개는 재처리로 오래됨, 8개 동시 생성) 후 진행 상황 조회"""
+    for index in range(12):
+        document_name = f'{index + 1:02d}주차'
+        summary_key = f'인공지능 개론/{document_name}/processed/{document_name}_result.md'
+        if index == 4:
+            runtime.s3.seed(TARGET_BUCKET, summary_key, '## 이전 요약\n- 재처리 전', 'text/markdown')
+        seed_processed_document(runtime, '인공지능 개론', document_name, 30, digests=index % 2 == 1)
+        if index < 4:
+            runtime.s3.seed(TARGET_BUCKET, summary_key, '## 요약\n' + fakes.filler_text(document_name, 600),
+                            'text/markdown')
+    event = api_event(path_parameters={'id': '인공지능 개론'})
+    return [{**event, 'httpMethod': 'POST'}, {**event, 'httpMethod': 'GET'}]
+
+
+@scenario('folder_study_guide_queued_12_documents', 'ai_tutor_folder_summary',
+          env={'STUDY_GUIDE_QUEUE_URL': STUDY_GUIDE_QUEUE_URL})
+def folder_study_guide_queued(runtime, handler):
+    """학습 가이드 작업 큐 모드: POST(큐 등록, 측정 제외) 후 SQS 작업자가 생성하고 진행 상황 조회"""
+    events = folder_study_guide(runtime, handler)
+    runtime.invoke(handler, events[0])
+    worker_events = list(iter(lambda: runtime.sqs.receive_event(STUDY_GUIDE_QUEUE_URL, batch_size=1), None))
+    return worker_events + events[1:]
+
+
+@scenario('reconcile_folder_stats_20x10', 'ai_tutor_reconcile_folder_stats')
+def reconcile_folder_stats(runtime, handler):
+    """폴더 20개 x 문서 10개 통계 보정"""
+    for folder_index in range(20):
+        folder_name = f'과목 {folder_index:02d}'
+        seed_folder(runtime, folder_name)
+        for index in range(10):
+            seed_processed_document(runtime, folder_name, f'lecture-{index:02d}', 5)
+    return [{}]
+
+
+# 실행 --------------------------------------------------------------------------
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+def response_status(response):
+    """
+    호출 응답의 상태 코드 (SQS 배치 응답은 실패 항목이 없으면 200, 있으면 207)
+    """
+    if not isinstance(response, dict):
+        return None
+    if 'batchItemFailures' in response:
+        return 207 if response['batchItemFailures'] else 200
+    return response.get('statusCode')
+
+
+def run_once(item, settings, trace_memory=False):
+    options = dict(item.runtime_options)
+    upstage = {**options.pop('upstage', {}), 'latency': settings['upstage_latency']}
+    llm = {**options.pop('llm', {}), 'latency': settings['llm_latency']}
+    with LocalRuntime(aws_latency=settings['aws_latency'], upstage=upstage, llm=llm, **options) as runtime:
+        with runtime.recorder.pause():
+            started = time.perf_counter()
+            handler = runtime.load_handler(item.handler)
+            init_ms = (time.perf_counter() - started) * 1000
+            events = item.prepare(runtime, handler)
+        runtime.recorder.reset()
+
+        if trace_memory:
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+        invocation_ms = []
+        status_codes = []
+        started = time.perf_counter()
+        for event in events:
+            invoked = time.perf_counter()
+            response = runtime.invoke(handler, event)
+            invocation_ms.append((time.perf_counter() - invoked) * 1000)
+            status_codes.append(response_status(response))
+        wall_ms = (time.perf_counter() - started) * 1000
+        peak_kb = None
+        if trace_memory:
+            peak_kb = (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+            tracemalloc.stop()
+        return {
+            'init_ms': init_ms,
+            'wall_ms': wall_ms,
+            'invocation_ms': invocation_ms,
+            'status_codes': status_codes,
+            'peak_memory_kb': peak_kb,
+            **runtime.recorder.snapshot()
+        }
+
+
+def run_scenario(item, settings):
+    output = io.StringIO()
+    with contextlib.ExitStack() as stack:
+        if not settings['verbose']:
+            stack.enter_context(contextlib.redirect_stdout(output))
+            stack.enter_context(contextlib.redirect_stderr(output))
+        runs = [run_once(item, settings) for _ in range(settings['repeat'])]
+        memory_run = run_once(item, settings, trace_memory=True)
+
+    first = runs[0]
+    invocation_ms = [value for run in runs for value in run['invocation_ms']]
+    unexpected = sorted({code for code in first['status_codes'] if code not in item.expected_status},
+                        key=str)
+    return {
+        'scenario': item.name,
+        'handler': item.handler,
+        'description': item.description,
+        'ok': not unexpected,
+        'unexpected_status_codes': unexpected,
+        'invocations': len(first['status_codes']),
+        'wall_ms': round(statistics.median(run['wall_ms'] for run in runs), 3),
+        'wall_ms_min': round(min(run['wall_ms'] for run in runs), 3),
+        'init_ms': round(statistics.median(run['init_ms'] for run in runs), 3),
+        'invocation_ms': {
+            'p50': round(percentile(invocation_ms, 0.5), 3),
+            'p95': round(percentile(invocation_ms, 0.95), 3),
+            'max': round(max(invocation_ms), 3)
+        },
+        'calls_total': first['calls_total'],
+        'calls': first['calls'],
+        'bytes_out': first['bytes_out'],
+        'bytes_in': first['bytes_in'],
+        'bytes_by_call': first['bytes_by_call'],
+        'llm_tokens': first['llm_tokens'],
+        'peak_memory_kb': round(memory_run['peak_memory_kb'], 1)
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """
+    기준 결과 대비 변화율 출력
+    반환값: 임계값을 넘은 회귀 목록
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {entry['scenario']: entry for entry in json.load(f)['results']}
+
+    regressions = []
+    print(f"\n기준 결과와 비교: {baseline_path} (회귀 임계값 {threshold:.0%})", file=sys.stderr)
+    for result in results:
+        previous = baseline.get(result['scenario'])
+        if previous is None:
+            print(f"  {result['scenario']}: 기준 결과 없음", file=sys.stderr)
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            ratio = (after - before) / before if before else (0.0 if after == before else float('inf'))
+            changes.append(f"{metric} {before:g} -> {after:g} ({ratio:+.1%})")
+            if ratio > threshold:
+                regressions.append((result['scenario'], metric, before, after))
+        print(f"  {result['scenario']}: " + ', '.join(changes), file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lambda 핸들러 오프라인 벤치마크')
+    parser.add_argument('-s', '--scenario', action='append', help='실행할 시나리오 (기본: 전체)')
+    parser.add_argument('--list', action='store_true', help='시나리오 목록 출력')
+    parser.add_argument('--repeat', type=int, default=3, help='시간 측정 반복 횟수 (기본 3)')
+    parser.add_argument('--aws-latency-ms', type=float, default=0.0, help='AWS 호출당 지연 (ms)')
+    parser.add_argument('--upstage-latency-ms', type=float, default=0.0, help='Upstage 호출당 지연 (ms)')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='solar-pro 호출당 지연 (ms)')
+    parser.add_argument('--output', help='결과 JSON 저장 경로 (기본: 표준 출력)')
+    parser.add_argument('--compare', help='비교할 기준 결과 JSON 경로')
+    parser.add_argument('--threshold', type=float, default=0.2, help='회귀로 판단할 증가율 (기본 0.2 = 20%%)')
+    parser.add_argument('--verbose', action='store_true', help='핸들러 로그 출력')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for item in SCENARIOS.values():
+            print(f"{item.name:40s} {item.handler:35s} {item.description}")
+        return 0
+
+    names = args.scenario or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+
+    settings = {
+        'repeat': max(1, args.repeat),
+        'aws_latency': args.aws_latency_ms / 1000,
+        'upstage_latency': args.upstage_latency_ms / 1000,
+        'llm_latency': args.llm_latency_ms / 1000,
+        'verbose': args.verbose
+    }
+
+    results = []
+    for name in names:
+        result = run_scenario(SCENARIOS[name], settings)
+        results.append(result)
+        print(f"{name:40s} {'ok ' if result['ok'] else 'ERR'} wall {result['wall_ms']:10.1f} ms  "
+              f"calls {result['calls_total']:6d}  out {result['bytes_out']:>10d} B  in {result['bytes_in']:>10d} B  "
+              f"peak {result['peak_memory_kb']:10.1f} KB", file=sys.stderr)
+
+    report = {
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'settings': {key: value for key, value in settings.items() if key != 'verbose'},
+        'results': results
+    }
+    serialized = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(serialized + '\n')
+    else:
+        print(serialized)
+
+    exit_code = 0 if all(result['ok'] for result in results) else 1
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for scenario_name, metric, before, after in regressions:
+            print(f"회귀: {scenario_name} {metric} {before:g} -> {after:g}", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
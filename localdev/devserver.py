@@ -0,0 +1,497 @@
+"""
+여러 Lambda 핸들러를 하나의 로컬 HTTP 서버로 띄우는 개발/부하 테스트용 서버
+
+API Gateway 프록시 통합과 같은 형태의 이벤트를 만들어 핸들러를 호출하고,
+S3 업로드 트리거(ai_tutor_process_document, --queue-mode면 ai_tutor_enqueue_document -> SQS -> 작업자)도 흉내 냅니다.
+모든 백엔드(S3 / DynamoDB / Upstage / solar-pro)는 LocalRuntime의 인메모리 대체 구현입니다.
+
+사용 예:
+    python -m localdev.devserver --port 8000 --workers 16
+    python -m localdev.devserver --seed-documents 20 --llm-latency-ms 800 --aws-latency-ms 5
+    python -m localdev.devserver --queue-mode --event-workers 4 --upstage-latency-ms 2000
+
+라우트 (API Gateway 설정은 저장소에 없으므로 로컬 기본 경로):
+    POST /folders                   ai_tutor_create_folder
+    GET  /folders                   ai_tutor_list_folders
+    GET  /folders/{id}/documents    ai_tutor_list_documents
+    GET  /folders/{id}/search?q=    ai_tutor_search
+    POST /folders/{id}/study-guide  ai_tutor_folder_summary (GET: 진행 상황)
+    POST /documents/upload          ai_tutor_upload_document
+    GET  /documents?document_id=    ai_tutor_get_document
+    GET  /chat?session_id=&message= ai_tutor_chatbot
+    GET  /jobs/{id}                 ai_tutor_get_job_status (id: URL 인코딩한 "{folder}/{document}")
+
+로컬 전용 라우트:
+    PUT  /_local/s3/{bucket}/{key}  객체 저장 (presigned 업로드 대체, 본문이 없으면 ?pages=N 크기의 PDF 생성)
+                                    소스 버킷의 upload/ 객체면 ai_tutor_process_document를 비동기로 트리거
+                                    (--queue-mode: 처리 큐에 넣고 --event-workers개 작업자가 큐를 소비,
+                                     5xx 실패는 JOB_MAX_ATTEMPTS번까지 재시도 후 DLQ로 이동,
+                                     학습 가이드 POST도 작업 큐에 넣고 같은 작업자가 생성)
+    POST /_local/s3-events          {"bucket": ..., "key": ...} 기존 객체에 대한 S3 트리거 재실행
+    GET  /_local/stats              라우트별 요청 수, 처리량, 지연 시간 분포(p50/p95/p99), 대기 시간, 콜드 스타트
+    POST /_local/stats/reset        통계 초기화 (워밍업 후 측정 시작)
+
+요청은 --workers 크기의 작업자 풀에서 처리됩니다. 작업자마다 핸들러 모듈을 따로 import 하므로
+Lambda 실행 환경(컨테이너)처럼 작업자별 첫 요청이 콜드 스타트가 됩니다.
+"""
+import argparse
+import base64
+import concurrent.futures
+import http.server
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+
+from localdev import fakes
+from localdev.bench import percentile, s3_event, seed_folder, seed_processed_document
+from localdev.runtime import (
+    CHAT_BUCKET, JOB_TABLE, PROCESSING_DLQ_URL, PROCESSING_QUEUE_URL, SOURCE_BUCKET, STUDY_GUIDE_QUEUE_URL, TARGET_BUCKET,
+    LocalRuntime
+)
+
+ROUTES = (
+    ('POST', '/folders', 'ai_tutor_create_folder'),
+    ('GET', '/folders', 'ai_tutor_list_folders'),
+    ('GET', '/folders/{id}/documents', 'ai_tutor_list_documents'),
+    ('GET', '/folders/{id}/search', 'ai_tutor_search'),
+    ('POST', '/folders/{id}/study-guide', 'ai_tutor_folder_summary'),
+    ('GET', '/folders/{id}/study-guide', 'ai_tutor_folder_summary'),
+    ('POST', '/documents/upload', 'ai_tutor_upload_document'),
+    ('GET', '/documents', 'ai_tutor_get_document'),
+    ('GET', '/chat', 'ai_tutor_chatbot'),
+    ('GET', '/jobs/{id}', 'ai_tutor_get_job_status'),
+)
+
+S3_TRIGGER_HANDLER = 'ai_tutor_process_document'
+S3_TRIGGER_ROUTE = 'S3 ObjectCreated'
+ENQUEUE_HANDLER = 'ai_tutor_enqueue_document'  # --queue-mode의 S3 트리거
+QUEUE_ROUTE = 'SQS 처리 큐'
+QUEUE_BATCH_SIZE = 1  # 이벤트 소스 매핑 BatchSize (문서 처리는 호출 하나가 길어 1개씩)
+STUDY_GUIDE_HANDLER = 'ai_tutor_folder_summary'  # --queue-mode에서는 학습 가이드 작업 큐도 소비
+SEED_FOLDER = '샘플 과목'
+
+
+def compile_route(template):
+    pattern = re.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)', re.escape(template))
+    return re.compile(f'^{pattern}$')
+
+
+COMPILED_ROUTES = [(method, template, compile_route(template), handler) for method, template, handler in ROUTES]
+
+
+def match_route(method, path):
+    """
+    반환값: (라우트 템플릿, 핸들러 이름, 경로 파라미터) 또는 None
+    """
+    for route_method, template, pattern, handler in COMPILED_ROUTES:
+        match = pattern.match(path)
+        if match and route_method == method:
+            parameters = {name: urllib.parse.unquote(value) for name, value in match.groupdict().items()}
+            return template, handler, parameters or None
+    return None
+
+
+def proxy_event(method, template, path, query, headers, body, path_parameters):
+    """
+    API Gateway REST API 프록시 통합 이벤트 (payload 1.0) 형태로 변환
+    """
+    query_parameters = {name: values[-1] for name, values in query.items()}
+    return {
+        'resource': template,
+        'path': path,
+        'httpMethod': method,
+        'headers': headers,
+        'multiValueHeaders': {name: [value] for name, value in headers.items()},
+        'queryStringParameters': query_parameters or None,
+        'multiValueQueryStringParameters': query or None,
+        'pathParameters': path_parameters,
+        'stageVariables': None,
+        'requestContext': {
+            'requestId': str(uuid.uuid4()),
+            'stage': 'local',
+            'resourcePath': template,
+            'httpMethod': method,
+            'path': path,
+            'requestTimeEpoch': int(time.time() * 1000)
+        },
+        'body': body.decode('utf-8') if body else None,
+        'isBase64Encoded': False
+    }
+
+
+class Stats:
+    """
+    라우트별 처리량 / 지연 시간 집계
+    - latency_ms: 핸들러 실행 시간, queue_ms: 연결 수락 후 작업자가 잡기까지 대기한 시간
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.perf_counter()
+            self.routes = {}
+
+    def record(self, route, status_code, latency_ms, queue_ms=0.0, cold_start=False):
+        with self.lock:
+            entry = self.routes.setdefault(route, {
+                'latency_ms': [], 'queue_ms': [], 'status_codes': {}, 'cold_starts': 0
+            })
+            entry['latency_ms'].append(latency_ms)
+            entry['queue_ms'].append(queue_ms)
+            entry['status_codes'][str(status_code)] = entry['status_codes'].get(str(status_code), 0) + 1
+            entry['cold_starts'] += int(cold_start)
+
+    @staticmethod
+    def distribution(values):
+        return {
+            'p50': round(percentile(values, 0.5), 3),
+            'p95': round(percentile(values, 0.95), 3),
+            'p99': round(percentile(values, 0.99), 3),
+            'max': round(max(values), 3)
+        }
+
+    def summary(self):
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            routes = {route: {**entry, 'latency_ms': list(entry['latency_ms']), 'queue_ms': list(entry['queue_ms'])}
+                      for route, entry in self.routes.items()}
+
+        result = {'elapsed_s': round(elapsed, 3), 'routes': {}}
+        all_latencies = []
+        for route, entry in sorted(routes.items()):
+            requests_count = len(entry['latency_ms'])
+            errors = sum(count for code, count in entry['status_codes'].items() if not code.isdigit() or int(code) >= 500)
+            all_latencies.extend(entry['latency_ms'])
+            result['routes'][route] = {
+                'requests': requests_count,
+                'errors': errors,
+                'throughput_rps': round(requests_count / elapsed, 3) if elapsed else 0.0,
+                'status_codes': entry['status_codes'],
+                'cold_starts': entry['cold_starts'],
+                'latency_ms': self.distribution(entry['latency_ms']),
+                'queue_ms': self.distribution(entry['queue_ms'])
+            }
+        result['requests'] = len(all_latencies)
+        result['throughput_rps'] = round(len(all_latencies) / elapsed, 3) if elapsed else 0.0
+        if all_latencies:
+            result['latency_ms'] = self.distribution(all_latencies)
+        return result
+
+
+class DevServer(http.server.HTTPServer):
+    """
+    연결을 고정 크기 작업자 풀에서 처리하는 HTTP 서버
+    (ThreadingHTTPServer처럼 요청마다 스레드를 만들지 않으므로 동시 처리 수가 --workers로 제한됨)
+    """
+    request_queue_size = 256
+
+    def __init__(self, address, runtime, workers, event_workers):
+        super().__init__(address, RequestHandler)
+        self.runtime = runtime
+        self.stats = Stats()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        self.event_executor = concurrent.futures.ThreadPoolExecutor(max_workers=event_workers,
+                                                                    thread_name_prefix='s3-event')
+        self.containers = threading.local()
+        self.access_log = False
+        self.queue_mode = False
+        self.queue_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_in_worker, request, client_address, time.perf_counter())
+
+    def process_request_in_worker(self, request, client_address, accepted_at):
+        self.containers.accepted_at = accepted_at
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+        self.event_executor.shutdown(wait=True)
+
+    # 핸들러 실행 ------------------------------------------------------------
+    def get_handler(self, name):
+        """
+        작업자 스레드별 핸들러 모듈 (첫 호출 시 import = 콜드 스타트)
+        반환값: (모듈, 콜드 스타트 여부)
+        """
+        modules = getattr(self.containers, 'modules', None)
+        if modules is None:
+            modules = self.containers.modules = {}
+        if name in modules:
+            return modules[name], False
+        modules[name] = self.runtime.load_handler(name)
+        return modules[name], True
+
+    def invoke(self, name, event):
+        """
+        반환값: (핸들러 응답 또는 None, 실행 시간 ms, 콜드 스타트 여부)
+        """
+        started = time.perf_counter()
+        try:
+            module, cold_start = self.get_handler(name)
+            response = self.runtime.invoke(module, event, fakes.FakeLambdaContext(name))
+        except Exception as e:
+            print(f"핸들러 실행 오류 ({name}): {type(e).__name__}: {e}", file=sys.stderr)
+            response, cold_start = None, False
+        return response, (time.perf_counter() - started) * 1000, cold_start
+
+    def trigger_s3_event(self, bucket, key):
+        """
+        S3 ObjectCreated 알림처럼 ai_tutor_process_document를 비동기로 호출
+        (--queue-mode: ai_tutor_enqueue_document로 처리 큐에 넣은 뒤 큐 소비)
+        """
+        event = s3_event(bucket, urllib.parse.quote_plus(key, safe='/'))
+        handler_name = ENQUEUE_HANDLER if self.queue_mode else S3_TRIGGER_HANDLER
+        queued_at = time.perf_counter()
+
+        def run():
+            queue_ms = (time.perf_counter() - queued_at) * 1000
+            response, latency_ms, cold_start = self.invoke(handler_name, event)
+            status_code = response.get('statusCode') if isinstance(response, dict) else None
+            self.stats.record(S3_TRIGGER_ROUTE, status_code, latency_ms, queue_ms, cold_start)
+            if self.access_log:
+                print(f"{S3_TRIGGER_ROUTE} {bucket}/{key} -> {status_code} ({latency_ms:.1f} ms)", file=sys.stderr)
+            if self.queue_mode:
+                self.poll_queue()
+
+        self.event_executor.submit(run)
+
+    def poll_queue(self, queue_url=PROCESSING_QUEUE_URL, handler_name=S3_TRIGGER_HANDLER):
+        """
+        SQS 이벤트 소스 매핑처럼 큐의 보이는 메시지를 핸들러 호출로 넘김
+        (처리 큐 -> ai_tutor_process_document, 학습 가이드 작업 큐 -> ai_tutor_folder_summary)
+        (동시 처리 수는 --event-workers, 실패 항목은 다시 보이게 되어 다음 폴링에서 재시도)
+        """
+        with self.queue_lock:
+            events = list(iter(lambda: self.runtime.sqs.receive_event(queue_url, QUEUE_BATCH_SIZE), None))
+
+        def run(event, queued_at):
+            queue_ms = (time.perf_counter() - queued_at) * 1000
+            response, latency_ms, cold_start = self.invoke(handler_name, event)
+            error = None if isinstance(response, dict) else RuntimeError('핸들러 실행 오류')
+            failed = self.runtime.sqs.complete_event(queue_url, event, response, error)
+            status_code = (207 if failed else 200) if isinstance(response, dict) else None
+            self.stats.record(QUEUE_ROUTE, status_code, latency_ms, queue_ms, cold_start)
+            if self.access_log:
+                print(f"{QUEUE_ROUTE} {len(event['Records'])}건 -> 실패 {len(failed)}건 ({latency_ms:.1f} ms)",
+                      file=sys.stderr)
+            # 실패 항목, 또는 학습 가이드 작업자가 남은 문서로 다시 넣은 작업 소비
+            if failed or queue_url == STUDY_GUIDE_QUEUE_URL:
+                self.poll_queue(queue_url, handler_name)
+
+        for event in events:
+            self.event_executor.submit(run, event, time.perf_counter())
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    server_version = 'ai-tutor-devserver'
+
+    def do_GET(self):
+        self.dispatch()
+
+    def do_POST(self):
+        self.dispatch()
+
+    def do_PUT(self):
+        self.dispatch()
+
+    def do_DELETE(self):
+        self.dispatch()
+
+    def log_message(self, format, *args):
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def send_json(self, status_code, payload, headers=None):
+        self.send_body(status_code, json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+                       {'Content-Type': 'application/json', **(headers or {})})
+
+    def send_body(self, status_code, body, headers):
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, str(value))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def dispatch(self):
+        queue_ms = (time.perf_counter() - self.server.containers.accepted_at) * 1000
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query, keep_blank_values=True)
+        body = self.read_body()
+
+        if url.path.startswith('/_local/'):
+            return self.dispatch_local(url.path, query, body)
+
+        matched = match_route(self.command, url.path)
+        if matched is None:
+            return self.send_json(404, {'message': 'Not Found'})
+        template, handler_name, path_parameters = matched
+
+        event = proxy_event(self.command, template, url.path, query, dict(self.headers.items()), body, path_parameters)
+        response, latency_ms, cold_start = self.server.invoke(handler_name, event)
+        route = f'{self.command} {template}'
+        if not isinstance(response, dict) or 'statusCode' not in response:
+            # API Gateway는 핸들러 오류 / 잘못된 응답 형식을 502로 반환
+            self.server.stats.record(route, 502, latency_ms, queue_ms, cold_start)
+            return self.send_json(502, {'message': 'Internal server error'})
+
+        self.server.stats.record(route, response['statusCode'], latency_ms, queue_ms, cold_start)
+        if self.server.queue_mode and handler_name == STUDY_GUIDE_HANDLER and response['statusCode'] == 202:
+            self.server.event_executor.submit(self.server.poll_queue, STUDY_GUIDE_QUEUE_URL, STUDY_GUIDE_HANDLER)
+        headers = dict(response.get('headers') or {})
+        for name, values in (response.get('multiValueHeaders') or {}).items():
+            headers[name] = ', '.join(map(str, values))
+        headers['X-Local-Latency-Ms'] = f'{latency_ms:.3f}'
+        headers['X-Local-Cold-Start'] = str(cold_start).lower()
+        response_body = response.get('body') or ''
+        if response.get('isBase64Encoded'):
+            response_body = base64.b64decode(response_body)
+        elif isinstance(response_body, str):
+            response_body = response_body.encode('utf-8')
+        self.send_body(response['statusCode'], response_body, headers)
+
+    def dispatch_local(self, path, query, body):
+        if path == '/_local/stats' and self.command == 'GET':
+            return self.send_json(200, self.server.stats.summary())
+
+        if path == '/_local/stats/reset' and self.command == 'POST':
+            self.server.stats.reset()
+            return self.send_json(200, {'message': 'reset'})
+
+        if path.startswith('/_local/s3/') and self.command == 'PUT':
+            bucket, _, key = urllib.parse.unquote(path[len('/_local/s3/'):]).partition('/')
+            if not key:
+                return self.send_json(400, {'message': '경로는 /_local/s3/{bucket}/{key} 형식이어야 합니다.'})
+            if not body:
+                body = fakes.make_pdf(int(query.get('pages', ['10'])[-1]))
+            self.server.runtime.s3.simulate_presigned_upload(
+                bucket, key, body, self.headers.get('Content-Type') or 'application/pdf')
+            triggered = bucket == SOURCE_BUCKET and key.startswith('upload/')
+            if triggered:
+                self.server.trigger_s3_event(bucket, key)
+            return self.send_json(200, {'bucket': bucket, 'key': key, 'size': len(body), 'triggered': triggered})
+
+        if path == '/_local/s3-events' and self.command == 'POST':
+            try:
+                request = json.loads(body or b'{}')
+                bucket, key = request.get('bucket', SOURCE_BUCKET), request['key']
+            except (ValueError, KeyError):
+                return self.send_json(400, {'message': '요청 본문은 {"bucket": ..., "key": ...} 형식이어야 합니다.'})
+            self.server.trigger_s3_event(bucket, key)
+            return self.send_json(202, {'bucket': bucket, 'key': key, 'triggered': True})
+
+        return self.send_json(404, {'message': 'Not Found'})
+
+
+def seed_documents(runtime, count, pages):
+    """
+    부하 테스트용 샘플 폴더와 처리 완료 문서 적재 (ai_tutor_chatbot이 읽는 버킷에도 복사)
+    """
+    seed_folder(runtime, SEED_FOLDER, '로컬 부하 테스트용 폴더')
+    for index in range(count):
+        key = seed_processed_document(runtime, SEED_FOLDER, f'lecture-{index:03d}', pages)
+        runtime.s3.seed(CHAT_BUCKET, key, runtime.s3.read(TARGET_BUCKET, key), 'application/json')
+
+
+def print_summary(summary, file=sys.stderr):
+    print(f"\n{summary['requests']}건, {summary['elapsed_s']:.1f}초, {summary['throughput_rps']:.1f} req/s", file=file)
+    for route, entry in summary['routes'].items():
+        latency = entry['latency_ms']
+        print(f"  {route:35s} {entry['requests']:7d}건  {entry['throughput_rps']:8.1f} req/s  "
+              f"p50 {latency['p50']:8.1f}  p95 {latency['p95']:8.1f}  p99 {latency['p99']:8.1f}  max {latency['max']:8.1f} ms  "
+              f"대기 p95 {entry['queue_ms']['p95']:7.1f} ms  오류 {entry['errors']}  콜드 스타트 {entry['cold_starts']}",
+              file=file)
+
+
+def stop_server(signum, frame):
+    # SIGTERM(백그라운드 실행 후 kill)도 Ctrl+C와 같이 통계를 출력하고 종료
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lambda 핸들러 로컬 개발/부하 테스트 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=8, help='API 요청 작업자 수 (동시 실행 환경 수, 기본 8)')
+    parser.add_argument('--event-workers', type=int, default=2, help='S3 트리거 작업자 수 (기본 2)')
+    parser.add_argument('--aws-latency-ms', type=float, default=0.0, help='AWS 호출당 지연 (ms)')
+    parser.add_argument('--upstage-latency-ms', type=float, default=0.0, help='Upstage 호출당 지연 (ms)')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='solar-pro 호출당 지연 (ms)')
+    parser.add_argument('--seed-documents', type=int, default=0, help=f"'{SEED_FOLDER}' 폴더에 적재할 처리 완료 문서 수")
+    parser.add_argument('--seed-pages', type=int, default=20, help='적재 문서당 페이지 수 (기본 20)')
+    parser.add_argument('--stats-output', help='종료 시 통계 JSON 저장 경로')
+    parser.add_argument('--queue-mode', action='store_true',
+                        help='업로드와 학습 가이드 생성을 작업 큐(SQS)를 거쳐 처리 (ai_tutor_enqueue_document -> ai_tutor_process_document)')
+    parser.add_argument('--access-log', action='store_true', help='요청별 접근 로그 출력')
+    parser.add_argument('--verbose', action='store_true', help='핸들러 로그(표준 출력) 표시')
+    args = parser.parse_args(argv)
+
+    runtime_options = {
+        'env': {'JOB_TABLE': JOB_TABLE, **({'STUDY_GUIDE_QUEUE_URL': STUDY_GUIDE_QUEUE_URL} if args.queue_mode else {})},
+        'aws_latency': args.aws_latency_ms / 1000,
+        'upstage': {'latency': args.upstage_latency_ms / 1000},
+        'llm': {'latency': args.llm_latency_ms / 1000}
+    }
+    stdout = sys.stdout
+    if not args.verbose:
+        sys.stdout = open(os.devnull, 'w')
+
+    try:
+        with LocalRuntime(**runtime_options) as runtime:
+            if args.seed_documents:
+                with runtime.recorder.pause():
+                    seed_documents(runtime, args.seed_documents, args.seed_pages)
+
+            server = DevServer((args.host, args.port), runtime, max(1, args.workers), max(1, args.event_workers))
+            server.access_log = args.access_log
+            server.queue_mode = args.queue_mode
+            runtime.sqs.set_redrive_policy(PROCESSING_QUEUE_URL, PROCESSING_DLQ_URL,
+                                           int(runtime.env.get('JOB_MAX_ATTEMPTS', '3')))
+            print(f"http://{args.host}:{server.server_address[1]} (작업자 {args.workers}개, "
+                  f"S3 트리거 작업자 {args.event_workers}개) - Ctrl+C로 종료", file=sys.stderr)
+            for method, template, handler in ROUTES:
+                print(f"  {method:6s} {template:30s} {handler}", file=sys.stderr)
+            signal.signal(signal.SIGTERM, stop_server)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+
+            summary = server.stats.summary()
+            print_summary(summary)
+            if args.stats_output:
+                with open(args.stats_output, 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, ensure_ascii=False, indent=2)
+                    f.write('\n')
+    finally:
+        if sys.stdout is not stdout:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+DynamoDB 표현식(ConditionExpression / UpdateExpression / FilterExpression) 간이 해석기
+
+FakeDynamoDB에서 사용하며, 핸들러가 사용하는 범위의 문법만 지원합니다.
+- 조건: AND / OR / NOT / 괄호, = <> < <= > >=, BETWEEN,
+        attribute_exists, attribute_not_exists, contains, begins_with, size
+- 갱신: SET (+, -, if_not_exists, list_append), ADD, REMOVE, DELETE
+"""
+import re
+from decimal import Decimal
+
+TOKEN_RE = re.compile(
+    r"\s*(?:(<>|<=|>=|=|<|>|\(|\)|,|\+|-)|([#:]?[A-Za-z_][A-Za-z0-9_]*(?:\.[#]?[A-Za-z_][A-Za-z0-9_]*)*))"
+)
+
+KEYWORDS = {'AND', 'OR', 'NOT', 'BETWEEN', 'SET', 'ADD', 'REMOVE', 'DELETE'}
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = TOKEN_RE.match(expression, position)
+        if not match or match.end() == position:
+            raise ExpressionError(f"표현식 해석 실패: {expression[position:]!r}")
+        operator, word = match.groups()
+        if operator:
+            tokens.append(('op', operator))
+        elif word.upper() in KEYWORDS:
+            tokens.append(('kw', word.upper()))
+        else:
+            tokens.append(('name', word))
+        position = match.end()
+    return tokens
+
+
+def to_number(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    return value
+
+
+class Parser:
+    def __init__(self, expression, names=None, values=None):
+        self.tokens = tokenize(expression)
+        self.index = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    # 토큰 처리 ---------------------------------------------------------------
+    def peek(self, offset=0):
+        position = self.index + offset
+        return self.tokens[position] if position < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            raise ExpressionError(f"예상하지 못한 토큰: {token} (기대값: {kind} {value})")
+        self.index += 1
+        return token
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.index += 1
+            return True
+        return False
+
+    def done(self):
+        return self.index >= len(self.tokens)
+
+    # 경로 / 값 ---------------------------------------------------------------
+    def path(self, word):
+        parts = []
+        for part in word.split('.'):
+            if part.startswith('#'):
+                if part not in self.names:
+                    raise ExpressionError(f"ExpressionAttributeNames에 없는 이름: {part}")
+                part = self.names[part]
+            parts.append(part)
+        return tuple(parts)
+
+    def value(self, word):
+        if word not in self.values:
+            raise ExpressionError(f"ExpressionAttributeValues에 없는 값: {word}")
+        return to_number(self.values[word])
+
+
+def get_path(item, path):
+    current = item
+    for part in path:
+        if not isinstance(current, dict) or part not in current:
+            return None, False
+        current = current[part]
+    return current, True
+
+
+def set_path(item, path, value):
+    current = item
+    for part in path[:-1]:
+        current = current.setdefault(part, {})
+    current[path[-1]] = value
+
+
+def remove_path(item, path):
+    current = item
+    for part in path[:-1]:
+        current = current.get(part)
+        if not isinstance(current, dict):
+            return
+    current.pop(path[-1], None)
+
+
+# 조건식 ----------------------------------------------------------------------
+
+class ConditionParser(Parser):
+    """
+    조건식을 (item -> bool) 함수로 변환
+    """
+
+    def parse(self):
+        if self.done():
+            return lambda item: True
+        predicate = self.parse_or()
+        if not self.done():
+            raise ExpressionError(f"해석되지 않은 토큰: {self.tokens[self.index:]}")
+        return predicate
+
+    def parse_or(self):
+        left = self.parse_and()
+        while self.accept('kw', 'OR'):
+            right = self.parse_and()
+            left = (lambda a, b: lambda item: a(item) or b(item))(left, right)
+        return left
+
+    def parse_and(self):
+        left = self.parse_not()
+        while self.accept('kw', 'AND'):
+            right = self.parse_not()
+            left = (lambda a, b: lambda item: a(item) and b(item))(left, right)
+        return left
+
+    def parse_not(self):
+        if self.accept('kw', 'NOT'):
+            inner = self.parse_not()
+            return lambda item: not inner(item)
+        return self.parse_primary()
+
+    def parse_primary(self):
+        if self.accept('op', '('):
+            inner = self.parse_or()
+            self.take('op', ')')
+            return inner
+
+        kind, word = self.peek()
+        if kind == 'name' and self.peek(1) == ('op', '(') and word in (
+                'attribute_exists', 'attribute_not_exists', 'contains', 'begins_with'):
+            self.take()
+            self.take('op', '(')
+            target = self.path(self.take('name')[1])
+            operand = None
+            if self.accept('op', ','):
+                operand = self.parse_operand()
+            self.take('op', ')')
+            return self.function(word, target, operand)
+
+        left = self.parse_operand()
+        if self.accept('kw', 'BETWEEN'):
+            low = self.parse_operand()
+            self.take('kw', 'AND')
+            high = self.parse_operand()
+            return lambda item: compare(left(item), '>=', low(item)) and compare(left(item), '<=', high(item))
+        operator = self.take('op')[1]
+        right = self.parse_operand()
+        return lambda item: compare(left(item), operator, right(item))
+
+    def parse_operand(self):
+        kind, word = self.take('name')
+        if word == 'size' and self.accept('op', '('):
+            target = self.path(self.take('name')[1])
+            self.take('op', ')')
+
+            def size(item):
+                value, found = get_path(item, target)
+                return Decimal(len(value)) if found else None
+            return size
+        if word.startswith(':'):
+            value = self.value(word)
+            return lambda item: value
+        target = self.path(word)
+        return lambda item: get_path(item, target)[0]
+
+    def function(self, name, target, operand):
+        if name == 'attribute_exists':
+            return lambda item: get_path(item, target)[1]
+        if name == 'attribute_not_exists':
+            return lambda item: not get_path(item, target)[1]
+        if name == 'contains':
+            def contains(item):
+                value, found = get_path(item, target)
+                return found and value is not None and operand(item) in value
+            return contains
+
+        def begins_with(item):
+            value, found = get_path(item, target)
+            return found and isinstance(value, str) and value.startswith(operand(item))
+        return begins_with
+
+
+def compare(left, operator, right):
+    if left is None or right is None:
+        return operator == '<>' and left != right
+    if operator == '=':
+        return left == right
+    if operator == '<>':
+        return left != right
+    try:
+        if operator == '<':
+            return left < right
+        if operator == '<=':
+            return left <= right
+        if operator == '>':
+            return left > right
+        if operator == '>=':
+            return left >= right
+    except TypeError:
+        return False
+    raise ExpressionError(f"지원하지 않는 비교 연산자: {operator}")
+
+
+def evaluate_condition(expression, item, names=None, values=None):
+    if not expression:
+        return True
+    return ConditionParser(expression, names, values).parse()(item or {})
+
+
+# 갱신식 ----------------------------------------------------------------------
+
+class UpdateParser(Parser):
+    """
+    갱신식을 item에 직접 적용
+    """
+
+    def apply(self, item):
+        while not self.done():
+            action = self.take('kw')[1]
+            while True:
+                if action == 'SET':
+                    target = self.path(self.take('name')[1])
+                    self.take('op', '=')
+                    set_path(item, target, self.parse_value(item))
+                elif action == 'REMOVE':
+                    remove_path(item, self.path(self.take('name')[1]))
+                elif action == 'ADD':
+                    target = self.path(self.take('name')[1])
+                    self.add(item, target, self.value(self.take('name')[1]))
+                elif action == 'DELETE':
+                    target = self.path(self.take('name')[1])
+                    current, found = get_path(item, target)
+                    if found:
+                        remaining = set(current) - set(self.value(self.take('name')[1]))
+                        if remaining:
+                            set_path(item, target, remaining)
+                        else:
+                            remove_path(item, target)
+                    else:
+                        self.take('name')
+                else:
+                    raise ExpressionError(f"지원하지 않는 갱신 동작: {action}")
+                if not self.accept('op', ','):
+                    break
+        return item
+
+    def add(self, item, target, value):
+        current, found = get_path(item, target)
+        if isinstance(value, (set, frozenset)):
+            set_path(item, target, (set(current) if found else set()) | set(value))
+        else:
+            set_path(item, target, (current if found else Decimal(0)) + value)
+
+    def parse_value(self, item):
+        left = self.parse_term(item)
+        if self.accept('op', '+'):
+            return left + self.parse_term(item)
+        if self.accept('op', '-'):
+            return left - self.parse_term(item)
+        return left
+
+    def parse_term(self, item):
+        kind, word = self.take('name')
+        if word in ('if_not_exists', 'list_append') and self.accept('op', '('):
+            if word == 'if_not_exists':
+                target = self.path(self.take('name')[1])
+                self.take('op', ',')
+                default = self.parse_value(item)
+                self.take('op', ')')
+                current, found = get_path(item, target)
+                return current if found else default
+            first = self.parse_value(item)
+            self.take('op', ',')
+            second = self.parse_value(item)
+            self.take('op', ')')
+            return list(first or []) + list(second or [])
+        if word.startswith(':'):
+            return self.value(word)
+        return get_path(item, self.path(word))[0]
+
+
+def apply_update(expression, item, names=None, values=None):
+    return UpdateParser(expression, names, values).apply(item)
+
+
+def project(item, expression, names=None):
+    """
+    ProjectionExpression 적용 (최상위 속성만)
+    """
+    if not expression:
+        return item
+    names = names or {}
+    projected = {}
+    for attribute in (part.strip() for part in expression.split(',')):
+        attribute = names.get(attribute, attribute)
+        if attribute in item:
+            projected[attribute] = item[attribute]
+    return projected
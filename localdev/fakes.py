@@ -0,0 +1,1258 @@
+"""
+AWS / Upstage 의존성의 인메모리 대체 구현
+
+- FakeS3, FakeDynamoDB, FakeSQS: 핸들러가 사용하는 boto3 API 부분집합을 메모리에서 수행
+- FakeUpstage: document-parse API(requests.post) 대체, 지연 시간/응답 크기 설정 가능
+- FakeLLM: openai 클라이언트의 chat.completions.create 대체 (solar-pro)
+- CallRecorder: 호출 수와 송수신 바이트 집계
+
+모든 호출은 CallRecorder에 '<서비스>.<작업>' 이름으로 기록됩니다.
+bytes_out은 핸들러가 보낸 바이트, bytes_in은 핸들러가 받은 바이트입니다.
+"""
+import copy
+import datetime
+import functools
+import hashlib
+import io
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from localdev import expressions
+
+
+class ClientError(Exception):
+    """
+    botocore.exceptions.ClientError와 같은 형태의 예외
+    """
+
+    def __init__(self, error_response, operation_name):
+        self.response = error_response
+        self.operation_name = operation_name
+        error = error_response.get('Error', {})
+        super().__init__(
+            f"An error occurred ({error.get('Code')}) when calling the {operation_name} operation: {error.get('Message', '')}"
+        )
+
+
+def client_error(code, operation_name, status_code=400, message=''):
+    return ClientError({
+        'Error': {'Code': code, 'Message': message or code},
+        'ResponseMetadata': {'HTTPStatusCode': status_code}
+    }, operation_name)
+
+
+class CallRecorder:
+    """
+    서비스 호출 수, 송수신 바이트, 호출별 소요 시간 집계 (스레드 안전)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = defaultdict(int)
+            self.bytes_in = defaultdict(int)
+            self.bytes_out = defaultdict(int)
+            self.seconds = defaultdict(float)
+            self.tokens = defaultdict(int)
+            self.paused = False
+
+    def record(self, operation, bytes_out=0, bytes_in=0, seconds=0.0):
+        with self.lock:
+            if self.paused:
+                return
+            self.calls[operation] += 1
+            self.bytes_out[operation] += bytes_out
+            self.bytes_in[operation] += bytes_in
+            self.seconds[operation] += seconds
+
+    def record_tokens(self, prompt_tokens, completion_tokens):
+        with self.lock:
+            if self.paused:
+                return
+            self.tokens['prompt'] += prompt_tokens
+            self.tokens['completion'] += completion_tokens
+
+    @contextmanager
+    def pause(self):
+        """
+        시드 데이터 적재 등 측정 대상이 아닌 호출을 기록하지 않음
+        """
+        with self.lock:
+            self.paused = True
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.paused = False
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'calls': dict(sorted(self.calls.items())),
+                'calls_total': sum(self.calls.values()),
+                'bytes_out': sum(self.bytes_out.values()),
+                'bytes_in': sum(self.bytes_in.values()),
+                'bytes_by_call': {
+                    operation: {'out': self.bytes_out[operation], 'in': self.bytes_in[operation]}
+                    for operation in sorted(self.calls)
+                },
+                'llm_tokens': dict(self.tokens)
+            }
+
+
+def body_bytes(body):
+    if body is None:
+        return b''
+    if isinstance(body, bytes):
+        return body
+    if isinstance(body, bytearray):
+        return bytes(body)
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    if hasattr(body, 'read'):
+        data = body.read()
+        return data.encode('utf-8') if isinstance(data, str) else data
+    raise TypeError(f"지원하지 않는 Body 형식: {type(body)}")
+
+
+def item_size(item):
+    return len(json.dumps(item, default=str, ensure_ascii=False).encode('utf-8'))
+
+
+class FakeStreamingBody(io.BytesIO):
+    """
+    botocore.response.StreamingBody 대체
+    """
+
+    def iter_chunks(self, chunk_size=1024):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def iter_lines(self, chunk_size=1024, keepends=False):
+        for line in self.read().splitlines(keepends):
+            yield line
+
+
+class LatencyMixin:
+    def simulate_latency(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+
+# S3 --------------------------------------------------------------------------
+
+class FakeS3(LatencyMixin):
+    """
+    boto3 S3 클라이언트 대체 (버킷은 처음 사용할 때 자동 생성)
+    """
+
+    def __init__(self, recorder, latency=0.0):
+        self.recorder = recorder
+        self.latency = latency
+        self.lock = threading.RLock()
+        self.buckets = defaultdict(dict)
+        self.multipart_uploads = {}
+        self.clock = itertools.count()
+        self.exceptions = type('Exceptions', (), {'ClientError': ClientError, 'NoSuchKey': ClientError})
+
+    # 내부 도우미 ------------------------------------------------------------
+    def store(self, bucket, key, data, content_type=None, metadata=None):
+        obj = {
+            'Body': data,
+            'ETag': f'"{hashlib.md5(data).hexdigest()}"',
+            'LastModified': datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+            + datetime.timedelta(seconds=next(self.clock)),
+            'ContentType': content_type or 'binary/octet-stream',
+            'Metadata': dict(metadata or {})
+        }
+        with self.lock:
+            self.buckets[bucket][key] = obj
+        return obj
+
+    def lookup(self, bucket, key, operation_name):
+        with self.lock:
+            obj = self.buckets[bucket].get(key)
+        if obj is None:
+            raise client_error('NoSuchKey', operation_name, 404, 'The specified key does not exist.')
+        return obj
+
+    def seed(self, bucket, key, body, content_type=None, metadata=None):
+        """
+        호출 기록 없이 객체 적재 (벤치마크 준비용)
+        """
+        return self.store(bucket, key, body_bytes(body), content_type, metadata)
+
+    def read(self, bucket, key):
+        return self.buckets[bucket][key]['Body']
+
+    def keys(self, bucket, prefix=''):
+        with self.lock:
+            return sorted(key for key in self.buckets[bucket] if key.startswith(prefix))
+
+    def timed(self, operation, started, bytes_out=0, bytes_in=0):
+        self.recorder.record(f's3.{operation}', bytes_out, bytes_in, time.perf_counter() - started)
+
+    # 객체 API ----------------------------------------------------------------
+    def put_object(self, Bucket, Key, Body=b'', ContentType=None, Metadata=None, IfNoneMatch=None, IfMatch=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        data = body_bytes(Body)
+        with self.lock:
+            existing = self.buckets[Bucket].get(Key)
+            if IfNoneMatch == '*' and existing is not None:
+                self.timed('put_object', started, len(data))
+                raise client_error('PreconditionFailed', 'PutObject', 412, 'At least one of the pre-conditions you specified did not hold')
+            if IfMatch is not None:
+                if existing is None:
+                    self.timed('put_object', started, len(data))
+                    raise client_error('NoSuchKey', 'PutObject', 404)
+                if existing['ETag'] != IfMatch:
+                    self.timed('put_object', started, len(data))
+                    raise client_error('PreconditionFailed', 'PutObject', 412, 'At least one of the pre-conditions you specified did not hold')
+            obj = self.store(Bucket, Key, data, ContentType, Metadata)
+        self.timed('put_object', started, len(data))
+        return {'ETag': obj['ETag']}
+
+    def get_object(self, Bucket, Key, Range=None, IfNoneMatch=None, IfMatch=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        try:
+            obj = self.lookup(Bucket, Key, 'GetObject')
+        except ClientError:
+            self.timed('get_object', started)
+            raise
+        if IfNoneMatch is not None and IfNoneMatch in ('*', obj['ETag']):
+            self.timed('get_object', started)
+            raise client_error('304', 'GetObject', 304, 'Not Modified')
+        if IfMatch is not None and IfMatch != obj['ETag']:
+            self.timed('get_object', started)
+            raise client_error('PreconditionFailed', 'GetObject', 412)
+        data = obj['Body']
+        extra = {}
+        if Range:
+            if not data:
+                self.timed('get_object', started)
+                raise client_error('InvalidRange', 'GetObject', 416, 'The requested range is not satisfiable')
+            data, start = self.slice_range(obj['Body'], Range)
+            extra['ContentRange'] = f"bytes {start}-{start + len(data) - 1}/{len(obj['Body'])}"
+        self.timed('get_object', started, bytes_in=len(data))
+        return {
+            'Body': FakeStreamingBody(data),
+            'ContentLength': len(data),
+            'ContentType': obj['ContentType'],
+            'ETag': obj['ETag'],
+            'LastModified': obj['LastModified'],
+            'Metadata': dict(obj['Metadata']),
+            **extra
+        }
+
+    @staticmethod
+    def slice_range(data, range_header):
+        """
+        반환값: (범위의 데이터, 시작 오프셋)
+        """
+        match = re.match(r'bytes=(\d*)-(\d*)$', range_header)
+        if not match:
+            return data, 0
+        start, end = match.groups()
+        if not start:
+            start = max(0, len(data) - int(end))
+            return data[start:], start
+        return data[int(start):int(end) + 1 if end else None], int(start)
+
+    def head_object(self, Bucket, Key, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        try:
+            obj = self.lookup(Bucket, Key, 'HeadObject')
+        except ClientError:
+            self.timed('head_object', started)
+            raise client_error('404', 'HeadObject', 404, 'Not Found')
+        self.timed('head_object', started)
+        return {
+            'ContentLength': len(obj['Body']),
+            'ContentType': obj['ContentType'],
+            'ETag': obj['ETag'],
+            'LastModified': obj['LastModified'],
+            'Metadata': dict(obj['Metadata'])
+        }
+
+    def copy_object(self, Bucket, CopySource, Key, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        source = self.lookup(CopySource['Bucket'], CopySource['Key'], 'CopyObject')
+        obj = self.store(Bucket, Key, source['Body'], source['ContentType'], source['Metadata'])
+        self.timed('copy_object', started)
+        return {'CopyObjectResult': {'ETag': obj['ETag'], 'LastModified': obj['LastModified']}}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        with self.lock:
+            self.buckets[Bucket].pop(Key, None)
+        self.timed('delete_object', started)
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        deleted = []
+        with self.lock:
+            for entry in Delete.get('Objects', []):
+                self.buckets[Bucket].pop(entry['Key'], None)
+                deleted.append({'Key': entry['Key']})
+        self.timed('delete_objects', started)
+        return {'Deleted': deleted}
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        data = self.lookup(Bucket, Key, 'HeadObject')['Body']
+        with open(Filename, 'wb') as f:
+            f.write(data)
+        self.timed('download_file', started, bytes_in=len(data))
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, **kwargs):
+        with open(Filename, 'rb') as f:
+            self.upload_fileobj(f, Bucket, Key, ExtraArgs)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        data = body_bytes(Fileobj)
+        extra = ExtraArgs or {}
+        self.store(Bucket, Key, data, extra.get('ContentType'), extra.get('Metadata'))
+        self.timed('upload_fileobj', started, len(data))
+
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, MaxKeys=1000, ContinuationToken=None, StartAfter=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        marker = ContinuationToken or StartAfter or ''
+        contents = []
+        common_prefixes = []
+        truncated = False
+        next_token = None
+        for key in self.keys(Bucket, Prefix):
+            if key <= marker:
+                continue
+            if len(contents) + len(common_prefixes) >= MaxKeys:
+                truncated = True
+                break
+            if Delimiter:
+                position = key.find(Delimiter, len(Prefix))
+                if position >= 0:
+                    common_prefix = key[:position + len(Delimiter)]
+                    common_prefixes.append({'Prefix': common_prefix})
+                    # 같은 공통 접두사 아래의 나머지 키는 건너뜀
+                    marker = next_token = common_prefix + '\uffff'
+                    continue
+            obj = self.buckets[Bucket][key]
+            contents.append({
+                'Key': key,
+                'Size': len(obj['Body']),
+                'ETag': obj['ETag'],
+                'LastModified': obj['LastModified'],
+                'StorageClass': 'STANDARD'
+            })
+            next_token = key
+
+        response = {
+            'IsTruncated': truncated,
+            'KeyCount': len(contents) + len(common_prefixes),
+            'MaxKeys': MaxKeys,
+            'Prefix': Prefix,
+            'Name': Bucket
+        }
+        if contents:
+            response['Contents'] = contents
+        if common_prefixes:
+            response['CommonPrefixes'] = common_prefixes
+        if truncated:
+            response['NextContinuationToken'] = next_token
+        self.timed('list_objects_v2', started, bytes_in=item_size(contents) + item_size(common_prefixes))
+        return response
+
+    def get_paginator(self, operation_name):
+        if operation_name != 'list_objects_v2':
+            raise NotImplementedError(operation_name)
+        return FakeListPaginator(self)
+
+    # 멀티파트 / presigned ----------------------------------------------------
+    def create_multipart_upload(self, Bucket, Key, ContentType=None, Metadata=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        upload_id = uuid.uuid4().hex
+        with self.lock:
+            self.multipart_uploads[upload_id] = {
+                'Bucket': Bucket, 'Key': Key, 'ContentType': ContentType, 'Metadata': Metadata, 'Parts': {}
+            }
+        self.timed('create_multipart_upload', started)
+        return {'Bucket': Bucket, 'Key': Key, 'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        data = body_bytes(Body)
+        with self.lock:
+            upload = self.multipart_uploads.get(UploadId)
+            if upload is None:
+                raise client_error('NoSuchUpload', 'UploadPart', 404)
+            etag = f'"{hashlib.md5(data).hexdigest()}"'
+            upload['Parts'][int(PartNumber)] = (etag, data)
+        self.timed('upload_part', started, len(data))
+        return {'ETag': etag}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        with self.lock:
+            upload = self.multipart_uploads.get(UploadId)
+            if upload is None:
+                self.timed('complete_multipart_upload', started)
+                raise client_error('NoSuchUpload', 'CompleteMultipartUpload', 404)
+            chunks = []
+            for part in MultipartUpload['Parts']:
+                stored = upload['Parts'].get(part['PartNumber'])
+                if stored is None or stored[0] != part['ETag']:
+                    self.timed('complete_multipart_upload', started)
+                    raise client_error('InvalidPart', 'CompleteMultipartUpload', 400)
+                chunks.append(stored[1])
+            del self.multipart_uploads[UploadId]
+            obj = self.store(Bucket, Key, b''.join(chunks), upload['ContentType'], upload['Metadata'])
+        self.timed('complete_multipart_upload', started)
+        return {'Bucket': Bucket, 'Key': Key, 'ETag': obj['ETag']}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        with self.lock:
+            if self.multipart_uploads.pop(UploadId, None) is None:
+                self.timed('abort_multipart_upload', started)
+                raise client_error('NoSuchUpload', 'AbortMultipartUpload', 404)
+        self.timed('abort_multipart_upload', started)
+        return {}
+
+    def generate_presigned_post(self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600):
+        self.recorder.record('s3.generate_presigned_post')
+        return {
+            'url': f'https://{Bucket}.s3.local/',
+            'fields': {**(Fields or {}), 'key': Key, 'policy': 'fake-policy', 'x-amz-signature': 'fake'}
+        }
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600, HttpMethod=None):
+        self.recorder.record('s3.generate_presigned_url')
+        params = Params or {}
+        query = '&'.join(f'{k}={v}' for k, v in sorted(params.items()) if k not in ('Bucket', 'Key'))
+        return f"https://{params.get('Bucket')}.s3.local/{params.get('Key')}?method={ClientMethod}&{query}"
+
+    def simulate_presigned_upload(self, bucket, key, body, content_type='application/pdf'):
+        """
+        클라이언트가 presigned URL로 직접 업로드하는 상황 재현 (핸들러 호출로 집계하지 않음)
+        """
+        return self.store(bucket, key, body_bytes(body), content_type)
+
+
+class FakeListPaginator:
+    def __init__(self, s3):
+        self.s3 = s3
+
+    def paginate(self, **kwargs):
+        kwargs = dict(kwargs)
+        kwargs.pop('PaginationConfig', None)
+        while True:
+            page = self.s3.list_objects_v2(**kwargs)
+            yield page
+            if not page.get('IsTruncated'):
+                break
+            kwargs['ContinuationToken'] = page['NextContinuationToken']
+
+
+# DynamoDB --------------------------------------------------------------------
+
+def to_dynamodb(value):
+    """
+    DynamoDB 저장 형식으로 변환 (숫자 -> Decimal, 빈 집합 금지)
+    """
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: to_dynamodb(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_dynamodb(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {to_dynamodb(v) for v in value}
+    return value
+
+
+KNOWN_KEY_NAMES = ('tt', 'folder_name', 'job_id', 'pk', 'id')
+
+
+class FakeTable(LatencyMixin):
+    """
+    boto3 DynamoDB Table 리소스 대체 (해시 키 + 선택적 정렬 키)
+    """
+
+    def __init__(self, name, recorder, latency=0.0, hash_key=None, range_key=None):
+        self.name = name
+        self.table_name = name
+        self.recorder = recorder
+        self.latency = latency
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.items = {}
+        self.lock = threading.RLock()
+
+    def key_of(self, key_or_item):
+        if self.hash_key is None:
+            self.hash_key = next((name for name in KNOWN_KEY_NAMES if name in key_or_item), None) \
+                or next(iter(key_or_item))
+        hash_value = key_or_item[self.hash_key]
+        range_value = key_or_item.get(self.range_key) if self.range_key else None
+        return (hash_value, range_value)
+
+    def timed(self, operation, started, bytes_out=0, bytes_in=0):
+        self.recorder.record(f'dynamodb.{operation}', bytes_out, bytes_in, time.perf_counter() - started)
+
+    def check(self, expression, item, names, values, operation_name):
+        if expression and not expressions.evaluate_condition(expression, item, names, values):
+            raise client_error('ConditionalCheckFailedException', operation_name, 400, 'The conditional request failed')
+
+    def seed(self, item):
+        with self.lock:
+            self.items[self.key_of(item)] = to_dynamodb(copy.deepcopy(item))
+
+    def get_item(self, Key, ConsistentRead=False, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        with self.lock:
+            item = copy.deepcopy(self.items.get(self.key_of(Key)))
+        self.timed('get_item', started, bytes_in=item_size(item) if item else 0)
+        if item is None:
+            return {}
+        return {'Item': expressions.project(item, ProjectionExpression, ExpressionAttributeNames)}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        item = to_dynamodb(copy.deepcopy(Item))
+        try:
+            with self.lock:
+                key = self.key_of(item)
+                self.check(ConditionExpression, self.items.get(key), ExpressionAttributeNames,
+                           ExpressionAttributeValues, 'PutItem')
+                self.items[key] = item
+        finally:
+            self.timed('put_item', started, bytes_out=item_size(item))
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues='NONE', **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        values = to_dynamodb(ExpressionAttributeValues or {})
+        try:
+            with self.lock:
+                key = self.key_of(Key)
+                existing = self.items.get(key)
+                self.check(ConditionExpression, existing, ExpressionAttributeNames, values, 'UpdateItem')
+                item = copy.deepcopy(existing) if existing else to_dynamodb(dict(Key))
+                expressions.apply_update(UpdateExpression, item, ExpressionAttributeNames, values)
+                self.items[key] = item
+        finally:
+            self.timed('update_item', started, bytes_out=item_size(values))
+        if ReturnValues in ('ALL_NEW', 'UPDATED_NEW'):
+            return {'Attributes': copy.deepcopy(item)}
+        if ReturnValues in ('ALL_OLD', 'UPDATED_OLD') and existing:
+            return {'Attributes': copy.deepcopy(existing)}
+        return {}
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        try:
+            with self.lock:
+                key = self.key_of(Key)
+                self.check(ConditionExpression, self.items.get(key), ExpressionAttributeNames,
+                           ExpressionAttributeValues, 'DeleteItem')
+                self.items.pop(key, None)
+        finally:
+            self.timed('delete_item', started)
+        return {}
+
+    def scan(self, FilterExpression=None, ProjectionExpression=None, ExpressionAttributeNames=None,
+             ExpressionAttributeValues=None, ExclusiveStartKey=None, Limit=None, **kwargs):
+        return self.read_items('scan', None, FilterExpression, ProjectionExpression, ExpressionAttributeNames,
+                               ExpressionAttributeValues, ExclusiveStartKey, Limit)
+
+    def query(self, KeyConditionExpression, FilterExpression=None, ProjectionExpression=None,
+              ExpressionAttributeNames=None, ExpressionAttributeValues=None, ExclusiveStartKey=None,
+              Limit=None, ScanIndexForward=True, **kwargs):
+        return self.read_items('query', KeyConditionExpression, FilterExpression, ProjectionExpression,
+                               ExpressionAttributeNames, ExpressionAttributeValues, ExclusiveStartKey, Limit,
+                               ScanIndexForward)
+
+    def read_items(self, operation, key_condition, filter_expression, projection, names, values,
+                   exclusive_start_key, limit, forward=True):
+        started = time.perf_counter()
+        self.simulate_latency()
+        values = to_dynamodb(values or {})
+        with self.lock:
+            ordered = sorted(self.items.items(), key=lambda entry: (str(entry[0][0]), str(entry[0][1])),
+                             reverse=not forward)
+        if exclusive_start_key:
+            start = self.key_of(exclusive_start_key)
+            keys = [key for key, _ in ordered]
+            ordered = ordered[keys.index(start) + 1:] if start in keys else ordered
+        limit = limit or 1000
+        evaluated = ordered[:limit]
+        items = []
+        for _, item in evaluated:
+            if key_condition and not expressions.evaluate_condition(key_condition, item, names, values):
+                continue
+            if filter_expression and not expressions.evaluate_condition(filter_expression, item, names, values):
+                continue
+            items.append(expressions.project(copy.deepcopy(item), projection, names))
+        response = {'Items': items, 'Count': len(items), 'ScannedCount': len(evaluated)}
+        if len(ordered) > limit:
+            last_item = evaluated[-1][1]
+            response['LastEvaluatedKey'] = {
+                name: last_item[name] for name in (self.hash_key, self.range_key) if name
+            }
+        self.timed(operation, started, bytes_in=item_size(items))
+        return response
+
+
+class FakeDynamoDB:
+    """
+    boto3 DynamoDB 서비스 리소스 대체 (테이블은 처음 사용할 때 자동 생성)
+    """
+
+    def __init__(self, recorder, latency=0.0, key_schema=None):
+        self.recorder = recorder
+        self.latency = latency
+        self.key_schema = dict(key_schema or {})
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    def Table(self, name):
+        with self.lock:
+            if name not in self.tables:
+                hash_key, range_key = self.key_schema.get(name, (None, None))
+                self.tables[name] = FakeTable(name, self.recorder, self.latency, hash_key, range_key)
+            return self.tables[name]
+
+
+# SQS -------------------------------------------------------------------------
+
+class FakeSQS(LatencyMixin):
+    """
+    boto3 SQS 클라이언트 대체 (큐는 처음 사용할 때 자동 생성)
+
+    가시성 타임아웃은 시간으로 흐르지 않음: 받은 메시지는 삭제되거나 change_message_visibility(0)로
+    돌려놓을 때까지 보이지 않습니다. set_redrive_policy로 DLQ와 maxReceiveCount를 설정할 수 있습니다.
+    drain은 Lambda 이벤트 소스 매핑(ReportBatchItemFailures)을 흉내 내 큐가 빌 때까지 핸들러를 호출합니다.
+    """
+
+    def __init__(self, recorder, latency=0.0):
+        self.recorder = recorder
+        self.latency = latency
+        self.queues = defaultdict(list)  # {큐 URL: [메시지]}
+        self.redrive = {}  # {큐 URL: (DLQ URL, maxReceiveCount)}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def timed(self, operation, started, bytes_out=0, bytes_in=0):
+        self.recorder.record(f'sqs.{operation}', bytes_out, bytes_in, time.perf_counter() - started)
+
+    def set_redrive_policy(self, queue_url, dead_letter_queue_url, max_receive_count):
+        self.redrive[queue_url] = (dead_letter_queue_url, max_receive_count)
+
+    def messages(self, queue_url):
+        """
+        큐에 남은 메시지 본문 목록 (처리 중인 메시지 포함)
+        """
+        with self.lock:
+            return [message['Body'] for message in self.queues[queue_url]]
+
+    def enqueue(self, queue_url, body):
+        message = {'MessageId': str(uuid.uuid4()), 'Body': body, 'ReceiveCount': 0, 'ReceiptHandle': None}
+        with self.lock:
+            self.queues[queue_url].append(message)
+        return message['MessageId']
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        message_id = self.enqueue(QueueUrl, MessageBody)
+        self.timed('send_message', started, bytes_out=len(MessageBody.encode('utf-8')))
+        return {'MessageId': message_id}
+
+    def send_message_batch(self, QueueUrl, Entries, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        if len(Entries) > 10:
+            raise client_error('AWS.SimpleQueueService.TooManyEntriesInBatchRequest', 'SendMessageBatch')
+        successful = [{'Id': entry['Id'], 'MessageId': self.enqueue(QueueUrl, entry['MessageBody'])}
+                      for entry in Entries]
+        self.timed('send_message_batch', started,
+                   bytes_out=sum(len(entry['MessageBody'].encode('utf-8')) for entry in Entries))
+        return {'Successful': successful, 'Failed': []}
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages=1, **kwargs):
+        """
+        보이는 메시지를 최대 MaxNumberOfMessages개 수신 (maxReceiveCount를 넘긴 메시지는 DLQ로 이동)
+        """
+        started = time.perf_counter()
+        self.simulate_latency()
+        received = []
+        with self.lock:
+            dead_letter = self.redrive.get(QueueUrl)
+            for message in list(self.queues[QueueUrl]):
+                if len(received) >= MaxNumberOfMessages:
+                    break
+                if message['ReceiptHandle'] is not None:
+                    continue
+                if dead_letter and message['ReceiveCount'] >= dead_letter[1]:
+                    self.queues[QueueUrl].remove(message)
+                    self.queues[dead_letter[0]].append({**message, 'ReceiveCount': 0})
+                    continue
+                message['ReceiveCount'] += 1
+                message['ReceiptHandle'] = f"receipt-{next(self.ids)}"
+                received.append({
+                    'MessageId': message['MessageId'],
+                    'ReceiptHandle': message['ReceiptHandle'],
+                    'Body': message['Body'],
+                    'Attributes': {'ApproximateReceiveCount': str(message['ReceiveCount'])}
+                })
+        self.timed('receive_message', started, bytes_in=sum(len(item['Body'].encode('utf-8')) for item in received))
+        return {'Messages': received} if received else {}
+
+    def find(self, queue_url, receipt_handle, operation_name):
+        for message in self.queues[queue_url]:
+            if message['ReceiptHandle'] == receipt_handle:
+                return message
+        raise client_error('ReceiptHandleIsInvalid', operation_name, 400, 'The receipt handle is not valid')
+
+    def delete_message(self, QueueUrl, ReceiptHandle, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        with self.lock:
+            self.queues[QueueUrl].remove(self.find(QueueUrl, ReceiptHandle, 'DeleteMessage'))
+        self.timed('delete_message', started)
+        return {}
+
+    def change_message_visibility(self, QueueUrl, ReceiptHandle, VisibilityTimeout, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        with self.lock:
+            message = self.find(QueueUrl, ReceiptHandle, 'ChangeMessageVisibility')
+            if VisibilityTimeout == 0:
+                message['ReceiptHandle'] = None
+        self.timed('change_message_visibility', started)
+        return {}
+
+    def receive_event(self, queue_url, batch_size=10):
+        """
+        Lambda SQS 이벤트 하나 구성 (받을 메시지가 없으면 None)
+        """
+        messages = self.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=batch_size).get('Messages', [])
+        if not messages:
+            return None
+        return {'Records': [{
+            'messageId': message['MessageId'],
+            'receiptHandle': message['ReceiptHandle'],
+            'body': message['Body'],
+            'attributes': message['Attributes'],
+            'eventSource': 'aws:sqs',
+            'eventSourceARN': f"arn:aws:sqs:us-east-1:000000000000:{queue_url.rsplit('/', 1)[-1]}"
+        } for message in messages]}
+
+    def complete_event(self, queue_url, event, response=None, error=None):
+        """
+        이벤트 소스 매핑의 호출 후 처리: 실패 항목(batchItemFailures)은 다시 보이게, 나머지는 삭제
+        핸들러가 예외를 던졌으면 배치 전체를 다시 보이게 함
+        """
+        records = event['Records']
+        if error is not None:
+            failed_ids = {record['messageId'] for record in records}
+        else:
+            failures = (response or {}).get('batchItemFailures', []) if isinstance(response, dict) else []
+            failed_ids = {failure['itemIdentifier'] for failure in failures}
+        with self.recorder.pause():
+            for record in records:
+                if record['messageId'] in failed_ids:
+                    self.change_message_visibility(QueueUrl=queue_url, ReceiptHandle=record['receiptHandle'],
+                                                   VisibilityTimeout=0)
+                else:
+                    self.delete_message(QueueUrl=queue_url, ReceiptHandle=record['receiptHandle'])
+        return failed_ids
+
+    def drain(self, queue_url, invoke, batch_size=10, concurrency=1):
+        """
+        큐가 빌 때까지 invoke(event)를 최대 concurrency개 동시에 호출 (이벤트 소스 매핑 흉내)
+        반환값: 호출별 (이벤트, 응답 또는 예외) 목록
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def run(event):
+            try:
+                response, error = invoke(event), None
+            except Exception as e:
+                response, error = None, e
+            self.complete_event(queue_url, event, response, error)
+            return event, error if error is not None else response
+
+        invocations = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                events = [event for event in (self.receive_event(queue_url, batch_size) for _ in range(concurrency))
+                          if event is not None]
+                if not events:
+                    break
+                invocations.extend(executor.map(run, events))
+        return invocations
+
+
+# Upstage document-parse ------------------------------------------------------
+
+PDF_TEXT_RE = re.compile(rb'\((.*?)(?<!\\)\) Tj')
+
+
+def make_pdf(page_texts):
+    """
+    페이지별 텍스트를 가진 최소 PDF 생성 (텍스트 레이어 포함)
+    page_texts: 페이지 텍스트 목록, 또는 페이지 수(int)
+    """
+    if isinstance(page_texts, int):
+        page_texts = [f'Page {number}' for number in range(1, page_texts + 1)]
+
+    objects = []
+    page_count = len(page_texts)
+    first_page_id = 4
+    kids = ' '.join(f'{first_page_id + index * 2} 0 R' for index in range(page_count))
+    objects.append(b'<< /Type /Catalog /Pages 2 0 R >>')
+    objects.append(f'<< /Type /Pages /Kids [{kids}] /Count {page_count} >>'.encode())
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    for index, text in enumerate(page_texts):
+        escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+        stream = f'BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET'.encode('latin-1', 'replace')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {first_page_id + index * 2 + 1} 0 R >>'.encode()
+        )
+        objects.append(b'<< /Length ' + str(len(stream)).encode() + b' >>\nstream\n' + stream + b'\nendstream')
+
+    output = io.BytesIO()
+    output.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f'{number} 0 obj\n'.encode() + body + b'\nendobj\n')
+    xref_offset = output.tell()
+    output.write(f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode())
+    for offset in offsets:
+        output.write(f'{offset:010d} 00000 n \n'.encode())
+    output.write(f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode())
+    return output.getvalue()
+
+
+def pdf_page_texts(data):
+    """
+    make_pdf로 만든 PDF에서 페이지별 텍스트 추출 (실패 시 빈 목록)
+    """
+    return [match.decode('latin-1') for match in PDF_TEXT_RE.findall(data)]
+
+
+@functools.lru_cache(maxsize=4096)
+def filler_text(seed, length):
+    words = ['정규화', '데이터', '모델', '학습', '손실 함수', '경사 하강법', 'overfitting', 'regularization',
+             '검증', '특징', '분류', '회귀', '확률', '분포', '행렬', '벡터']
+    digest = int(hashlib.md5(seed.encode('utf-8')).hexdigest(), 16)
+    parts = []
+    total = 0
+    index = digest
+    while total < length:
+        word = words[index % len(words)]
+        parts.append(word)
+        total += len(word) + 1
+        index = index // 3 + 7 * len(parts)
+    return ' '.join(parts)[:length]
+
+
+class FakeHTTPResponse:
+    """
+    requests.Response 대체
+    """
+
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.content = payload
+        self.raw = io.BytesIO(payload)
+        self.headers = {'Content-Type': 'application/json', 'Content-Length': str(len(payload))}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for start in range(0, len(self.content), chunk_size or len(self.content) or 1):
+            yield self.content[start:start + chunk_size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise FakeRequestsHTTPError(f'{self.status_code} Error')
+
+    def close(self):
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class IteratorReader(io.RawIOBase):
+    """
+    바이트 조각 생성기를 읽기 전용 파일 객체로 감쌈 (모두 읽으면 on_complete(총 바이트) 호출)
+    """
+
+    def __init__(self, chunks, on_complete=None):
+        self.chunks = iter(chunks)
+        self.pending = b''
+        self.received = 0
+        self.on_complete = on_complete
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self.received
+
+    def readinto(self, buffer):
+        while not self.pending:
+            try:
+                self.pending = next(self.chunks)
+            except StopIteration:
+                if self.on_complete is not None:
+                    self.on_complete(self.received)
+                    self.on_complete = None
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        self.received += size
+        return size
+
+
+class FakeRawResponse(io.BufferedReader):
+    """
+    urllib3 HTTPResponse 대체 (decode_content 속성 설정 가능)
+    """
+    decode_content = False
+
+
+class FakeStreamingHTTPResponse(FakeHTTPResponse):
+    """
+    requests.post(..., stream=True) 응답 대체: 본문을 raw에서 읽을 때 생성
+    """
+
+    def __init__(self, status_code, chunks, on_complete=None):
+        self.status_code = status_code
+        self.raw = FakeRawResponse(IteratorReader(chunks, on_complete), 64 * 1024)
+        self.headers = {'Content-Type': 'application/json'}
+
+    @property
+    def content(self):
+        return self.raw.read()
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        while True:
+            chunk = self.raw.read(chunk_size or 64 * 1024)
+            if not chunk:
+                return
+            yield chunk
+
+
+class FakeRequestsError(Exception):
+    pass
+
+
+class FakeRequestsHTTPError(FakeRequestsError):
+    pass
+
+
+class FakeUpstage(LatencyMixin):
+    """
+    Upstage document-parse API 대체
+
+    - 업로드된 문서가 make_pdf로 만든 PDF이면 실제 페이지 수/텍스트를 사용하고,
+      아니면 default_pages 만큼의 페이지를 생성
+    - 페이지마다 머리글/본문(elements_per_page개)/바닥글 요소를 생성
+    - latency: 호출당 고정 지연, latency_per_page: 페이지당 추가 지연(초)
+    - 비동기 API ({endpoint}/async -> {endpoint}/requests/{id} -> 묶음별 download_url):
+      async_batch_pages 페이지씩 묶음으로 결과 제공, async_pending_polls번 조회할 때까지는 처리 중(started)
+    """
+
+    def __init__(self, recorder, default_pages=10, elements_per_page=4, chars_per_element=400,
+                 latency=0.0, latency_per_page=0.0, status_code=200, async_batch_pages=100, async_pending_polls=0):
+        self.recorder = recorder
+        self.default_pages = default_pages
+        self.elements_per_page = elements_per_page
+        self.chars_per_element = chars_per_element
+        self.latency = latency
+        self.latency_per_page = latency_per_page
+        self.status_code = status_code
+        self.async_batch_pages = async_batch_pages
+        self.async_pending_polls = async_pending_polls
+        self.async_requests = {}  # {요청 ID: {'page_texts': [...], 'polls': 조회 횟수}}
+        self.requests = []
+
+    def page_texts(self, document_bytes):
+        return pdf_page_texts(document_bytes) or [f'Page {n}' for n in range(1, self.default_pages + 1)]
+
+    def iter_elements(self, page_texts, first_page=1):
+        element_id = 0
+        for page, text in enumerate(page_texts, start=first_page):
+            page_elements = [('header', '인공지능 개론 | 2025년 1학기')]
+            page_elements.append(('heading1', f'# {text}'))
+            for index in range(self.elements_per_page):
+                page_elements.append(('paragraph', filler_text(f'{text}-{index}', self.chars_per_element)))
+            page_elements.append(('footer', f'Copyright © 2025 AI Seoul. All rights reserved. {page}'))
+            for category, markdown in page_elements:
+                yield {
+                    'category': category,
+                    'content': {'html': '', 'markdown': markdown, 'text': ''},
+                    'coordinates': [],
+                    'id': element_id,
+                    'page': page
+                }
+                element_id += 1
+
+    def build_result(self, document_bytes):
+        page_texts = self.page_texts(document_bytes)
+        elements = list(self.iter_elements(page_texts))
+        return {
+            'api': '2.0',
+            'content': {'html': '', 'markdown': '\n\n'.join(e['content']['markdown'] for e in elements), 'text': ''},
+            'elements': elements,
+            'model': 'document-parse-250116',
+            'usage': {'pages': len(page_texts)}
+        }
+
+    def iter_result_json(self, document_bytes, page_texts=None, first_page=1):
+        """
+        build_result와 같은 JSON을 요소 단위로 생성 (stream=True 응답용, 전체 응답을 메모리에 만들지 않음)
+        page_texts / first_page: 비동기 API 묶음 결과 (문서 기준 페이지 번호)
+        """
+        page_texts = self.page_texts(document_bytes) if page_texts is None else page_texts
+        yield b'{"api": "2.0", "content": {"html": "", "markdown": "'
+        for index, element in enumerate(self.iter_elements(page_texts, first_page)):
+            markdown = json.dumps(element['content']['markdown'], ensure_ascii=False)[1:-1]
+            yield (('\\n\\n' if index else '') + markdown).encode('utf-8')
+        yield b'", "text": ""}, "elements": ['
+        for index, element in enumerate(self.iter_elements(page_texts, first_page)):
+            yield (b', ' if index else b'') + _json_bytes(element)
+        yield f'], "model": "document-parse-250116", "usage": {{"pages": {len(page_texts)}}}}}'.encode()
+
+    def post(self, url, headers=None, files=None, data=None, json=None, stream=False, timeout=None, **kwargs):
+        started = time.perf_counter()
+        document_bytes = b''
+        if files:
+            document = files.get('document')
+            if isinstance(document, tuple):
+                document = document[1]
+            document_bytes = body_bytes(document)
+        self.requests.append({'url': url, 'data': data, 'bytes': len(document_bytes)})
+        self.simulate_latency()
+        if url.endswith('/async'):
+            request_id = uuid.uuid4().hex
+            if self.status_code == 200:
+                self.async_requests[request_id] = {'page_texts': self.page_texts(document_bytes), 'polls': 0}
+            payload = _json_bytes({'request_id': request_id}) if self.status_code == 200 \
+                else b'{"error": {"message": "fake upstage error"}}'
+            self.recorder.record('http.upstage.document_parse_async', len(document_bytes), len(payload),
+                                 time.perf_counter() - started)
+            return FakeHTTPResponse(202 if self.status_code == 200 else self.status_code, payload)
+        if stream and self.status_code == 200:
+            if self.latency_per_page:
+                time.sleep(self.latency_per_page * len(self.page_texts(document_bytes)))
+
+            def on_complete(received):
+                self.recorder.record('http.upstage.document_parse', len(document_bytes), received,
+                                     time.perf_counter() - started)
+
+            return FakeStreamingHTTPResponse(self.status_code, self.iter_result_json(document_bytes), on_complete)
+        if self.status_code != 200:
+            payload = b'{"error": {"message": "fake upstage error"}}'
+        else:
+            result = self.build_result(document_bytes)
+            if self.latency_per_page:
+                time.sleep(self.latency_per_page * result['usage']['pages'])
+            payload = _json_bytes(result)
+        self.recorder.record('http.upstage.document_parse', len(document_bytes), len(payload),
+                             time.perf_counter() - started)
+        return FakeHTTPResponse(self.status_code, payload)
+
+
+    def get(self, url, headers=None, stream=False, timeout=None, **kwargs):
+        """
+        비동기 API 상태 조회 ({endpoint}/requests/{id}) 또는 묶음 결과 다운로드 (download_url)
+        """
+        started = time.perf_counter()
+        if '/async-results/' in url:
+            request_id, start_page = url.rsplit('/', 2)[-2:]
+            start_page = int(start_page)
+            request = self.async_requests.get(request_id)
+            if request is None:
+                return FakeHTTPResponse(404, b'{"error": {"message": "not found"}}')
+            page_texts = request['page_texts'][start_page - 1:start_page - 1 + self.async_batch_pages]
+
+            def on_complete(received):
+                self.recorder.record('http.upstage.async_result', 0, received, time.perf_counter() - started)
+
+            return FakeStreamingHTTPResponse(200, self.iter_result_json(b'', page_texts, start_page), on_complete)
+
+        request_id = url.rstrip('/').rsplit('/', 1)[-1]
+        request = self.async_requests.get(request_id)
+        if request is None:
+            return FakeHTTPResponse(404, b'{"error": {"message": "not found"}}')
+        request['polls'] += 1
+        total_pages = len(request['page_texts'])
+        done = request['polls'] > self.async_pending_polls
+        if done and self.latency_per_page:
+            time.sleep(self.latency_per_page * total_pages)
+        batches = [{
+            'id': index,
+            'status': 'completed' if done else 'started',
+            'start_page': start_page,
+            'end_page': min(start_page + self.async_batch_pages - 1, total_pages),
+            'download_url': f'https://upstage.local/async-results/{request_id}/{start_page}' if done else None
+        } for index, start_page in enumerate(range(1, total_pages + 1, self.async_batch_pages))]
+        payload = _json_bytes({
+            'id': request_id,
+            'status': 'completed' if done else 'started',
+            'total_pages': total_pages,
+            'completed_pages': total_pages if done else 0,
+            'batches': batches
+        })
+        self.recorder.record('http.upstage.async_status', 0, len(payload), time.perf_counter() - started)
+        return FakeHTTPResponse(200, payload)
+
+
+def _json_bytes(value):
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+# solar-pro (OpenAI 호환) -----------------------------------------------------
+
+class FakeLLM(LatencyMixin):
+    """
+    openai.OpenAI 클라이언트 대체
+
+    - 페이지 판별 프롬프트에는 메시지에 숫자가 있으면 'PAGE_NUMBER: <번호>', 없으면 'NO_PAGE'
+    - 페이지 digest 프롬프트('=== Page N ===' 구역)에는 페이지마다 digest / keywords를 담은 JSON
+    - 그 외에는 completion_chars 길이의 응답 생성
+    - 토큰 수는 4자당 1토큰으로 추정
+    """
+
+    def __init__(self, recorder, latency=0.0, completion_chars=600):
+        self.recorder = recorder
+        self.latency = latency
+        self.completion_chars = completion_chars
+        self.requests = []
+
+    def respond(self, messages):
+        last = messages[-1]['content'] if messages else ''
+        if "PAGE_NUMBER: <번호>" in last:
+            message = last.rsplit('메시지:', 1)[-1]
+            numbers = re.findall(r'(\d+)\s*(?:페이지|쪽|page)', message, re.IGNORECASE)
+            return f'PAGE_NUMBER: {numbers[0]}' if numbers else 'NO_PAGE'
+        if '"digest"' in last and '=== Page ' in last:
+            return json.dumps({'pages': [
+                {'page': int(number), 'digest': filler_text(text[:200], 160),
+                 'keywords': list(dict.fromkeys(filler_text(text[:200], 80).split(' ')))[:5]}
+                for number, text in re.findall(r'=== Page (\d+) ===\n(.*?)(?=\n=== Page |\Z)', last, re.DOTALL)
+            ]}, ensure_ascii=False)
+        return '## 요약\n' + filler_text(last[:200], self.completion_chars)
+
+    def create(self, model=None, messages=None, **kwargs):
+        started = time.perf_counter()
+        self.simulate_latency()
+        messages = messages or []
+        prompt = ''.join(str(message.get('content', '')) for message in messages)
+        content = self.respond(messages)
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        self.requests.append({'model': model, 'prompt_chars': len(prompt), 'kwargs': kwargs})
+        self.recorder.record('http.llm.chat_completions', len(prompt.encode('utf-8')),
+                             len(content.encode('utf-8')), time.perf_counter() - started)
+        self.recorder.record_tokens(prompt_tokens, completion_tokens)
+        return FakeCompletion(model, content, prompt_tokens, completion_tokens)
+
+
+class FakeNamespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.__dict__!r})'
+
+    def model_dump(self):
+        return {key: value.model_dump() if isinstance(value, FakeNamespace) else value
+                for key, value in self.__dict__.items()}
+
+
+class FakeCompletion(FakeNamespace):
+    def __init__(self, model, content, prompt_tokens, completion_tokens):
+        super().__init__(
+            id=f'chatcmpl-{uuid.uuid4().hex[:12]}',
+            model=model,
+            choices=[FakeNamespace(index=0, finish_reason='stop',
+                                   message=FakeNamespace(role='assistant', content=content))],
+            usage=FakeNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens)
+        )
+
+
+class FakeOpenAIClient:
+    def __init__(self, llm, api_key=None, base_url=None, **kwargs):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.chat = FakeNamespace(completions=FakeNamespace(create=llm.create))
+
+
+class FakeLambdaContext:
+    """
+    Lambda 컨텍스트 객체 대체
+    """
+
+    def __init__(self, function_name, memory_limit_in_mb=1024, timeout_seconds=900):
+        self.function_name = function_name
+        self.function_version = '$LATEST'
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.aws_request_id = uuid.uuid4().hex
+        self.invoked_function_arn = f'arn:aws:lambda:us-east-1:000000000000:function:{function_name}'
+        self.log_group_name = f'/aws/lambda/{function_name}'
+        self.deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self.deadline - time.monotonic()) * 1000))
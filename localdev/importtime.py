@@ -0,0 +1,151 @@
+"""
+핸들러별 모듈 초기화(콜드 스타트) 시간과 import 시간 분석
+
+벤치마크(localdev.bench)와 달리 실제로 설치된 boto3 / openai / requests를 사용합니다.
+핸들러마다 새 인터프리터에서 `python -X importtime`으로 모듈을 import 하고
+- init_ms: 핸들러 모듈 실행(import 포함, 클라이언트 생성 포함) 시간
+- imports: 핸들러가 직접 import 한 최상위 패키지별 누적 import 시간
+을 기본 모드(첫 사용 시 생성)와 PREWARM=true 모드로 각각 측정합니다.
+
+사용 예:
+    python -m localdev.importtime                               # 전체 핸들러
+    python -m localdev.importtime -f ai_tutor_get_document --event '{}'   # 400 응답 경로까지 실행
+    python -m localdev.importtime --output importtime.json
+
+--event를 지정하면 import 후 해당 이벤트로 한 번 호출하고, 호출 시간과 호출 후 로드된 무거운 패키지를 기록합니다.
+(실제 AWS 클라이언트를 사용하므로 AWS 호출이 없는 조기 종료 경로에만 사용하세요.)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from localdev.runtime import HANDLER_NAMES, LAMBDA_ROOT, LAYER_PATHS
+
+HEAVY_PACKAGES = ('boto3', 'botocore', 'openai', 'httpx', 'pydantic', 'requests', 'urllib3')
+MARKER = '--- localdev.importtime '
+
+RUNNER = f"""
+import importlib.util, json, os, sys, time
+path, event = sys.argv[1], sys.argv[2]
+sys.stderr.write({MARKER!r} + 'handler\\n'); sys.stderr.flush()
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location('handler', path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+result = {{'init_ms': (time.perf_counter() - started) * 1000}}
+result['loaded_after_init'] = sorted(name for name in {HEAVY_PACKAGES!r} if name in sys.modules)
+if event:
+    sys.stderr.write({MARKER!r} + 'invoke\\n'); sys.stderr.flush()
+    started = time.perf_counter()
+    response = module.lambda_handler(json.loads(event), None)
+    result['invoke_ms'] = (time.perf_counter() - started) * 1000
+    result['status_code'] = response.get('statusCode') if isinstance(response, dict) else None
+    result['loaded_after_invoke'] = sorted(name for name in {HEAVY_PACKAGES!r} if name in sys.modules)
+sys.stdout.write({MARKER!r} + json.dumps(result) + '\\n')
+"""
+
+
+def parse_importtime(stderr):
+    """
+    -X importtime 출력에서 구간(handler / invoke)별 최상위 import의 누적 시간(ms)을 패키지 단위로 합산
+    """
+    sections = {}
+    current = None
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            current = sections.setdefault(line[len(MARKER):].strip(), {})
+            continue
+        if current is None or not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if len(name) - len(name.lstrip()) > 1:  # 최상위(들여쓰기 1칸) import만 집계
+            continue
+        package = name.strip().split('.')[0]
+        current[package] = current.get(package, 0.0) + int(cumulative) / 1000
+    return sections
+
+
+def measure(handler_name, prewarm, event):
+    path = LAMBDA_ROOT / handler_name / f'{handler_name}.py'
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join([*map(str, LAYER_PATHS), str(path.parent), os.environ.get('PYTHONPATH', '')]),
+        'AWS_REGION': os.environ.get('AWS_REGION', 'us-east-1'),
+        'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+        'METRICS_ENABLED': '0',
+        'PREWARM': 'true' if prewarm else 'false'
+    }
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', RUNNER, str(path), event or ''],
+                               capture_output=True, text=True, env=env)
+    result_lines = [line for line in completed.stdout.splitlines() if line.startswith(MARKER)]
+    if completed.returncode != 0 or not result_lines:
+        messages = [line for line in completed.stderr.splitlines() if line.strip() and not line.startswith('import time:')]
+        error = messages[-1] if messages else f'exit {completed.returncode}'
+        return {'error': error}
+    result = json.loads(result_lines[-1][len(MARKER):])
+    sections = parse_importtime(completed.stderr)
+    result['imports_ms'] = sections.get('handler', {})
+    if 'invoke' in sections:
+        result['invoke_imports_ms'] = sections['invoke']
+    return result
+
+
+def summarize(runs):
+    """
+    반복 측정 결과의 중앙값
+    """
+    errors = [run['error'] for run in runs if 'error' in run]
+    if errors:
+        return {'error': errors[0]}
+    summary = {key: value for key, value in runs[0].items() if not isinstance(value, (int, float)) or key == 'status_code'}
+    for key in ('init_ms', 'invoke_ms'):
+        if key in runs[0]:
+            summary[key] = round(statistics.median(run[key] for run in runs), 3)
+    for key in ('imports_ms', 'invoke_imports_ms'):
+        if key in runs[0]:
+            packages = {package for run in runs for package in run[key]}
+            summary[key] = dict(sorted(
+                ((package, round(statistics.median(run[key].get(package, 0.0) for run in runs), 3)) for package in packages),
+                key=lambda item: -item[1]
+            ))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='핸들러별 콜드 스타트 import 시간 분석')
+    parser.add_argument('-f', '--function', action='append', choices=HANDLER_NAMES, help='측정할 핸들러 (기본: 전체)')
+    parser.add_argument('--repeat', type=int, default=3, help='측정 반복 횟수 (기본 3, 중앙값 사용)')
+    parser.add_argument('--event', help='import 후 한 번 호출할 이벤트 JSON (예: \'{}\')')
+    parser.add_argument('--top', type=int, default=5, help='표시할 상위 패키지 수 (기본 5)')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    args = parser.parse_args(argv)
+
+    names = args.function or list(HANDLER_NAMES)
+    results = []
+    for name in names:
+        for prewarm in (False, True):
+            summary = summarize([measure(name, prewarm, args.event) for _ in range(max(1, args.repeat))])
+            results.append({'function': name, 'prewarm': prewarm, **summary})
+            mode = 'PREWARM' if prewarm else 'lazy'
+            if 'error' in summary:
+                print(f"{name:35s} {mode:8s} 오류: {summary['error']}", file=sys.stderr)
+                continue
+            top = ', '.join(f'{package} {ms:.1f}' for package, ms in list(summary['imports_ms'].items())[:args.top])
+            line = f"{name:35s} {mode:8s} init {summary['init_ms']:8.1f} ms  [{top}]"
+            if 'invoke_ms' in summary:
+                line += (f"  invoke {summary['invoke_ms']:.1f} ms -> {summary['status_code']} "
+                         f"(로드됨: {', '.join(summary['loaded_after_invoke']) or '-'})")
+            print(line, file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+    return 0 if all('error' not in result for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Lambda 핸들러를 인메모리 대체 구현 위에서 실행하는 로컬 런타임
+
+    with LocalRuntime() as runtime:
+        handler = runtime.load_handler('ai_tutor_list_documents')
+        response = runtime.invoke(handler, {'pathParameters': {'id': '폴더'}})
+
+런타임이 열려 있는 동안 sys.modules의 boto3 / botocore / openai / requests가
+fakes 모듈의 대체 구현으로 바뀌고, 핸들러용 환경 변수가 설정됩니다.
+핸들러 모듈은 load_handler 호출마다 새로 import 되므로 모듈 초기화(콜드 스타트)도 재현됩니다.
+"""
+import importlib.util
+import itertools
+import os
+import sys
+import threading
+import types
+from pathlib import Path
+from unittest import mock
+
+from localdev import fakes
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LAMBDA_ROOT = REPO_ROOT / 'lambda'
+LAYER_PATHS = (LAMBDA_ROOT / 'ai_tutor_common' / 'python',)  # Lambda 레이어 (공통 모듈)
+
+HANDLER_NAMES = (
+    'ai_tutor_create_folder',
+    'ai_tutor_list_folders',
+    'ai_tutor_list_documents',
+    'ai_tutor_upload_document',
+    'ai_tutor_process_document',
+    'ai_tutor_get_document',
+    'ai_tutor_chatbot',
+    'ai_tutor_reconcile_folder_stats',
+    'ai_tutor_archive_chat_sessions',
+    'ai_tutor_search',
+    'ai_tutor_folder_summary',
+    'ai_tutor_enqueue_document',
+    'ai_tutor_get_job_status',
+)
+
+SOURCE_BUCKET = 'ai-tutor-source-docs'
+TARGET_BUCKET = 'ai-tutor-target-docs'
+FOLDER_STATS_TABLE = 'ai-tutor-folder-stats'
+CHAT_TABLE = '테이블 명칭'  # ai_tutor_chatbot에 직접 입력된 테이블 이름
+CHAT_BUCKET = '버킷 명칭'  # ai_tutor_chatbot에 직접 입력된 버킷 이름
+LLM_QUOTA_TABLE = 'ai-tutor-llm-quota'  # ai_tutor_common.scheduler (LLM_QUOTA_TABLE 설정 시에만 사용)
+JOB_TABLE = 'ai-tutor-processing-jobs'  # ai_tutor_common.jobs (JOB_TABLE 설정 시에만 사용)
+PROCESSING_QUEUE_URL = 'https://sqs.us-east-1.amazonaws.com/000000000000/ai-tutor-processing'
+PROCESSING_DLQ_URL = 'https://sqs.us-east-1.amazonaws.com/000000000000/ai-tutor-processing-dlq'
+STUDY_GUIDE_QUEUE_URL = 'https://sqs.us-east-1.amazonaws.com/000000000000/ai-tutor-study-guide'  # 설정 시에만 사용
+
+DEFAULT_ENV = {
+    'AWS_REGION': 'us-east-1',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'SOURCE_BUCKET': SOURCE_BUCKET,
+    'TARGET_BUCKET': TARGET_BUCKET,
+    'DOCS_BUCKET': TARGET_BUCKET,
+    'RESULT_BUCKET': TARGET_BUCKET,
+    'FOLDER_STATS_TABLE': FOLDER_STATS_TABLE,
+    'UPSTAGE_API_KEY': 'local-test-key',
+    'UPSTAGE_API_ENDPOINT': 'https://upstage.local/v1/document-digitization',
+    'OPENAI_BASE_URL': 'https://upstage.local/v1',
+    'PROCESSING_QUEUE_URL': PROCESSING_QUEUE_URL,
+}
+
+DEFAULT_KEY_SCHEMA = {
+    FOLDER_STATS_TABLE: ('folder_name', None),
+    CHAT_TABLE: ('tt', None),
+    LLM_QUOTA_TABLE: ('bucket', None),
+    JOB_TABLE: ('job_id', None),
+}
+
+_module_counter = itertools.count()
+
+
+class LocalRuntime:
+    """
+    인메모리 S3 / DynamoDB / SQS / Upstage / solar-pro 위에서 핸들러를 실행
+
+    aws_latency: AWS 호출당 지연(초), upstage / llm: FakeUpstage / FakeLLM 설정(dict) 또는 인스턴스
+    """
+
+    def __init__(self, env=None, aws_latency=0.0, upstage=None, llm=None, key_schema=None):
+        self.recorder = fakes.CallRecorder()
+        self.s3 = fakes.FakeS3(self.recorder, aws_latency)
+        self.dynamodb = fakes.FakeDynamoDB(self.recorder, aws_latency, {**DEFAULT_KEY_SCHEMA, **(key_schema or {})})
+        self.sqs = fakes.FakeSQS(self.recorder, aws_latency)
+        self.upstage = upstage if isinstance(upstage, fakes.FakeUpstage) \
+            else fakes.FakeUpstage(self.recorder, **(upstage or {}))
+        self.llm = llm if isinstance(llm, fakes.FakeLLM) else fakes.FakeLLM(self.recorder, **(llm or {}))
+        self.env = {**DEFAULT_ENV, **(env or {})}
+        self.patches = []
+        self.lock = threading.Lock()
+
+    # 대체 모듈 구성 ----------------------------------------------------------
+    def build_modules(self):
+        runtime = self
+
+        boto3 = types.ModuleType('boto3')
+
+        def client(service_name, *args, **kwargs):
+            if service_name == 's3':
+                return runtime.s3
+            if service_name == 'sqs':
+                return runtime.sqs
+            raise NotImplementedError(f"로컬 런타임에서 지원하지 않는 boto3 클라이언트: {service_name}")
+
+        def resource(service_name, *args, **kwargs):
+            if service_name == 'dynamodb':
+                return runtime.dynamodb
+            raise NotImplementedError(f"로컬 런타임에서 지원하지 않는 boto3 리소스: {service_name}")
+
+        boto3.client = client
+        boto3.resource = resource
+        boto3.Session = lambda *args, **kwargs: types.SimpleNamespace(client=client, resource=resource)
+
+        botocore = types.ModuleType('botocore')
+        botocore_exceptions = types.ModuleType('botocore.exceptions')
+        botocore_exceptions.ClientError = fakes.ClientError
+        botocore_exceptions.BotoCoreError = type('BotoCoreError', (Exception,), {})
+        botocore_config = types.ModuleType('botocore.config')
+        botocore_config.Config = lambda *args, **kwargs: types.SimpleNamespace(**kwargs)
+        botocore.exceptions = botocore_exceptions
+        botocore.config = botocore_config
+
+        openai = types.ModuleType('openai')
+        openai.OpenAI = lambda *args, **kwargs: fakes.FakeOpenAIClient(runtime.llm, *args, **kwargs)
+        openai.OpenAIError = type('OpenAIError', (Exception,), {})
+
+        requests = types.ModuleType('requests')
+        requests.post = runtime.http_post
+        requests.get = runtime.http_get
+        requests.exceptions = types.SimpleNamespace(
+            RequestException=fakes.FakeRequestsError,
+            HTTPError=fakes.FakeRequestsHTTPError,
+            Timeout=fakes.FakeRequestsError,
+        )
+        requests.RequestException = fakes.FakeRequestsError
+        requests.HTTPError = fakes.FakeRequestsHTTPError
+
+        return {
+            'boto3': boto3,
+            'botocore': botocore,
+            'botocore.exceptions': botocore_exceptions,
+            'botocore.config': botocore_config,
+            'openai': openai,
+            'requests': requests,
+        }
+
+    def http_post(self, url, *args, **kwargs):
+        if 'document-digitization' in url or 'document-parse' in url:
+            return self.upstage.post(url, *args, **kwargs)
+        raise NotImplementedError(f"로컬 런타임에서 지원하지 않는 HTTP 요청: POST {url}")
+
+    def http_get(self, url, *args, **kwargs):
+        if 'document-digitization/requests/' in url or '/async-results/' in url:
+            return self.upstage.get(url, *args, **kwargs)
+        raise NotImplementedError(f"로컬 런타임에서 지원하지 않는 HTTP 요청: GET {url}")
+
+    # 컨텍스트 관리 ----------------------------------------------------------
+    def __enter__(self):
+        self.patches = [
+            mock.patch.dict(sys.modules, self.build_modules()),
+            mock.patch.dict(os.environ, self.env),
+        ]
+        for patch in self.patches:
+            patch.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.patches = []
+
+    # 핸들러 실행 ------------------------------------------------------------
+    def load_handler(self, name):
+        """
+        lambda/<name>/<name>.py를 새 모듈로 import (모듈 수준 초기화가 매번 실행됨)
+        """
+        path = LAMBDA_ROOT / name / f'{name}.py'
+        module_name = f'localdev_handler_{name}_{next(_module_counter)}'
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        with self.lock:
+            for directory in (*map(str, LAYER_PATHS), str(path.parent)):
+                if directory not in sys.path:
+                    sys.path.insert(0, directory)
+        spec.loader.exec_module(module)
+        return module
+
+    def invoke(self, handler_module, event, context=None):
+        if context is None:
+            context = fakes.FakeLambdaContext(handler_module.__name__.split('_', 2)[-1].rsplit('_', 1)[0])
+        return handler_module.lambda_handler(event, context)